@@ -3,6 +3,8 @@ from exceptions import Exception, UnicodeDecodeError, TypeError, KeyError
 import logging
 import copy
 import functools
+from collections import MutableMapping
+from datetime import date, datetime, timedelta
 
 from flexget.plugin import PluginError
 from flexget.utils.imdb import extract_id, make_url
@@ -54,6 +56,99 @@ class LazyField(object):
         return unicode(self())
 
 
+def lazy_batch(batch_func):
+    """
+    Decorator for lazy field callbacks, attaches *batch_func* as the batch form of the lookup.
+
+    :meth:`flexget.task.Task.prefetch_lazy` calls the batch form once with params (entries, fields) for all entries
+    waiting on the callback. It should populate what it can in bulk, fields left lazy are evaluated one by one.
+    """
+
+    def decorator(func):
+        func.lazy_batch = batch_func
+        return func
+    return decorator
+
+
+def get_lazy_batch(func):
+    """
+    :param func: Lazy field callback
+    :return: Batch form of the callback bound to the same instance, or None if it does not have one.
+    """
+    batch = getattr(func, 'lazy_batch', None)
+    instance = getattr(func, 'im_self', None)
+    if batch is not None and instance is not None:
+        batch = batch.__get__(instance, type(instance))
+    return batch
+
+
+# Marks fields that did not exist when a snapshot was taken
+_MISSING = object()
+
+# Values of these types are never modified in place, snapshots can share them with the entry
+_immutable_types = (basestring, bool, int, long, float, type(None), datetime, date, timedelta)
+
+
+class SnapshotJournal(object):
+    """
+    A snapshot of an :class:`Entry`. Instead of copying the fields, keeps a reference to the entry and the original
+    values of fields changed after the snapshot was taken. Mutable values are copied when the snapshot is taken since
+    they can be changed in place.
+    """
+
+    __slots__ = ('entry', 'changes')
+
+    def __init__(self, entry, changes):
+        self.entry = entry
+        self.changes = changes
+
+    def record(self, field):
+        """Called by the entry before `field` is changed."""
+        if field not in self.changes:
+            self.changes[field] = dict.get(self.entry, field, _MISSING)
+
+    def view(self):
+        """Reconstructs the fields of the entry as they were when the snapshot was taken.
+
+        :rtype: dict
+        """
+        result = dict(self.entry)
+        for field, value in self.changes.iteritems():
+            if value is _MISSING:
+                result.pop(field, None)
+            else:
+                result[field] = value
+        return result
+
+
+class EntrySnapshots(MutableMapping):
+    """Snapshots of an :class:`Entry` by name. Snapshots taken with :meth:`Entry.take_snapshot` are reconstructed
+    as dicts when accessed, plain dicts can also be stored."""
+
+    __slots__ = ('snapshots',)
+
+    def __init__(self, snapshots):
+        self.snapshots = snapshots
+
+    def __getitem__(self, name):
+        snapshot = self.snapshots[name]
+        if isinstance(snapshot, SnapshotJournal):
+            return snapshot.view()
+        return snapshot
+
+    def __setitem__(self, name, snapshot):
+        self.snapshots[name] = snapshot
+
+    def __delitem__(self, name):
+        del self.snapshots[name]
+
+    def __iter__(self):
+        return iter(self.snapshots)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+
 class Entry(dict):
     """
     Represents one item in task. Must have `url` and *title* fields.
@@ -68,11 +163,20 @@ class Entry(dict):
     and trigger :meth:`~flexget.task.Task.abort`.
     """
 
+    # Bookkeeping is kept out of the instance dict, traces, snapshots and hooks are only allocated when used
+    __slots__ = ('_traces', '_snapshots', '_state', '_hooks', '_containers', 'task')
+
+    #: Actions hooks can be registered for
+    hook_actions = ('accept', 'reject', 'fail', 'complete')
+
     def __init__(self, *args, **kwargs):
-        self.traces = []
-        self.snapshots = {}
+        self._traces = None
+        self._snapshots = None
         self._state = 'undecided'
-        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+        # hook functions by action
+        self._hooks = None
+        # weak references to containers indexing this entry by state, see :class:`flexget.task.EntryContainer`
+        self._containers = None
         self.task = None
 
         if len(args) == 2:
@@ -83,6 +187,30 @@ class Entry(dict):
         # Make sure constructor does not escape our __setitem__ enforcement
         self.update(*args, **kwargs)
 
+    @property
+    def traces(self):
+        """List of (plugin, operation, message) tuples added by :meth:`trace`."""
+        if self._traces is None:
+            self._traces = []
+        return self._traces
+
+    @property
+    def snapshots(self):
+        """Snapshots of the entry taken by :meth:`take_snapshot` by name.
+
+        :rtype: EntrySnapshots
+        """
+        if self._snapshots is None:
+            self._snapshots = {}
+        return EntrySnapshots(self._snapshots)
+
+    def _journal(self, key):
+        """Lets open snapshots record the value of `key` before it changes."""
+        if self._snapshots:
+            for snapshot in self._snapshots.itervalues():
+                if isinstance(snapshot, SnapshotJournal):
+                    snapshot.record(key)
+
     def trace(self, message, operation=None, plugin=None):
         """
         Adds trace message to the entry which should contain useful information about why
@@ -98,6 +226,31 @@ class Entry(dict):
         if item not in self.traces:
             self.traces.append(item)
 
+    def __getstate__(self):
+        # Membership in containers is not copied or pickled with the entry
+        snapshots = dict(self.snapshots) if self._snapshots else None
+        return {'traces': self._traces, 'snapshots': snapshots, '_state': self._state,
+                '_hooks': self._hooks, 'task': self.task}
+
+    def __setstate__(self, state):
+        # Also accepts the instance dicts pickled before bookkeeping moved to slots
+        self._traces = state.get('traces') or None
+        self._snapshots = state.get('snapshots') or None
+        self._state = state.get('_state', 'undecided')
+        self._hooks = dict((action, funcs) for action, funcs in (state.get('_hooks') or {}).iteritems() if funcs) \
+            or None
+        self._containers = None
+        self.task = state.get('task')
+
+    def _set_state(self, state):
+        old_state = self._state
+        self._state = state
+        if self._containers:
+            for ref in self._containers:
+                container = ref()
+                if container is not None:
+                    container._state_changed(self, old_state)
+
     def run_hooks(self, action, **kwargs):
         """
         Run hooks that have been registered for given ``action``.
@@ -105,7 +258,9 @@ class Entry(dict):
         :param action: Name of action to run hooks for
         :param kwargs: Keyword arguments that should be passed to the registered functions
         """
-        for func in self._hooks[action]:
+        if not self._hooks:
+            return
+        for func in self._hooks.get(action, []):
             func(self, **kwargs)
 
     def add_hook(self, action, func, **kwargs):
@@ -117,10 +272,11 @@ class Entry(dict):
         :param kwargs: Keyword arguments that should be passed to ``func``
         :raises: ValueError when given an invalid ``action``
         """
-        try:
-            self._hooks[action].append(functools.partial(func, **kwargs))
-        except KeyError:
+        if action not in self.hook_actions:
             raise ValueError('`%s` is not a valid entry action' % action)
+        if self._hooks is None:
+            self._hooks = {}
+        self._hooks.setdefault(action, []).append(functools.partial(func, **kwargs))
 
     def on_accept(self, func, **kwargs):
         """
@@ -162,7 +318,7 @@ class Entry(dict):
         if self.rejected:
             log.debug('tried to accept rejected %r' % self)
         elif not self.accepted:
-            self._state = 'accepted'
+            self._set_state('accepted')
             self.trace(reason, operation='accept')
             # Run entry on_accept hooks
             self.run_hooks('accept', reason=reason, **kwargs)
@@ -175,7 +331,7 @@ class Entry(dict):
             self.trace('Tried to reject immortal %s' % reason_str)
             return
         if not self.rejected:
-            self._state = 'rejected'
+            self._set_state('rejected')
             self.trace(reason, operation='reject')
             # Run entry on_reject hooks
             self.run_hooks('reject', reason=reason, **kwargs)
@@ -183,7 +339,7 @@ class Entry(dict):
     def fail(self, reason=None, **kwargs):
         log.debug('Marking entry \'%s\' as failed' % self['title'])
         if not self.failed:
-            self._state = 'failed'
+            self._set_state('failed')
             self.trace(reason, operation='fail')
             log.error('Failed %s (%s)' % (self['title'], reason))
             # Run entry on_fail hooks
@@ -243,7 +399,36 @@ class Entry(dict):
         except Exception as e:
             log.debug('trying to debug key `%s` value threw exception: %s' % (key, e))
 
+        if getattr(self, '_snapshots', None):
+            self._journal(key)
         dict.__setitem__(self, key, value)
+        if getattr(self, '_containers', None):
+            for ref in self._containers:
+                container = ref()
+                if container is not None:
+                    container._field_changed(key)
+
+    def __delitem__(self, key):
+        self._journal(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *args):
+        """Overridden so that snapshots see the change."""
+        if key in self:
+            self._journal(key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        """Overridden so that snapshots see the change."""
+        if self:
+            self._journal(next(dict.iterkeys(self)))
+        return dict.popitem(self)
+
+    def clear(self):
+        """Overridden so that snapshots see the change."""
+        for key in dict.keys(self):
+            self._journal(key)
+        dict.clear(self)
 
     def update(self, *args, **kwargs):
         """Overridden so our __setitem__ is not avoided."""
@@ -363,18 +548,46 @@ class Entry(dict):
     def take_snapshot(self, name):
         """
         Takes a snapshot of the entry under *name*. Snapshots can be accessed via :attr:`.snapshots`.
+        Only mutable field values are copied, changes made afterwards are journaled by the entry.
+
         :param string name: Snapshot name
         """
-        snapshot = {}
+        changes = {}
         for field, value in self.iteritems():
+            if isinstance(value, _immutable_types):
+                continue
+            if isinstance(value, LazyField):
+                # Lookups registered later are added to the lazy field in place, the snapshot keeps the current ones
+                lazy = copy.copy(value)
+                lazy.funcs = value.funcs[:]
+                changes[field] = lazy
+                continue
             try:
-                snapshot[field] = copy.deepcopy(value)
+                changes[field] = copy.deepcopy(value)
             except TypeError:
                 log.warning('Unable to take `%s` snapshot for field `%s` in `%s`' % (name, field, self['title']))
-        if snapshot:
+                changes[field] = _MISSING
+        if self:
             if name in self.snapshots:
                 log.warning('Snapshot `%s` is being overwritten for `%s`' % (name, self['title']))
-            self.snapshots[name] = snapshot
+            self.snapshots[name] = SnapshotJournal(self, changes)
+
+    def fork(self):
+        """
+        Returns a copy of the entry for use in another task. Immutable field values are shared with the copy, mutable
+        ones are copied and lazy fields are bound to the copy. Traces, snapshots and hooks are not copied.
+        """
+        forked = Entry()
+        for field, value in self.iteritems():
+            if isinstance(value, LazyField):
+                lazy = LazyField(forked, field, value.funcs[0])
+                lazy.funcs = value.funcs[:]
+                value = lazy
+            elif not isinstance(value, _immutable_types):
+                value = copy.deepcopy(value)
+            # Values were validated when set on this entry
+            dict.__setitem__(forked, field, value)
+        return forked
 
     def update_using_map(self, field_map, source_item, ignore_none=False):
         """
@@ -6,7 +6,10 @@ import logging
 
 log = logging.getLogger('event')
 
+# Handlers of each event, kept ordered by priority
 _events = {}
+# Names of events whose handlers need sorting again after a priority change
+_unsorted = set()
 
 
 class Event(object):
@@ -15,7 +18,16 @@ class Event(object):
     def __init__(self, name, func, priority=128):
         self.name = name
         self.func = func
-        self.priority = priority
+        self._priority = priority
+
+    @property
+    def priority(self):
+        return self._priority
+
+    @priority.setter
+    def priority(self, value):
+        self._priority = value
+        _unsorted.add(self.name)
 
     def __call__(self, *args, **kwargs):
         return self.func(*args, **kwargs)
@@ -52,7 +64,9 @@ def get_events(name):
     """
     if not name in _events:
         raise KeyError('No such event %s' % name)
-    _events[name].sort(reverse=True)
+    if name in _unsorted:
+        _unsorted.discard(name)
+        _events[name].sort(reverse=True)
     return _events[name]
 
 
@@ -71,7 +85,11 @@ def add_event_handler(name, func, priority=128):
             raise ValueError('%s has already been registered as event listener under name %s' % (func.__name__, name))
     log.trace('registered function %s to event %s' % (func.__name__, name))
     event = Event(name, func, priority)
-    events.append(event)
+    # Insert after the handlers with the same or higher priority, keeping the list ordered
+    position = len(events)
+    while position and events[position - 1].priority < priority:
+        position -= 1
+    events.insert(position, event)
     return event
 
 
@@ -95,7 +113,10 @@ def fire_event(name, *args, **kwargs):
     :param args: List of arguments passed to handler function
     :param kwargs: Key Value arguments passed to handler function
     """
-    if not name in _events:
+    events = _events.get(name)
+    if not events:
         return
-    for event in get_events(name):
+    if name in _unsorted:
+        events = get_events(name)
+    for event in events:
         event(*args, **kwargs)
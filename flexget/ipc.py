@@ -16,7 +16,7 @@ log = logging.getLogger('ipc')
 rpyc.core.protocol.DEFAULT_CONFIG['safe_attrs'].update(['items'])
 rpyc.core.protocol.DEFAULT_CONFIG['allow_pickle'] = True
 
-IPC_VERSION = 1
+IPC_VERSION = 2
 AUTH_ERROR = 'authentication error'
 AUTH_SUCCESS = 'authentication success'
 
@@ -54,6 +54,10 @@ class DaemonService(rpyc.Service):
         else:
             self.client_console('Config successfully reloaded from disk.')
 
+    def exposed_status(self):
+        """Returns the scheduler queue state and runtime statistics of the tasks."""
+        return self.manager.scheduler.status()
+
     def exposed_shutdown(self, finish_queue=False):
         log.info('Shutdown requested over ipc.')
         self.client_console('Daemon shutdown requested.')
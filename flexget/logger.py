@@ -1,4 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
+from contextlib import contextmanager
+import itertools
 import logging
 import logging.handlers
 import re
@@ -18,7 +20,8 @@ class FlexGetLogger(logging.Logger):
     local = threading.local()
 
     def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None):
-        extra = {'task': getattr(FlexGetLogger.local, 'task', '')}
+        extra = {'task': getattr(FlexGetLogger.local, 'task', ''),
+                 'execution': getattr(FlexGetLogger.local, 'execution', '')}
         return logging.Logger.makeRecord(self, name, level, fn, lno, msg, args, exc_info, func, extra)
 
     def trace(self, msg, *args, **kwargs):
@@ -65,10 +68,87 @@ def set_execution(execution):
     FlexGetLogger.local.execution = execution
 
 
+def get_execution():
+    return getattr(FlexGetLogger.local, 'execution', '')
+
+
 def set_task(task):
     FlexGetLogger.local.task = task
 
 
+# Maps execution ids to the streams their output is being captured to
+_output_streams = {}
+_execution_ids = itertools.count(1)
+
+
+class OutputRouter(object):
+    """
+    Stands in for sys.stdout or sys.stderr. Everything is written to the wrapped stream, and also copied to the
+    capture stream of the execution running in the writing thread, if there is one.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        self.stream.write(text)
+        capture = _output_streams.get(get_execution())
+        if capture is not None:
+            capture.write(text)
+
+    def __getattr__(self, item):
+        return getattr(self.stream, item)
+
+
+class RoutingHandler(logging.Handler):
+    """Sends log records to the capture stream of the execution they were logged from."""
+
+    def emit(self, record):
+        capture = _output_streams.get(getattr(record, 'execution', None) or get_execution())
+        if capture is None:
+            return
+        try:
+            capture.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+_routing_handler = None
+
+
+@contextmanager
+def capture_output(stream):
+    """
+    Copies log messages and stdout/stderr output produced by the current thread to `stream` while active.
+    Other threads are not affected, so any number of captures may be running at the same time.
+
+    :param stream: File-like object to write the output to. If None, nothing is captured.
+    """
+    global _routing_handler
+    if stream is None:
+        yield None
+        return
+    if _routing_handler is None:
+        _routing_handler = RoutingHandler()
+        _routing_handler.setFormatter(FlexGetFormatter())
+        logging.getLogger().addHandler(_routing_handler)
+    # Someone else may have replaced these since the last capture
+    if not isinstance(sys.stdout, OutputRouter):
+        sys.stdout = OutputRouter(sys.stdout)
+    if not isinstance(sys.stderr, OutputRouter):
+        sys.stderr = OutputRouter(sys.stderr)
+
+    previous = get_execution()
+    execution = 'execution-%s' % next(_execution_ids)
+    _output_streams[execution] = stream
+    set_execution(execution)
+    try:
+        yield execution
+    finally:
+        set_execution(previous)
+        del _output_streams[execution]
+
+
 class PrivacyFilter(logging.Filter):
     """Edits log messages and <hides> obviously private information."""
 
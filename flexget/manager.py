@@ -9,6 +9,7 @@ import shutil
 import logging
 import threading
 import pkg_resources
+import rpyc
 import yaml
 from datetime import datetime, timedelta
 
@@ -25,8 +26,8 @@ Session = sessionmaker()
 from flexget import config_schema, db_schema
 from flexget.event import fire_event
 from flexget.ipc import IPCServer, IPCClient
-from flexget.scheduler import Scheduler
-from flexget.utils.tools import pid_exists
+from flexget.scheduler import Scheduler, format_status
+from flexget.utils.tools import pid_exists, console
 
 log = logging.getLogger('manager')
 
@@ -242,6 +243,8 @@ class Manager(object):
                     # If flexget is being called from another script, e.g. windows service helper, and we are not the
                     # main thread, this error will occur.
                     log.debug('Error registering sigterm handler: %s' % e)
+                # Worker processes must be forked while this is the only thread
+                self.scheduler.start_process_pool()
                 self.ipc_server.start()
                 fire_event('manager.daemon.started', self)
                 self.scheduler.start()
@@ -255,6 +258,15 @@ class Manager(object):
             ipc_info = self.check_ipc_info()
             if ipc_info:
                 log.info('Daemon running. (PID: %s)' % ipc_info['pid'])
+                try:
+                    client = IPCClient(ipc_info['port'], ipc_info['password'])
+                except ValueError as e:
+                    log.error(e)
+                else:
+                    status = rpyc.utils.classic.obtain(client.status())
+                    for line in format_status(status):
+                        console(line)
+                self.shutdown()
             else:
                 log.info('No daemon appears to be running for this config.')
         elif options.action in ['stop', 'reload']:
@@ -520,10 +532,12 @@ class Manager(object):
         # fire up the engine
         log.debug('Connecting to: %s' % self.database_uri)
         try:
+            # Scheduler workers may be writing at the same time, wait for the database lock rather than failing
             self.engine = sqlalchemy.create_engine(self.database_uri,
                                                    echo=self.options.debug_sql,
                                                    poolclass=SingletonThreadPool,
-                                                   connect_args={'check_same_thread': False})  # assert_unicode=True
+                                                   connect_args={'check_same_thread': False,
+                                                                 'timeout': 30})  # assert_unicode=True
         except ImportError:
             print('FATAL: Unable to use SQLite. Are you running Python 2.5 - 2.7 ?\n'
                   'Python should normally have SQLite support built in.\n'
@@ -684,6 +698,11 @@ class Manager(object):
         os.dup2(so.fileno(), sys.stdout.fileno())
         os.dup2(se.fileno(), sys.stderr.fileno())
 
+    @property
+    def db_cleanup_due(self):
+        """True if the database cleanup interval has passed since the last cleanup."""
+        return self.persist.get('last_cleanup', datetime(1900, 1, 1)) < datetime.now() - DB_CLEANUP_INTERVAL
+
     def db_cleanup(self, force=False):
         """
         Perform database cleanup if cleanup interval has been met.
@@ -696,8 +715,7 @@ class Manager(object):
 
         :param bool force: Run the cleanup no matter whether the interval has been met.
         """
-        expired = self.persist.get('last_cleanup', datetime(1900, 1, 1)) < datetime.now() - DB_CLEANUP_INTERVAL
-        if force or expired:
+        if force or self.db_cleanup_due:
             log.info('Running database cleanup.')
             session = Session()
             try:
@@ -406,7 +406,7 @@ class CoreArgumentParser(ArgumentParser):
         start_parser = daemon_parser.add_subparser('start', help='start the daemon')
         start_parser.add_argument('-d', '--daemonize', action='store_true', help=daemonize_help)
         daemon_parser.add_subparser('stop', help='shutdown the running daemon')
-        daemon_parser.add_subparser('status', help='check if a daemon is running')
+        daemon_parser.add_subparser('status', help='check if a daemon is running, and show statistics of its tasks')
         daemon_parser.add_subparser('reload', help='causes a running daemon to reload the config from disk')
         daemon_parser.set_defaults(loglevel='info')
 
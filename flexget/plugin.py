@@ -21,7 +21,7 @@ log = logging.getLogger('plugin')
 
 __all__ = ['PluginWarning', 'PluginError', 'register_plugin', 'register_parser_option', 'register_task_phase',
            'get_plugin_by_name', 'get_plugins_by_group', 'get_plugin_keywords', 'get_plugins_by_phase',
-           'get_phases_by_plugin', 'internet', 'priority']
+           'get_phases_by_plugin', 'get_phase_plan', 'internet', 'priority', 'streaming']
 
 
 class DependencyError(Exception):
@@ -157,6 +157,15 @@ def priority(value):
         return target
     return decorator
 
+
+def streaming(target):
+    """
+    Streaming decorator for phase methods. Marks the method safe to be called on chunks of the task entries, ie. it
+    only looks at each entry on its own. Used by tasks with the stream plugin enabled.
+    """
+    target.streaming = True
+    return target
+
 DEFAULT_PRIORITY = 128
 
 plugin_contexts = ['task', 'root']
@@ -182,6 +191,9 @@ _loaded_plugins = {}
 _plugin_options = []
 _new_phase_queue = {}
 
+# Cached results of get_phase_plan, cleared whenever plugins are registered
+_phase_plans = {}
+
 
 def register_task_phase(name, before=None, after=None):
     """Adds a new task phase to the available phases."""
@@ -206,6 +218,7 @@ def register_task_phase(name, before=None, after=None):
             task_phases.insert(task_phases.index(before), phase_name)
         return True
 
+    _phase_plans.clear()
     # if can't add yet (dependencies) queue addition
     if not add_phase(name, before, after):
         _new_phase_queue[name] = [before, after]
@@ -224,7 +237,7 @@ class PluginInfo(dict):
     dupe_counter = 0
 
     def __init__(self, plugin_class, name=None, groups=None, builtin=False, debug=False, api_ver=1,
-                 contexts=None, category=None):
+                 contexts=None, category=None, exclusive=False):
         """
         Register a plugin.
 
@@ -237,6 +250,8 @@ class PluginInfo(dict):
         :param list contexts: List of where this plugin is configurable. Can be 'task', 'root', or None
         :param string category: The type of plugin. Can be one of the task phases.
             Defaults to the package name containing the plugin.
+        :param bool exclusive: True if plugin changes state shared by all tasks while a task runs. Tasks using it are
+            never run at the same time as any other task.
         """
         dict.__init__(self)
 
@@ -266,6 +281,7 @@ class PluginInfo(dict):
         self.debug = debug
         self.contexts = contexts
         self.category = category
+        self.exclusive = exclusive
         self.phase_handlers = {}
 
         self.plugin_class = plugin_class
@@ -327,6 +343,7 @@ class PluginInfo(dict):
                 # provides backwards compatibility
                 event.plugin = self
                 self.phase_handlers[phase] = event
+                _phase_plans.clear()
 
     def __getattr__(self, attr):
         if attr in self:
@@ -462,6 +479,25 @@ def get_plugins(phase=None, group=None, context=None, category=None, min_api=Non
     return ifilter(matches, plugins.itervalues())
 
 
+def get_phase_plan(phase):
+    """
+    Get all plugins handling `phase` in the order they should run. Results are cached, only priorities of the handlers
+    are checked on each call since plugins like plugin_priority change them during task execution.
+
+    :param string phase: Name of the phase.
+    :return: List of (PluginInfo, handler) tuples ordered by handler priority.
+    """
+    cached = _phase_plans.get(phase)
+    if cached is not None:
+        plan, priorities = cached
+        if all(handler.priority == priority for (_, handler), priority in zip(plan, priorities)):
+            return plan
+    plan = [(p, p.phase_handlers[phase]) for p in get_plugins(phase=phase)]
+    plan.sort(key=lambda item: item[1], reverse=True)
+    _phase_plans[phase] = (plan, [handler.priority for _, handler in plan])
+    return plan
+
+
 def plugin_schemas(**kwargs):
     """Create a dict schema that matches plugins specified by `kwargs`"""
     return {'type': 'object',
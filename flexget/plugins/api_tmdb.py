@@ -112,6 +112,19 @@ class TMDBMovie(TMDBContainer, Base):
     posters = relation('TMDBPoster', backref='movie', cascade='all, delete, delete-orphan')
     genres = relation('TMDBGenre', secondary=genres_table, backref='movies')
 
+    @property
+    def expired(self):
+        """True if cached details of the movie should be refreshed from TMDb"""
+        refresh_time = timedelta(days=2)
+        if self.released:
+            if self.released > datetime.now() - timedelta(days=7):
+                # Movie is less than a week old, expire after 1 day
+                refresh_time = timedelta(days=1)
+            else:
+                age_in_years = (datetime.now() - self.released).days / 365
+                refresh_time += timedelta(days=age_in_years * 5)
+        return self.updated < datetime.now() - refresh_time
+
     def update_from_object(self, update_object):
         TMDBContainer.update_from_object(self, update_object)
         self.translated = len(update_object.translations) > 0
@@ -258,15 +271,7 @@ class ApiTmdb(object):
                     movie = found.movie
         if movie:
             # Movie found in cache, check if cache has expired.
-            refresh_time = timedelta(days=2)
-            if movie.released:
-                if movie.released > datetime.now() - timedelta(days=7):
-                    # Movie is less than a week old, expire after 1 day
-                    refresh_time = timedelta(days=1)
-                else:
-                    age_in_years = (datetime.now() - movie.released).days / 365
-                    refresh_time += timedelta(days=age_in_years * 5)
-            if movie.updated < datetime.now() - refresh_time and not only_cached:
+            if movie.expired and not only_cached:
                 log.debug('Cache has expired for %s, attempting to refresh from TMDb.' % id_str())
                 try:
                     ApiTmdb.get_movie_details(movie, session)
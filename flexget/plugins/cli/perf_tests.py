@@ -8,7 +8,7 @@ from flexget.utils.tools import console
 
 log = logging.getLogger('perftests')
 
-TESTS = ['imdb_query']
+TESTS = ['imdb_query', 'seen_lookup', 'series_match']
 
 
 def cli_perf_test(manager, options):
@@ -19,6 +19,10 @@ def cli_perf_test(manager, options):
     try:
         if options.test_name == 'imdb_query':
             imdb_query(session)
+        elif options.test_name == 'seen_lookup':
+            seen_lookup(session)
+        elif options.test_name == 'series_match':
+            series_match()
     finally:
         session.close()
 
@@ -71,6 +75,83 @@ def imdb_query(session):
     log.debug('Took %.2f seconds to query %i movies' % (took, len(imdb_urls)))
 
 
+def seen_lookup(session, amount=10000):
+    """Compares looking up seen values one entry at a time against the chunked lookup of the seen filter."""
+    import time
+    from sqlalchemy import event as sa_event
+    from sqlalchemy.sql.expression import select
+    from flexget.plugins.filter.seen import FilterSeen, SeenEntry, SeenField
+
+    queries = [0]
+
+    def count_query(*args):
+        queries[0] += 1
+
+    # The listener stays for the rest of the process, which ends after the test
+    sa_event.listen(session.bind, 'before_cursor_execute', count_query)
+
+    log.info('Getting seen values ...')
+    values = [row[0] for row in session.execute(select([SeenField.value]).limit(amount // 2))]
+    seen_count = len(values)
+    # Rest of the looked values are not seen, as in a typical feed
+    values.extend('not seen %s' % i for i in range(amount - seen_count))
+    log.info('Looking up %i values, %i of them seen' % (len(values), seen_count))
+
+    # One query per entry, and another one for each seen entry
+    queries[0] = 0
+    start_time = time.time()
+    for value in values:
+        found = session.query(SeenField).join(SeenEntry).filter(SeenField.value.in_([value])).\
+            filter(SeenEntry.local == False).first()
+        if found:
+            session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
+    log.info('Per entry lookup took %.2f seconds with %i queries' % (time.time() - start_time, queries[0]))
+
+    queries[0] = 0
+    start_time = time.time()
+    seen = FilterSeen().lookup(session, set(values))
+    log.info('Chunked lookup took %.2f seconds with %i queries, found %i seen values' %
+             (time.time() - start_time, queries[0], len(seen)))
+
+
+def series_match(series_amount=1200, title_amount=3000):
+    """Compares parsing every title for every series against parsing only the candidates of the series index."""
+    import time
+    from flexget.utils.titles import SeriesParser, SeriesIndex, ParseWarning
+
+    names = ['Series %s Name' % i for i in range(series_amount)]
+    # Most titles in a feed are not about configured series
+    titles = ['Series %s Name S01E01 720p HDTV x264-GRP' % (i * 7) for i in range(title_amount // 10)]
+    titles.extend('Other Show %s S01E01 HDTV x264-GRP' % i for i in range(title_amount - len(titles)))
+    log.info('Matching %i titles against %i series' % (len(titles), len(names)))
+
+    def parse(name, titles):
+        parser = SeriesParser(name)
+        matched = 0
+        for title in titles:
+            try:
+                parser.parse(title)
+            except ParseWarning:
+                continue
+            matched += parser.valid
+        return matched
+
+    start_time = time.time()
+    matched = sum(parse(name, titles) for name in names)
+    log.info('Parsing every title took %.2f seconds, %i matches' % (time.time() - start_time, matched))
+
+    start_time = time.time()
+    index = SeriesIndex()
+    for name in names:
+        index.add(name, [name])
+    candidates = {}
+    for title in titles:
+        for name in index.candidates(title):
+            candidates.setdefault(name, []).append(title)
+    matched = sum(parse(name, candidates[name]) for name in names if name in candidates)
+    log.info('Parsing candidates took %.2f seconds, %i matches' % (time.time() - start_time, matched))
+
+
 @event('options.register')
 def register_parser_arguments():
     perf_parser = options.register_command('perf-test', cli_perf_test)
@@ -61,6 +61,7 @@ class CrossMatch(object):
                     continue
 
         # perform action on intersecting entries
+        task.prefetch_lazy(task.entries, fields)
         for entry in task.entries:
             for generated_entry in match_entries:
                 log.trace('checking if %s matches %s' % (entry['title'], generated_entry['title']))
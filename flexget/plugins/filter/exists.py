@@ -27,28 +27,43 @@ class FilterExists(object):
             config = [config]
         return config
 
+    def on_task_start(self, task, config):
+        # Names found by path and rerun, scanned once per run since the filter may be called with chunks of entries.
+        # Kept with the task, the plugin instance is shared by tasks running at the same time.
+        task.exists_scans = {}
+
     @plugin.priority(-1)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         if not task.accepted:
             log.debug('No accepted entries, not scanning for existing.')
             return
-        log.verbose('Scanning path(s) for existing files.')
         config = self.prepare_config(config)
         for path in config:
             # unicode path causes crashes on some paths
             path = str(os.path.expanduser(path))
             if not os.path.exists(path):
                 raise plugin.PluginWarning('Path %s does not exist' % path, log)
-            # scan through
-            for root, dirs, files in os.walk(path, followlinks=True):
-                # convert filelists into utf-8 to avoid unicode problems
-                dirs = [x.decode('utf-8', 'ignore') for x in dirs]
-                files = [x.decode('utf-8', 'ignore') for x in files]
-                for entry in task.accepted:
-                    name = entry['title']
-                    if name in dirs or name in files:
-                        log.debug('Found %s in %s' % (name, root))
-                        entry.reject(os.path.join(root, name))
+            key = (path, task.rerun_count)
+            if key not in task.exists_scans:
+                task.exists_scans[key] = self.scan(path)
+            for entry in task.accepted:
+                root = task.exists_scans[key].get(entry['title'])
+                if root is not None:
+                    log.debug('Found %s in %s' % (entry['title'], root))
+                    entry.reject(os.path.join(root, entry['title']))
+
+    def scan(self, path):
+        """
+        :return: Dict of file and directory names found under `path` mapped to the directory they were first found in
+        """
+        log.verbose('Scanning path %s for existing files.' % path)
+        found = {}
+        for root, dirs, files in os.walk(path, followlinks=True):
+            # convert filelists into utf-8 to avoid unicode problems
+            for name in dirs + files:
+                found.setdefault(name.decode('utf-8', 'ignore'), root)
+        return found
 
 @event('plugin.register')
 def register_plugin():
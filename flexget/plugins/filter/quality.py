@@ -23,6 +23,7 @@ class FilterQuality(object):
 
     # Run before series and imdb plugins, so correct qualities are chosen
     @plugin.priority(175)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         if not isinstance(config, list):
             config = [config]
@@ -48,8 +48,8 @@ class FilterQueueBase(object):
     schema = {'type': 'boolean'}
 
     def on_task_start(self, task, config):
-        # Dict of entries accepted by this plugin {imdb_id: entry} format
-        self.accepted_entries = {}
+        # Dict of entries accepted by queue plugins {item id: entry} format, kept on the task as tasks may run at once
+        task.queue_accepted = {}
 
     def matches(self, task, config, entry):
         """This should return the QueueItem object for the match, if this entry is in the queue."""
@@ -62,17 +62,17 @@ class FilterQueueBase(object):
 
         for entry in task.entries:
             item = self.matches(task, config, entry)
-            if item and item.id not in self.accepted_entries:
+            if item and item.id not in task.queue_accepted:
                 # Accept this entry if it matches a queue item that has not been accepted this run yet
                 entry.accept(reason='Matches %s queue item: %s' % (item.discriminator, item.title))
                 # Keep track of entries we accepted, so they can be marked as downloaded on task_exit if successful
-                self.accepted_entries[item.id] = entry
+                task.queue_accepted[item.id] = entry
 
     def on_task_learn(self, task, config):
         if config is False:
             return
 
-        for id, entry in self.accepted_entries.iteritems():
+        for id, entry in task.queue_accepted.iteritems():
             if entry in task.accepted and entry not in task.failed:
                 # If entry was not rejected or failed, mark it as downloaded
                 update_values = {'downloaded': datetime.now(),
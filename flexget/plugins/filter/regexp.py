@@ -132,6 +132,7 @@ class FilterRegexp(object):
         return out_config
 
     @plugin.priority(172)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         # TODO: what if accept and accept_excluding configured? Should raise error ...
         config = self.prepare_config(config)
@@ -96,11 +96,13 @@ class FilterRememberRejected(object):
         task.session.commit()
 
     @plugin.priority(-255)
+    @plugin.streaming
     def on_task_input(self, task, config):
         for entry in task.all_entries:
             entry.on_reject(self.on_entry_reject, task=task)
 
     @plugin.priority(255)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         """Reject any remembered entries from previous runs"""
         (task_id,) = task.session.query(RememberTask.id).filter(RememberTask.name == task.name).first()
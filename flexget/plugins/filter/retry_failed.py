@@ -106,6 +106,7 @@ class PluginFailed(object):
         return config
 
     @plugin.priority(-255)
+    @plugin.streaming
     def on_task_input(self, task, config):
         for entry in task.all_entries:
             entry.on_fail(self.add_failed)
@@ -135,6 +136,7 @@ class PluginFailed(object):
             failed.close()
 
     @plugin.priority(255)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         if config is False:
             return
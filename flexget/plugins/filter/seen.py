@@ -9,23 +9,46 @@ forget (string)
 """
 
 from __future__ import unicode_literals, division, absolute_import
+import io
+import itertools
 import logging
+import os
+import threading
+import weakref
 from datetime import datetime, timedelta
 
-from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, Index
+import sqlalchemy
+from sqlalchemy import Column, Integer, DateTime, Unicode, Boolean, or_, select, update, func, Index
 from sqlalchemy.orm import relation
 from sqlalchemy.schema import ForeignKey
 
 from flexget import db_schema, options, plugin
 from flexget.event import event
 from flexget.manager import Session
+from flexget.utils.bloom import BloomFilter
 from flexget.utils.imdb import is_imdb_url, extract_id
 from flexget.utils.sqlalchemy_utils import table_schema, table_add_column
+from flexget.utils.text_index import TextIndex
 from flexget.utils.tools import console
 
 log = logging.getLogger('seen')
 Base = db_schema.versioned_base('seen', 4)
 
+# Maximum amount of values looked up in one query, keeps below the bound parameter limit of sqlite
+LOOKUP_CHUNK_SIZE = 500
+# Amount of rows inserted with one statement when learning in bulk
+LEARN_CHUNK_SIZE = 1000
+# Amount of lines read at once by the seen import command
+IMPORT_BATCH_SIZE = 100000
+# Smallest amount of values the bloom filter of seen values is sized for
+FILTER_MIN_CAPACITY = 100000
+
+# Bloom filter of all seen field values, opened on first use
+_seen_filter = None
+_seen_filter_lock = threading.Lock()
+# Sessions which have added values to the filter without committing them yet, a rebuild would drop those values
+_learning_sessions = weakref.WeakSet()
+
 
 @db_schema.upgrade('seen')
 def upgrade(ver, session):
@@ -98,6 +121,169 @@ class SeenField(Base):
         return '<SeenField(field=%s,value=%s,added=%s)>' % (self.field, self.value, self.added)
 
 
+seen_value_index = TextIndex(SeenField.__table__, 'value')
+seen_value_index.watch(SeenField)
+
+
+@event('manager.startup')
+def create_seen_index(manager):
+    session = Session()
+    try:
+        seen_value_index.create(session)
+        session.commit()
+    finally:
+        session.close()
+
+
+def _filter_stamp(session):
+    """:returns: Amount of seen fields and the highest seen field id, to tell if the filter is in sync."""
+    count, max_id = session.query(func.count(SeenField.id), func.max(SeenField.id)).one()
+    return count, max_id or 0
+
+
+def _filter_path():
+    from flexget.manager import manager
+    return manager.db_filename and manager.db_filename + '.seen-filter'
+
+
+def _in_worker_process():
+    from flexget.manager import manager
+    return manager.scheduler.forwarded_executions is not None
+
+
+def _unusable_filter():
+    """:returns: A filter which does not rule out any value, so that all values are looked up from the database."""
+    bloom = BloomFilter(capacity=1)
+    bloom.mark_stale()
+    return bloom
+
+
+def seen_filter(session):
+    """
+    Bloom filter containing every seen field value, used to skip the database for values which have never been seen.
+    It is kept next to the database and memory mapped on first use, or rebuilt if it is out of sync.
+
+    :rtype: BloomFilter
+    """
+    global _seen_filter
+    with _seen_filter_lock:
+        if _seen_filter is not None and _seen_filter.replaced:
+            # Another process has rebuilt the filter, it is complete when moved in place. Tasks may still be using the
+            # old one, it is closed once they are done with it.
+            _seen_filter = BloomFilter(_filter_path()) if os.path.exists(_filter_path()) else None
+        if _seen_filter is None and _in_worker_process():
+            # Other workers may be learning already, checking the filter against the database could lose their values
+            log.debug('seen filter was not opened before the worker processes were started, not using it')
+            _seen_filter = _unusable_filter()
+        if _seen_filter is None:
+            bloom = BloomFilter(_filter_path())
+            count, max_id = _filter_stamp(session)
+            if bloom.stale or bloom.stamp != (count, max_id) or count > bloom.capacity:
+                bloom.close()
+                log.verbose('Building filter of seen values, this may take a moment.')
+                bloom = _build_filter(session)
+            _seen_filter = bloom
+        return _seen_filter
+
+
+def _build_filter(session):
+    count, max_id = _filter_stamp(session)
+    values = (value for (value,) in session.query(SeenField.value).yield_per(10000))
+    try:
+        bloom = BloomFilter.build(_filter_path(), values, (count, max_id),
+                                  capacity=max(FILTER_MIN_CAPACITY, count * 2))
+    except (IOError, OSError) as e:
+        log.error('Unable to create filter of seen values (%s), all values are looked up from the database.' % e)
+        return _unusable_filter()
+    log.debug('Added %s seen values to the filter' % count)
+    return bloom
+
+
+def _learning_filter(session):
+    """
+    :returns: The seen filter, to add values learned in `session` to. The filter is not rebuilt by :func:`forget`
+        until the transaction of `session` has ended.
+    """
+    with _seen_filter_lock:
+        _learning_sessions.add(session)
+    return seen_filter(session)
+
+
+@sqlalchemy.event.listens_for(Session, 'after_transaction_end')
+def _learning_done(session, transaction):
+    # Session is left without a transaction only when the outermost one ends
+    if session.transaction is None and session in _learning_sessions:
+        with _seen_filter_lock:
+            _learning_sessions.discard(session)
+
+
+def _learns_in_progress():
+    """
+    :returns: True if values may have been added to the filter without being committed to the database yet. You must
+        hold `_seen_filter_lock`.
+    """
+    from flexget.manager import manager
+    if manager.scheduler.process_pool or _in_worker_process():
+        # Learns of the other processes are not known here
+        return True
+    if not manager.has_lock and manager.check_lock():
+        # A running daemon may be learning
+        return True
+    return bool(_learning_sessions)
+
+
+def rebuild_seen_filter(session, unless_learning=False):
+    """
+    Rebuilds the seen filter from the database, dropping values which have been forgotten. Values which have been
+    learned, but not committed yet, would be dropped as well. The database cleanup runs while no task is running, so
+    no learn is in progress then.
+
+    :param bool unless_learning: Skip the rebuild if a learn may be in progress. Forgotten values stay in the filter
+        until the next rebuild, they are only looked up from the database needlessly.
+    """
+    global _seen_filter
+    with _seen_filter_lock:
+        if unless_learning and _learns_in_progress():
+            log.debug('values are being learned, not rebuilding the seen filter')
+            return
+        if _seen_filter:
+            # Tasks may still be using the old filter, make sure they go to the database instead
+            _seen_filter.mark_stale()
+        _seen_filter = _build_filter(session)
+
+
+def sync_seen_filter(session):
+    """Stores the current state of the database with the seen filter, so it is reused on the next start."""
+    with _seen_filter_lock:
+        if _seen_filter and not _seen_filter.stale:
+            _seen_filter.sync(*_filter_stamp(session))
+
+
+@event('manager.initialize')
+def reset_seen_filter(manager):
+    """The filter belongs to the database of the manager."""
+    global _seen_filter
+    with _seen_filter_lock:
+        if _seen_filter:
+            _seen_filter.close()
+        _seen_filter = None
+
+
+@event('manager.shutdown')
+def close_seen_filter(manager):
+    global _seen_filter
+    if _seen_filter is None:
+        return
+    session = Session()
+    try:
+        sync_seen_filter(session)
+    finally:
+        session.close()
+    with _seen_filter_lock:
+        _seen_filter.close()
+        _seen_filter = None
+
+
 @event('forget')
 def forget(value):
     """
@@ -123,6 +309,9 @@ def forget(value):
             count += 1
             log.debug('forgetting %s' % se)
             session.delete(se)
+        if count:
+            session.flush()
+            rebuild_seen_filter(session, unless_learning=True)
         return count, field_count
     finally:
         session.commit()
@@ -152,38 +341,67 @@ class FilterSeen(object):
         return root
 
     @plugin.priority(255)
+    @plugin.streaming
     def on_task_filter(self, task, config, remember_rejected=False):
         """Filter seen entries"""
         if config is False:
             log.debug('%s is disabled' % self.keyword)
             return
 
-        fields = self.fields
-        local = config == 'local'
-
+        # values looked for each entry, in the order of fields
+        entry_values = []
         for entry in task.entries:
-            # construct list of values looked
             values = []
-            for field in fields:
+            for field in self.fields:
                 if field not in entry:
                     continue
                 if entry[field] not in values and entry[field]:
                     values.append(unicode(entry[field]))
             if values:
-                log.trace('querying for: %s' % ', '.join(values))
-                # check if SeenField.value is any of the values
-                found = task.session.query(SeenField).join(SeenEntry).filter(SeenField.value.in_(values))
-                if local:
-                    found = found.filter(SeenEntry.task == task.name)
-                else:
-                    found = found.filter(SeenEntry.local == False)
-                found = found.first()
-                if found:
-                    log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], found.value))
-                    se = task.session.query(SeenEntry).filter(SeenEntry.id == found.seen_entry_id).one()
-                    entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
-                                 (found.field, found.value, se.task, se.added.strftime('%Y-%m-%d %H:%M')),
-                                remember=remember_rejected)
+                entry_values.append((entry, values))
+        if not entry_values:
+            return
+
+        seen = self.lookup(task.session, set(value for entry, values in entry_values for value in values),
+                           task_name=task.name if config == 'local' else None)
+        for entry, values in entry_values:
+            for value in values:
+                if value not in seen:
+                    continue
+                field, seen_task, added = seen[value]
+                log.debug("Rejecting '%s' '%s' because of seen '%s'" % (entry['url'], entry['title'], value))
+                entry.reject('Entry with %s `%s` is already marked seen in the task %s at %s' %
+                             (field, value, seen_task, added.strftime('%Y-%m-%d %H:%M')),
+                             remember=remember_rejected)
+                break
+
+    def lookup(self, session, values, task_name=None):
+        """
+        Looks up which of the given values are seen, in chunks of :data:`LOOKUP_CHUNK_SIZE` values per query. Values
+        ruled out by the :func:`seen_filter` are not queried.
+
+        :param session: Database session to query with
+        :param values: Field values to look for
+        :param task_name: If given, only values seen locally in this task are looked for. Otherwise values seen
+            globally.
+        :return: Dict mapping the values which are seen to (field, task, added) of a seen entry having them
+        """
+        seen = {}
+        # Values which are certainly not seen need no query
+        bloom = seen_filter(session)
+        values = [value for value in values if value in bloom]
+        for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+            log.trace('querying for: %s' % ', '.join(chunk))
+            found = session.query(SeenField.value, SeenField.field, SeenEntry.task, SeenEntry.added).\
+                filter(SeenField.seen_entry_id == SeenEntry.id).filter(SeenField.value.in_(chunk))
+            if task_name:
+                found = found.filter(SeenEntry.task == task_name)
+            else:
+                found = found.filter(SeenEntry.local == False)
+            for value, field, seen_task, added in found:
+                seen.setdefault(value, (field, seen_task, added))
+        return seen
 
     def on_task_learn(self, task, config):
         """Remember succeeded entries"""
@@ -195,32 +413,51 @@ class FilterSeen(object):
         if isinstance(config, list):
             fields.extend(config)
 
-        for entry in task.accepted:
-            self.learn(task, entry, fields=fields, local=config == 'local')
-            # verbose if in learning mode
-            if task.options.learn:
+        self.learn_entries(task, task.accepted, fields=fields, local=config == 'local')
+        # verbose if in learning mode
+        if task.options.learn:
+            for entry in task.accepted:
                 log.info("Learned '%s' (will skip this in the future)" % (entry['title']))
 
-    def learn(self, task, entry, fields=None, reason=None, local=False):
-        """Marks entry as seen"""
-        # no explicit fields given, use default
-        if not fields:
-            fields = self.fields
-        se = SeenEntry(entry['title'], unicode(task.name), reason, local)
+    def _learned_fields(self, entry, fields):
+        """:returns: List of (field, value) tuples to remember from `entry`"""
         remembered = []
         for field in fields:
             if not field in entry:
                 continue
             # removes duplicate values (eg. url, original_url are usually same)
-            if entry[field] in remembered:
+            if entry[field] in [value for name, value in remembered]:
                 continue
-            remembered.append(entry[field])
-            sf = SeenField(unicode(field), unicode(entry[field]))
-            se.fields.append(sf)
+            remembered.append((field, entry[field]))
             log.debug("Learned '%s' (field: %s)" % (entry[field], field))
+        return [(unicode(field), unicode(value)) for field, value in remembered]
+
+    def learn(self, task, entry, fields=None, reason=None, local=False):
+        """Marks entry as seen"""
+        # no explicit fields given, use default
+        if not fields:
+            fields = self.fields
+        se = SeenEntry(entry['title'], unicode(task.name), reason, local)
+        for field, value in self._learned_fields(entry, fields):
+            se.fields.append(SeenField(field, value))
         # Only add the entry to the session if it has one of the required fields
         if se.fields:
             task.session.add(se)
+            bloom = _learning_filter(task.session)
+            for sf in se.fields:
+                bloom.add(sf.value)
+
+    def learn_entries(self, task, entries, fields=None, reason=None, local=False):
+        """Marks many entries as seen at once, see :func:`bulk_learn`. Goes through :meth:`learn` for each entry
+        instead if a subclass overrides it."""
+        if not fields:
+            fields = self.fields
+        if self.learn.__func__ is not FilterSeen.learn.__func__:
+            for entry in entries:
+                self.learn(task, entry, fields=fields, reason=reason, local=local)
+            return len(entries)
+        items = [(entry['title'], self._learned_fields(entry, fields)) for entry in entries]
+        return bulk_learn(task.session, items, task.name, reason=reason, local=local)
 
     def forget(self, task, title):
         """Forget SeenEntry with :title:. Return True if forgotten."""
@@ -231,6 +468,65 @@ class FilterSeen(object):
             return True
 
 
+def bulk_learn(session, items, task_name, reason=None, local=False):
+    """
+    Marks titles as seen without the ORM, which is a lot faster than adding a :class:`SeenEntry` for each. Fields of
+    all titles are inserted in bulk.
+
+    :param session: Database session to insert with
+    :param items: List of (title, fields) tuples, where fields is a list of (field, value) tuples to remember. Titles
+        without fields are skipped.
+    :param task_name: Name of the task the titles are learned in
+    :return: Amount of titles learned
+    """
+    items = [(title, fields) for title, fields in items if fields]
+    if not items:
+        return 0
+    # Open the filter before inserting, so it is not rebuilt because of the new rows
+    bloom = _learning_filter(session)
+    added = datetime.now()
+    connection = session.connection()
+    insert = SeenEntry.__table__.insert()
+    ids = []
+    rows = []
+    for title, fields in items:
+        # Titles are inserted one by one, their ids tell which fields belong to them even when other tasks are learning
+        result = connection.execute(insert, title=title, reason=reason, feed=task_name, added=added, local=local)
+        seen_id = result.inserted_primary_key[0]
+        ids.append(seen_id)
+        rows.extend({'seen_entry_id': seen_id, 'field': field, 'value': value, 'added': added}
+                    for field, value in fields)
+    for start in range(0, len(rows), LEARN_CHUNK_SIZE):
+        connection.execute(SeenField.__table__.insert(), rows[start:start + LEARN_CHUNK_SIZE])
+    if not seen_value_index.uses_triggers:
+        for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+            seen_value_index.add(session, session.query(SeenField.id, SeenField.value).
+                                 filter(SeenField.seen_entry_id.in_(ids[start:start + LOOKUP_CHUNK_SIZE])))
+    bloom.update(row['value'] for row in rows)
+    log.debug('Learned %s titles with %s fields' % (len(items), len(rows)))
+    return len(items)
+
+
+# Run after the seen cleanup, before vacuum
+@event('manager.db_cleanup', 2)
+def db_cleanup_filter(session):
+    # Drops removed values, and resizes the filter for the current amount of seen values. The scheduler runs the
+    # cleanup while no task is running, so no learn is in progress.
+    rebuild_seen_filter(session)
+
+
+@event('manager.lock_acquired')
+def open_seen_filter(manager):
+    """Worker processes share the filter of the parent, which must check it against the database before they start."""
+    if not manager.config.get('scheduler', {}).get('processes'):
+        return
+    session = Session()
+    try:
+        seen_filter(session)
+    finally:
+        session.close()
+
+
 @event('manager.db_cleanup')
 def db_cleanup(session):
     log.debug('TODO: Disabled because of ticket #1321')
@@ -246,7 +542,9 @@ def do_cli(manager, options):
     if options.seen_action == 'forget':
         seen_forget(manager, options)
     elif options.seen_action == 'add':
-        seen_add(options)
+        seen_add(manager, options)
+    elif options.seen_action == 'import':
+        seen_import(manager, options)
     elif options.seen_action == 'search':
         seen_search(options)
 
@@ -263,7 +561,7 @@ def seen_forget(manager, options):
     manager.config_changed()
 
 
-def seen_add(options):
+def seen_add(manager, options):
     seen_name = options.add_value
     if is_imdb_url(seen_name):
         imdb_id = extract_id(seen_name)
@@ -271,20 +569,71 @@ def seen_add(options):
             seen_name = imdb_id
 
     session = Session()
-    se = SeenEntry(seen_name, 'cli_seen')
-    sf = SeenField('cli_seen', seen_name)
-    se.fields.append(sf)
-    session.add(se)
-    session.commit()
+    try:
+        se = SeenEntry(seen_name, 'cli_seen')
+        sf = SeenField('cli_seen', seen_name)
+        se.fields.append(sf)
+        session.add(se)
+        session.commit()
+        bloom = seen_filter(session)
+        if manager.check_lock():
+            # A running daemon has the filter mapped as well, it must not miss this value
+            bloom.mark_stale()
+        else:
+            bloom.add(seen_name)
+            sync_seen_filter(session)
+    finally:
+        session.close()
     console('Added %s as seen. This will affect all tasks.' % seen_name)
 
 
+def seen_import(manager, options):
+    session = Session()
+    try:
+        if manager.check_lock():
+            # A running daemon has the filter mapped as well, it must not miss the imported values
+            seen_filter(session).mark_stale()
+        count = 0
+        with io.open(options.import_file, encoding='utf-8') as f:
+            while True:
+                lines = list(itertools.islice(f, IMPORT_BATCH_SIZE))
+                if not lines:
+                    break
+                items = []
+                for line in lines:
+                    seen_name = line.strip()
+                    if not seen_name:
+                        continue
+                    if is_imdb_url(seen_name):
+                        seen_name = extract_id(seen_name) or seen_name
+                    items.append((seen_name, [('cli_seen', seen_name)]))
+                count += bulk_learn(session, items, 'cli_seen')
+        session.commit()
+        sync_seen_filter(session)
+    except IOError as e:
+        console('Unable to read %s: %s' % (options.import_file, e))
+        return
+    finally:
+        session.close()
+    console('Imported %s titles as seen. This will affect all tasks.' % count)
+
+
+def search(session, term):
+    """
+    :returns: Query of the seen entries having a field value which contains `term`. The full text index narrows down
+        the values to check, if `term` has words which must start a word of the value.
+    """
+    query = session.query(SeenEntry).join(SeenField).filter(SeenField.value.like('%' + term + '%'))
+    matching = seen_value_index.matching(term)
+    if matching is not None:
+        query = query.filter(SeenField.id.in_(matching))
+    return query.order_by(SeenField.added)
+
+
 def seen_search(options):
     session = Session()
     try:
-        search_term = '%' + options.search_term + '%'
-        seen_entries = (session.query(SeenEntry).join(SeenField).
-                        filter(SeenField.value.like(search_term)).order_by(SeenField.added).all())
+        seen_entries = search(session, options.search_term).all()
 
         for se in seen_entries:
             console('ID: %s Name: %s Task: %s Added: %s' % (se.id, se.title, se.task, se.added.strftime('%c')))
@@ -312,5 +661,7 @@ def register_parser_arguments():
                                help='title or url of entry to forget, or name of task to forget')
     add_parser = subparsers.add_parser('add', help='add a title or url to the seen database')
     add_parser.add_argument('add_value', metavar='<value>', help='the title or url to add')
+    import_parser = subparsers.add_parser('import', help='add titles or urls from a file to the seen database')
+    import_parser.add_argument('import_file', metavar='<file>', help='file with one title or url on each line')
     search_parser = subparsers.add_parser('search', help='search text from the seen database')
     search_parser.add_argument('search_term', metavar='<search term>')
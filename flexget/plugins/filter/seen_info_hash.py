@@ -18,6 +18,7 @@ class FilterSeenInfoHash(FilterSeen):
         return validator.factory('boolean')
 
     @plugin.priority(180)
+    @plugin.streaming
     def on_task_filter(self, task, config):
         # Return if we are disabled.
         if config is False:
@@ -18,7 +18,7 @@ from flexget.event import event
 from flexget.manager import Session
 from flexget.utils import qualities
 from flexget.utils.log import log_once
-from flexget.utils.titles import SeriesParser, ParseWarning, ID_TYPES
+from flexget.utils.titles import SeriesParser, SeriesIndex, ParseWarning, ID_TYPES
 from flexget.utils.sqlalchemy_utils import (table_columns, table_exists, drop_tables, table_schema, table_add_column,
                                             create_index)
 from flexget.utils.tools import merge_dict_from_to, parse_timedelta
@@ -651,6 +651,14 @@ def forget_series_episode(name, identifier):
         session.close()
 
 
+def get_as_array(config, key):
+    """Return configuration key as array, even if given as a single string"""
+    v = config.get(key, [])
+    if isinstance(v, basestring):
+        return [v]
+    return v
+
+
 def populate_entry_fields(entry, parser):
     entry['series_parser'] = copy(parser)
     # add series, season and episode to entry
@@ -906,11 +914,28 @@ class FilterSeries(FilterSeriesBase):
     def on_task_metainfo(self, task, config):
         config = self.prepare_config(config)
         self.auto_exact(config)
+        # Find the entries each series may match at once, instead of parsing every entry for every series
+        index = SeriesIndex()
         for series_item in config:
             series_name, series_config = series_item.items()[0]
+            index.add(series_name, [series_name] + get_as_array(series_config, 'alternate_name'),
+                      name_regexps=get_as_array(series_config, 'name_regexp'))
+        candidates = {}
+        for entry in task.entries:
+            found = set()
+            for field in ('title', 'description'):
+                data = entry.get(field)
+                if isinstance(data, basestring) and data:
+                    found.update(index.candidates(data))
+            for series_name in found:
+                candidates.setdefault(series_name, []).append(entry)
+        for series_item in config:
+            series_name, series_config = series_item.items()[0]
+            if series_name not in candidates:
+                continue
             log.trace('series_name: %s series_config: %s', series_name, series_config)
             start_time = time.clock()
-            self.parse_series(task.session, task.entries, series_name, series_config)
+            self.parse_series(task.session, candidates[series_name], series_name, series_config)
             took = time.clock() - start_time
             log.trace('parsing %s took %s', series_name, took)
 
@@ -996,13 +1021,6 @@ class FilterSeries(FilterSeriesBase):
         :param config: Series config being processed
         """
 
-        def get_as_array(config, key):
-            """Return configuration key as array, even if given as a single string"""
-            v = config.get(key, [])
-            if isinstance(v, basestring):
-                return [v]
-            return v
-
         # set parser flags flags based on config / database
         identified_by = config.get('identified_by', 'auto')
         if identified_by == 'auto':
@@ -14,6 +14,7 @@ from flexget.event import event
 from flexget.entry import Entry
 from flexget.options import ParseExtrasAction, get_parser
 from flexget.utils.sqlalchemy_utils import table_schema, get_index_by_name
+from flexget.utils.text_index import TextIndex
 from flexget.utils.tools import console, strip_html
 from flexget.manager import Session
 
@@ -82,6 +83,20 @@ class ArchiveSource(Base):
         return '<ArchiveSource(id=%s,name=%s)>' % (self.id, self.name)
 
 
+archive_title_index = TextIndex(ArchiveEntry.__table__, 'title')
+archive_title_index.watch(ArchiveEntry)
+
+
+@event('manager.startup')
+def create_archive_index(manager):
+    session = Session()
+    try:
+        archive_title_index.create(session)
+        session.commit()
+    finally:
+        session.close()
+
+
 def get_source(name, session):
     """
     :param string name: Source name
@@ -363,6 +378,11 @@ def search(session, text, tags=None, sources=None, desc=False):
     normalized_re = re.escape(text.replace('.', ' ')).replace('\\ ', ' ').replace(' ', '.')
     find_re = re.compile(normalized_re, re.IGNORECASE)
     query = session.query(ArchiveEntry).filter(ArchiveEntry.title.like('%' + keyword + '%'))
+    # Spaces and dots match any character, only the text before the first one is known to start a word of the title
+    matching = archive_title_index.matching(re.split(r'[ .]', text)[0], start=True)
+    if matching is not None:
+        # Titles matching the regexp below start with the searched text, the index narrows down the titles to check
+        query = query.filter(ArchiveEntry.id.in_(matching))
     if tags:
         query = query.filter(ArchiveEntry.tags.any(ArchiveTag.name.in_(tags)))
     if sources:
@@ -16,6 +16,7 @@ class UrlFix(object):
     schema = {'type': 'boolean'}
 
     @plugin.priority(-255)
+    @plugin.streaming
     def on_task_input(self, task, config):
         if config is False:
             return
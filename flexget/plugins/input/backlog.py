@@ -75,7 +75,9 @@ class InputBacklog(object):
         injections = self.get_injections(task)
         # Take a snapshot of the entries' states after the input event in case we have to store them to backlog
         for entry in task.entries + injections:
-            entry.take_snapshot('after_input')
+            # Entries from configured inputs have been snapshotted by the task already
+            if 'after_input' not in entry.snapshots:
+                entry.take_snapshot('after_input')
         if config:
             # If backlog is manually enabled for this task, learn the entries.
             self.learn_backlog(task, config)
@@ -68,7 +68,7 @@ class EmitSeries(object):
         if isinstance(config, bool):
             config = {}
         if not task.is_rerun:
-            self.try_next_season = {}
+            task.try_next_season = {}
         entries = []
         for seriestask in task.session.query(SeriesTask).filter(SeriesTask.name == task.name).all():
             series = seriestask.series
@@ -91,7 +91,7 @@ class EmitSeries(object):
             else:
                 latest_season = low_season + 1
 
-            if self.try_next_season.get(series.name):
+            if task.try_next_season.get(series.name):
                 entries.append(self.search_entry(series, latest_season + 1, 1, task))
             else:
                 for season in xrange(latest_season, low_season, -1):
@@ -147,18 +147,18 @@ class EmitSeries(object):
                    filter(Episode.number == entry['series_episode']).
                    first())
         if entry.accepted or (episode and len(episode.releases) > 0):
-            self.try_next_season.pop(entry['series_name'], None)
-            task.rerun()
+            task.try_next_season.pop(entry['series_name'], None)
+            task.rerun(reuse_input=False)
         elif latest and latest.season == entry['series_season']:
             if identified_by != 'ep':
                 # Do not try next season if this is not an 'ep' show
                 return
-            if entry['series_name'] not in self.try_next_season:
-                self.try_next_season[entry['series_name']] = True
-                task.rerun()
+            if entry['series_name'] not in task.try_next_season:
+                task.try_next_season[entry['series_name']] = True
+                task.rerun(reuse_input=False)
             else:
                 # Don't try a second time
-                self.try_next_season[entry['series_name']] = False
+                task.try_next_season[entry['series_name']] = False
 
 
 @event('plugin.register')
@@ -99,7 +99,14 @@ class InputFind(object):
     @cached('find')
     def on_task_input(self, task, config):
         self.prepare_config(config)
-        entries = []
+        entries = self.find_entries(config)
+        if task.stream:
+            # Entries are consumed as they are found
+            return entries
+        return list(entries)
+
+    def find_entries(self, config):
+        """Generates entries for the files matching prepared `config`."""
         match = re.compile(config['regexp'], re.IGNORECASE).match
         for path in config['path']:
             log.debug('scanning %s' % path)
@@ -142,11 +149,10 @@ class InputFind(object):
                     if not filepath.startswith('/'):
                         filepath = '/' + filepath
                     e['url'] = 'file://%s' % filepath
-                    entries.append(e)
+                    yield e
                 # If we are not searching recursively, break after first (base) directory
                 if not config['recursive']:
                     break
-        return entries
 
 @event('plugin.register')
 def register_plugin():
@@ -31,8 +31,15 @@ class Listdir(object):
         # If only a single path is passed turn it into a 1 element list
         if isinstance(config, basestring):
             config = [config]
-        entries = []
-        for path in config:
+        entries = self.list_entries(config)
+        if task.stream:
+            # Entries are consumed as they are listed
+            return entries
+        return list(entries)
+
+    def list_entries(self, paths):
+        """Generates entries for the contents of `paths`."""
+        for path in paths:
             path = os.path.expanduser(path)
             for name in os.listdir(unicode(path)):
                 e = Entry()
@@ -47,8 +54,7 @@ class Listdir(object):
                     filepath = '/' + filepath
                 e['url'] = 'file://%s' % filepath
                 e['filename'] = name
-                entries.append(e)
-        return entries
+                yield e
 
 
 @event('plugin.register')
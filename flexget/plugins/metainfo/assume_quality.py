@@ -67,23 +67,24 @@ class AssumeQuality(object):
     def on_task_start(self, task, config):
         if isinstance(config, basestring): config = {'any': config}
         assume = namedtuple('assume', ['target', 'quality'])
-        self.assumptions = []
+        task.quality_assumptions = []
         for target, quality in config.items():
             log.verbose('New assumption: %s is %s' % (target, quality))
             try: target = qualities.Requirements(target)
             except: raise plugin.PluginError('%s is not a valid quality. Forgetting assumption.' % target)
             try: quality = qualities.get(quality)
             except: raise plugin.PluginError('%s is not a valid quality. Forgetting assumption.' % quality)
-            self.assumptions.append(assume(target, quality))
-        self.assumptions.sort(key=lambda assumption: self.precision(assumption.target), reverse=True)
-        for assumption in self.assumptions:
+            task.quality_assumptions.append(assume(target, quality))
+        task.quality_assumptions.sort(key=lambda assumption: self.precision(assumption.target), reverse=True)
+        for assumption in task.quality_assumptions:
             log.debug('Target %s - Priority %s' % (assumption.target, self.precision(assumption.target)))
 
     @plugin.priority(127)  #run after metainfo_quality@128
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         for entry in task.entries:
             log.verbose('%s' % entry.get('title'))
-            for assumption in self.assumptions:
+            for assumption in task.quality_assumptions:
                 log.debug('Trying %s - %s' % (assumption.target, assumption.quality))
                 if assumption.target.allows(entry.get('quality')):
                     log.debug('Match: %s' % assumption.target)
@@ -22,6 +22,7 @@ class MetainfoContentSize(object):
 
     schema = {'type': 'boolean', 'default': False}
 
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         # check if disabled (value set to false)
         if config is False:
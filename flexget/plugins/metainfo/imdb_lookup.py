@@ -4,16 +4,16 @@ from datetime import datetime, timedelta
 
 from sqlalchemy import Table, Column, Integer, Float, String, Unicode, Boolean, DateTime, delete
 from sqlalchemy.schema import ForeignKey, Index
-from sqlalchemy.orm import relation, joinedload
+from sqlalchemy.orm import relation, joinedload, subqueryload, subqueryload_all
 
 from flexget import db_schema, plugin
 from flexget.event import event
-from flexget.entry import Entry
+from flexget.entry import Entry, lazy_batch
 from flexget.manager import Session
 from flexget.utils.log import log_once
 from flexget.utils.imdb import ImdbSearch, ImdbParser, extract_id, make_url
 from flexget.utils.sqlalchemy_utils import table_add_column
-from flexget.utils.database import with_session
+from flexget.utils.database import with_session, chunked
 from flexget.utils.sqlalchemy_utils import table_columns, get_index_by_name, table_schema
 
 SCHEMA_VER = 4
@@ -264,6 +264,40 @@ class ImdbLookup(object):
     def register_lazy_fields(self, entry):
         entry.register_lazy_fields(self.field_map, self.lazy_loader)
 
+    def lazy_batch_loader(self, entries, fields):
+        """Populates entries which have current movie details cached, with a few queries for all of them."""
+        session = Session()
+        try:
+            by_url = {}
+            by_title = {}
+            for entry in entries:
+                imdb_url = entry.get('imdb_url', eval_lazy=False)
+                if not imdb_url and entry.get('imdb_id', eval_lazy=False):
+                    imdb_url = make_url(entry['imdb_id'])
+                if imdb_url:
+                    by_url.setdefault(imdb_url, []).append(entry)
+                elif entry.get('title', eval_lazy=False):
+                    by_title.setdefault(entry['title'], []).append(entry)
+
+            # urls found by earlier searches, failed searches are left for the full lookup to report
+            for chunk in chunked(by_title):
+                for result in session.query(SearchResult).filter(SearchResult.title.in_(chunk)).all():
+                    if result.url and not result.fails and result.title in by_title:
+                        by_url.setdefault(result.url, []).extend(by_title.pop(result.title))
+
+            for chunk in chunked(by_url):
+                movies = session.query(Movie).filter(Movie.url.in_(chunk)).\
+                    options(subqueryload(Movie.genres), subqueryload(Movie.actors), subqueryload(Movie.directors),
+                            subqueryload_all('languages.language')).all()
+                for movie in movies:
+                    if movie.expired:
+                        continue
+                    for entry in by_url.pop(movie.url, []):
+                        entry.update_using_map(self.field_map, movie)
+        finally:
+            session.close()
+
+    @lazy_batch(lazy_batch_loader)
     def lazy_loader(self, entry, field):
         """Does the lookup for this entry and populates the entry fields."""
         try:
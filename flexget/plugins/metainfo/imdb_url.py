@@ -15,6 +15,7 @@ class MetainfoImdbUrl(object):
 
     schema = {'type': 'boolean'}
 
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         # check if disabled (value set to false)
         if 'scan_imdb' in task.config:
@@ -13,6 +13,7 @@ class MagnetBtih(object):
 
     schema = {'type': 'boolean'}
 
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         if config is False:
             return
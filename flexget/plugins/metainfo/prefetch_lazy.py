@@ -0,0 +1,147 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+import Queue
+import threading
+
+from sqlalchemy.pool import SingletonThreadPool
+
+from flexget import logger, plugin
+from flexget.config_schema import one_or_more
+from flexget.event import event
+
+log = logging.getLogger('prefetch_lazy')
+
+
+class LookupPool(object):
+    """
+    Daemon threads running lazy field lookups. Threads are kept between tasks, so that each of them keeps using
+    the same database connection instead of opening a new one for every task.
+    """
+
+    def __init__(self):
+        self.jobs = Queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def start(self, count, manager):
+        """Makes sure there are at least `count` threads running."""
+        with self.lock:
+            while len(self.threads) < count:
+                thread = threading.Thread(target=self._work, name='prefetch-%s' % (len(self.threads) + 1))
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+            # SingletonThreadPool closes connections from threads beyond its size, make sure each thread can keep one
+            pool = manager.engine.pool
+            if isinstance(pool, SingletonThreadPool) and pool.size < len(self.threads) + 5:
+                pool.size = len(self.threads) + 5
+
+    def _work(self):
+        while True:
+            func, args = self.jobs.get()
+            try:
+                func(*args)
+            except Exception:
+                log.exception('BUG: unhandled error in lookup thread')
+
+
+pool = LookupPool()
+
+
+class PrefetchLazy(object):
+    """
+    Evaluates lazy fields registered by the metainfo plugins with a pool of threads, so that the lookups for all
+    entries are not done one after another once a filter needs them. Lookups with a batch form are done first
+    from the cache, see :meth:`flexget.task.Task.prefetch_lazy`.
+
+    Each entry is looked up by one thread at a time, and the task waits for all of them before filtering.
+    Minimum intervals between requests to a site (eg. imdb.com) are still honored by all threads together.
+    Lookups failing in a thread are left lazy, and are tried again when the field is needed.
+
+    Example::
+
+      prefetch_lazy: yes
+
+    Only some fields, using more threads::
+
+      prefetch_lazy:
+        fields: [imdb_score, imdb_votes]
+        threads: 8
+    """
+
+    schema = {
+        'oneOf': [
+            {'type': 'boolean'},
+            {
+                'type': 'object',
+                'properties': {
+                    'fields': one_or_more({'type': 'string'}),
+                    'threads': {'type': 'integer', 'minimum': 1}
+                },
+                'additionalProperties': False
+            }
+        ]
+    }
+
+    def prepare_config(self, config):
+        if not isinstance(config, dict):
+            config = {} if config else None
+        if config is not None:
+            config.setdefault('threads', 4)
+            if isinstance(config.get('fields'), basestring):
+                config['fields'] = [config['fields']]
+        return config
+
+    # Run after all the metainfo plugins have registered their lazy fields
+    @plugin.priority(-200)
+    def on_task_metainfo(self, task, config):
+        config = self.prepare_config(config)
+        if not config:
+            return
+        entries = list(task.entries)
+        fields = config.get('fields')
+        if fields is None:
+            fields = sorted(set(field for entry in entries for field in entry if entry.is_lazy(field)))
+        # Cheap batch lookups from the cache first
+        task.prefetch_lazy(entries, fields, evaluate=False)
+        entries = [entry for entry in entries if any(entry.is_lazy(field) for field in fields)]
+        if not entries:
+            return
+
+        threads = min(config['threads'], len(entries))
+        log.verbose('Looking up %s for %s entries with %s threads' % (', '.join(fields), len(entries), threads))
+        pending = Queue.Queue()
+        for entry in entries:
+            pending.put(entry)
+        pool.start(threads, task.manager)
+        execution = logger.get_execution()
+        for _ in xrange(threads):
+            pool.jobs.put((self.lookup_entries, (task, pending, fields, execution)))
+        pending.join()
+
+    def lookup_entries(self, task, pending, fields, execution):
+        """Looks up entries from `pending` until it is empty. Runs in a lookup thread."""
+        logger.set_task(task.name)
+        logger.set_execution(execution)
+        try:
+            while True:
+                try:
+                    entry = pending.get_nowait()
+                except Queue.Empty:
+                    return
+                try:
+                    for field in fields:
+                        if entry.is_lazy(field):
+                            entry.get(field)
+                except Exception as e:
+                    log.debug('Lookup for %s failed, it will be tried again when needed: %s' % (entry['title'], e))
+                finally:
+                    pending.task_done()
+        finally:
+            logger.set_task('')
+            logger.set_execution('')
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(PrefetchLazy, 'prefetch_lazy', api_ver=2)
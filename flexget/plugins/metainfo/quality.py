@@ -17,6 +17,7 @@ class MetainfoQuality(object):
 
     schema = {'type': 'boolean'}
 
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         # check if disabled (value set to false)
         if config is False:
@@ -14,6 +14,7 @@ class MetainfoTask(object):
 
     schema = {'type': 'boolean'}
 
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         # check if explicitly disabled (value set to false)
         if config is False:
@@ -1,11 +1,16 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
 
+from sqlalchemy import func
+
 from flexget import plugin
+from flexget.entry import lazy_batch
 from flexget.event import event
+from flexget.manager import Session
+from flexget.utils.database import chunked
 
 try:
-    from flexget.plugins.api_tvdb import lookup_series, lookup_episode, get_mirror
+    from flexget.plugins.api_tvdb import lookup_series, lookup_episode, get_mirror, mark_expired, TVDBSeries
 except ImportError:
     raise plugin.DependencyError(issued_by='thetvdb_lookup', missing='api_tvdb',
                                  message='thetvdb_lookup requires the `api_tvdb` plugin')
@@ -95,6 +100,38 @@ class PluginThetvdbLookup(object):
         from flexget import validator
         return validator.factory('boolean')
 
+    def lazy_series_batch(self, entries, fields):
+        """Populates entries of series which have current details cached, with a query per id type."""
+        by_id = {}
+        by_name = {}
+        for entry in entries:
+            tvdb_id = entry.get('tvdb_id', eval_lazy=False)
+            name = entry.get('series_name', eval_lazy=False)
+            if tvdb_id:
+                by_id.setdefault(tvdb_id, []).append(entry)
+            elif name:
+                by_name.setdefault(name.lower(), []).append(entry)
+        session = Session()
+        try:
+            mark_expired(session=session)
+            found = []
+            for chunk in chunked(by_id):
+                for series in session.query(TVDBSeries).filter(TVDBSeries.id.in_(chunk)).all():
+                    found.append((series, by_id.pop(series.id, [])))
+            for chunk in chunked(by_name):
+                query = session.query(TVDBSeries).filter(func.lower(TVDBSeries.seriesname).in_(chunk))
+                for series in query.all():
+                    found.append((series, by_name.pop(series.seriesname.lower(), [])))
+            for series, series_entries in found:
+                if series.expired or not series.seriesname:
+                    continue
+                for entry in series_entries:
+                    entry.update_using_map(self.series_map, series)
+            session.commit()
+        finally:
+            session.close()
+
+    @lazy_batch(lazy_series_batch)
     def lazy_series_lookup(self, entry, field):
         """Does the lookup for this entry and populates the entry fields."""
         try:
@@ -1,14 +1,19 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
 
+from sqlalchemy.orm import subqueryload
+
 from flexget import plugin
+from flexget.entry import lazy_batch
 from flexget.event import event
+from flexget.manager import Session
 from flexget.utils import imdb
+from flexget.utils.database import chunked
 from flexget.utils.log import log_once
 
 try:
     # TODO: Fix this after api_tmdb has module level functions
-    from flexget.plugins.api_tmdb import ApiTmdb
+    from flexget.plugins.api_tmdb import ApiTmdb, TMDBMovie
     lookup = ApiTmdb.lookup
 except ImportError:
     raise plugin.DependencyError(issued_by='tmdb_lookup', missing='api_tmdb')
@@ -49,6 +54,32 @@ class PluginTmdbLookup(object):
         from flexget import validator
         return validator.factory('boolean')
 
+    def lazy_batch_loader(self, entries, fields):
+        """Populates entries with an id of a movie which has current details cached, with a query per id type."""
+        by_id = {'id': {}, 'imdb_id': {}}
+        for entry in entries:
+            tmdb_id = entry.get('tmdb_id', eval_lazy=False)
+            imdb_id = (entry.get('imdb_id', eval_lazy=False) or
+                       imdb.extract_id(entry.get('imdb_url', eval_lazy=False)))
+            if tmdb_id:
+                by_id['id'].setdefault(tmdb_id, []).append(entry)
+            elif imdb_id:
+                by_id['imdb_id'].setdefault(imdb_id, []).append(entry)
+        session = Session()
+        try:
+            for attr, entries_by_id in by_id.iteritems():
+                for chunk in chunked(entries_by_id):
+                    movies = session.query(TMDBMovie).filter(getattr(TMDBMovie, attr).in_(chunk)).\
+                        options(subqueryload(TMDBMovie.genres), subqueryload(TMDBMovie.posters)).all()
+                    for movie in movies:
+                        if movie.expired:
+                            continue
+                        for entry in entries_by_id.pop(getattr(movie, attr), []):
+                            entry.update_using_map(self.field_map, movie)
+        finally:
+            session.close()
+
+    @lazy_batch(lazy_batch_loader)
     def lazy_loader(self, entry, field):
         """Does the lookup for this entry and populates the entry fields."""
         imdb_id = (entry.get('imdb_id', eval_lazy=False) or
@@ -1,11 +1,17 @@
 from __future__ import unicode_literals, division, absolute_import
 import logging
 
+from sqlalchemy import func
+from sqlalchemy.orm import subqueryload
+
 from flexget import plugin
+from flexget.entry import lazy_batch
 from flexget.event import event
+from flexget.manager import Session
+from flexget.utils.database import chunked
 
 try:
-    from flexget.plugins.api_trakt import ApiTrakt
+    from flexget.plugins.api_trakt import ApiTrakt, TraktSeries
     lookup_series = ApiTrakt.lookup_series
     lookup_episode = ApiTrakt.lookup_episode
 except ImportError:
@@ -102,6 +108,33 @@ class PluginTraktLookup(object):
         from flexget import validator
         return validator.factory('boolean')
 
+    def lazy_series_batch(self, entries, fields):
+        """Populates entries of series which are cached, with a query per id type."""
+        by_id = {}
+        by_title = {}
+        for entry in entries:
+            tvdb_id = entry.get('tvdb_id', eval_lazy=False)
+            title = entry.get('series_name', eval_lazy=False)
+            if tvdb_id:
+                by_id.setdefault(tvdb_id, []).append(entry)
+            elif title:
+                by_title.setdefault(title.lower(), []).append(entry)
+        session = Session()
+        try:
+            for column, entries_by_key in [(TraktSeries.tvdb_id, by_id), (func.lower(TraktSeries.title), by_title)]:
+                for chunk in chunked(entries_by_key):
+                    query = session.query(TraktSeries).filter(column.in_(chunk)).\
+                        options(subqueryload(TraktSeries.genre), subqueryload(TraktSeries.actors))
+                    for series in query.all():
+                        if not series.title:
+                            continue
+                        key = series.tvdb_id if entries_by_key is by_id else series.title.lower()
+                        for entry in entries_by_key.pop(key, []):
+                            entry.update_using_map(self.series_map, series)
+        finally:
+            session.close()
+
+    @lazy_batch(lazy_series_batch)
     def lazy_series_lookup(self, entry, field):
         """Does the lookup for this entry and populates the entry fields."""
         try:
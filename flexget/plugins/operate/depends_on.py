@@ -0,0 +1,27 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.config_schema import one_or_more
+from flexget.event import event
+
+log = logging.getLogger('depends_on')
+
+
+# The scheduler reads this value directly out of the config when building the execution order for a run, this plugin
+# does nothing but make the config key valid.
+class DependsOn(object):
+    """
+    Makes sure the given tasks have finished before this task is started, when they are executed in the same run.
+
+    Example::
+      depends_on:
+        - fetch_lists
+    """
+
+    schema = one_or_more({'type': 'string'})
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(DependsOn, 'depends_on', api_ver=2)
@@ -0,0 +1,30 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.event import event
+
+log = logging.getLogger('spill')
+
+
+class Spill(object):
+    """
+    Moves rejected and failed entries to a temporary file after a phase leaves more than the given amount of entries
+    in memory. Only title, url, state and reason of the spilled entries stay in memory, the rest is loaded back
+    when a plugin goes through the rejected or failed entries of the task, and for all of them before the exit phase.
+
+    Example::
+
+      spill: 50000
+    """
+
+    schema = {'type': 'integer', 'minimum': 1}
+
+    def on_task_start(self, task, config):
+        log.debug('spilling rejected and failed entries when task holds more than %s entries' % config)
+        task.spill_threshold = config
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(Spill, 'spill', api_ver=2)
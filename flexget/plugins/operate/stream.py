@@ -0,0 +1,44 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+
+from flexget import plugin
+from flexget.event import event
+
+log = logging.getLogger('stream')
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class Stream(object):
+    """
+    Streams entries from inputs through the task in chunks, for inputs producing very large amounts of entries.
+    Each chunk is ran through the metainfo and filter plugins which are streaming safe (eg. seen, regexp, quality,
+    exists) as soon as it is produced, and rejected entries are discarded right away. Other plugins run on the
+    remaining entries afterwards.
+
+    Since rejected entries are not kept, plugins later in the task do not see them.
+
+    Example::
+
+      stream: yes
+
+    Chunk size can be given, defaults to 1000 entries::
+
+      stream: 500
+    """
+
+    schema = {'oneOf': [{'type': 'boolean'}, {'type': 'integer', 'minimum': 1}]}
+
+    @plugin.priority(255)
+    def on_task_start(self, task, config):
+        if config is False:
+            return
+        if config is True:
+            config = DEFAULT_CHUNK_SIZE
+        log.debug('streaming entries in chunks of %s' % config)
+        task.stream = config
+
+
+@event('plugin.register')
+def register_plugin():
+    plugin.register(Stream, 'stream', api_ver=2)
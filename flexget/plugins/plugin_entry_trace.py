@@ -28,6 +28,7 @@ class EntryOperations(object):
     """
 
     @plugin.priority(-255)
+    @plugin.streaming
     def on_task_input(self, task, config):
         for entry in task.all_entries:
             entry.on_accept(on_entry_action, act='accepted', task=task)
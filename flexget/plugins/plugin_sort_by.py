@@ -56,6 +56,9 @@ class PluginSortBy(object):
             task.accepted.reverse()
             return
 
+        # Sorting evaluates the field on every entry, look up lazy values in batches first
+        task.prefetch_lazy(task.all_entries, [field])
+
         def cmp_helper(a, b):
             va = a.get(field, 0)
             vb = b.get(field, 0)
@@ -109,6 +109,6 @@ class DisableUrlRewriter(object):
 @event('plugin.register')
 def register_plugin():
     plugin.register(PluginUrlRewriting, 'urlrewriting', builtin=True, api_ver=2)
-    plugin.register(DisableUrlRewriter, 'disable_urlrewriters', api_ver=2)
+    plugin.register(DisableUrlRewriter, 'disable_urlrewriters', api_ver=2, exclusive=True)
 
     plugin.register_task_phase('urlrewrite', before='download')
@@ -17,6 +17,7 @@ class Verbose(object):
 
     # Run first thing after input phase
     @plugin.priority(255)
+    @plugin.streaming
     def on_task_metainfo(self, task, config):
         if task.options.silent:
             return
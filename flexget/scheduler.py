@@ -1,21 +1,29 @@
 from __future__ import unicode_literals, division, absolute_import
+from contextlib import contextmanager
 import copy
+from collections import deque
 from datetime import datetime, timedelta, time as dt_time
 import fnmatch
 from hashlib import md5
+import heapq
 import itertools
 import logging
+import multiprocessing
+import os
 import Queue
+import select
+import signal
+import socket
 import threading
 import time
-import sys
 
 from sqlalchemy import Column, String, DateTime
+from sqlalchemy.pool import SingletonThreadPool
 
-from flexget.config_schema import register_config_key, parse_time
+from flexget.config_schema import register_config_key, parse_time, parse_interval, one_or_more
 from flexget.db_schema import versioned_base
+from flexget import logger, plugin
 from flexget.event import event
-from flexget.logger import FlexGetFormatter
 from flexget.manager import Session
 
 log = logging.getLogger('scheduler')
@@ -23,6 +31,12 @@ Base = versioned_base('scheduler', 0)
 
 UNITS = ['seconds', 'minutes', 'hours', 'days', 'weeks']
 WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+# Longest time in seconds the scheduler sleeps without checking the clock
+MAX_SLEEP = 3600
+# Seconds between checks that the worker process running a job is still alive
+PROCESS_POLL = 1
+# How many of the latest runs of each task are kept in the scheduler statistics
+STATS_HISTORY = 20
 
 
 yaml_schedule = {
@@ -34,7 +48,9 @@ yaml_schedule = {
         'days': {'type': 'number'},
         'weeks': {'type': 'number'},
         'at_time': {'type': 'string', 'format': 'time'},
-        'on_day': {'type': 'string', 'enum': WEEKDAYS}
+        'on_day': {'type': 'string', 'enum': WEEKDAYS},
+        # Spread the start of the tasks over this long after the schedule fires
+        'jitter': {'type': 'string', 'format': 'interval'}
     },
     # Only allow one unit to be specified
     'oneOf': [{'required': [unit]} for unit in UNITS],
@@ -68,6 +84,22 @@ main_schema = {
 }
 
 
+scheduler_schema = {
+    'type': 'object',
+    'properties': {
+        # Number of jobs which may be executed at the same time
+        'workers': {'type': 'integer', 'minimum': 1},
+        # If given, tasks are executed in a pool of this many worker processes instead of in the worker threads
+        'processes': {'type': 'integer', 'minimum': 1},
+        # Spread the start of the tasks over the whole interval of schedules which do not specify `jitter`
+        'spread': {'type': 'boolean'},
+        # Tasks using any of these plugins will not run at the same time as each other
+        'serialize': one_or_more({'type': 'string'})
+    },
+    'additionalProperties': False
+}
+
+
 class DBTrigger(Base):
     __tablename__ = 'scheduler_triggers'
 
@@ -81,12 +113,14 @@ class DBTrigger(Base):
 
 @event('manager.config_updated')
 def create_triggers(manager):
+    manager.scheduler.config_generation += 1
     manager.scheduler.load_schedules()
+    manager.scheduler.set_workers()
 
 
 class Scheduler(threading.Thread):
-    # We use a regular list for periodic jobs, so you must hold this lock while using it
-    triggers_lock = threading.Lock()
+    # Triggers and delayed jobs are kept in a heap ordered by their run time, you must hold this lock while using it
+    triggers_lock = threading.RLock()
 
     def __init__(self, manager):
         super(Scheduler, self).__init__(name='scheduler')
@@ -95,9 +129,53 @@ class Scheduler(threading.Thread):
         self.manager = manager
         self.triggers = []
         self.run_schedules = True
+        self.workers = []
+        self.process_pool = None
+        # Only used inside process pool workers, executions requested there are sent back to the parent to schedule
+        self.forwarded_executions = None
+        # Bumped on each config update, process pool workers are sent the config only when theirs is older
+        self.config_generation = 0
+        # Pool workers report the (job id, pid) of the jobs they start here, so that dead workers can be noticed
+        self._process_starts = None
+        self._process_job_pids = {}
+        self._process_job_ids = itertools.count()
+        # Held while running a task which uses one of the plugins listed under `serialize`
+        self.serial_lock = threading.Lock()
+        # Shared by running jobs, held exclusively by jobs which must not run alongside any other job
+        self.jobs_lock = SharedLock()
+        # Set while a database cleanup job is waiting in the run queue
+        self._cleanup_queued = False
+        # Makes sure that the same task is never running twice at once
+        self._task_locks = {}
+        self._task_locks_lock = threading.Lock()
+        self._workers_lock = threading.Lock()
+        self._worker_numbers = itertools.count(1)
+        # Number of workers which have been told to stop, but have not yet done so
+        self._stopping_workers = 0
+        # Heap of (run_at, sequence, trigger or job) tuples
+        self._heap = []
+        self._heap_sequence = itertools.count()
+        # Number of queued jobs for each trigger uid, and triggers waiting for those jobs before they can fire again
+        self._pending_triggers = {}
+        self._pending_lock = threading.Lock()
+        self._blocked_triggers = {}
+        # Maps task names to their TaskStats
+        self.stats = {}
+        # Input fetches done and avoided by tasks sharing their input results, see :class:`SharedInputs`
+        self.input_fetches = 0
+        self.input_fetches_saved = 0
+        self._stats_lock = threading.Lock()
+        # Set to make the scheduler loop re-check its schedules and shutdown conditions
+        self._wakeup = threading.Event()
+        self._alarm = None
         self._shutdown_now = False
         self._shutdown_when_finished = False
 
+    @property
+    def settings(self):
+        """The `scheduler` section from the config."""
+        return self.manager.config.get('scheduler', {})
+
     def load_schedules(self):
         """Clears current schedules and loads them from the config."""
         with self.triggers_lock:
@@ -109,8 +187,47 @@ class Scheduler(threading.Thread):
                 if not isinstance(tasks, list):
                     tasks = [tasks]
                 self.triggers.append(Trigger(item['interval'], tasks, options={'cron': True}))
+            last_runs = self._load_last_runs()
+            # Jobs which are waiting for their delayed start are kept
+            self._heap = [item for item in self._heap if isinstance(item[2], Job)]
+            heapq.heapify(self._heap)
+            self._blocked_triggers = {}
+            for trigger in self.triggers:
+                trigger.last_run = last_runs.get(trigger.uid)
+                trigger.schedule_next_run()
+                self._push(trigger.run_at, trigger)
+        self._wakeup.set()
+
+    def _push(self, run_at, item):
+        """Adds a :class:`Trigger` or delayed :class:`Job` to the heap, you must hold `triggers_lock`."""
+        heapq.heappush(self._heap, (run_at, next(self._heap_sequence), item))
+
+    def _load_last_runs(self):
+        """:returns: A dict mapping trigger uids to their last run time in the database."""
+        session = Session()
+        try:
+            return dict((t.uid, t.last_run) for t in session.query(DBTrigger).all())
+        finally:
+            session.close()
+
+    def _save_last_runs(self, triggers):
+        """Records last run time of all given triggers to the database at once."""
+        session = Session()
+        try:
+            uids = [t.uid for t in triggers]
+            db_triggers = dict((t.uid, t) for t in session.query(DBTrigger).filter(DBTrigger.uid.in_(uids)))
+            for trigger in triggers:
+                db_trigger = db_triggers.get(trigger.uid)
+                if not db_trigger:
+                    db_trigger = db_triggers[trigger.uid] = DBTrigger(trigger.uid)
+                    session.add(db_trigger)
+                db_trigger.last_run = trigger.last_run
+            session.commit()
+        finally:
+            session.close()
+        log.debug('recorded last_run of %s trigger(s) to the database' % len(triggers))
 
-    def execute(self, options=None, output=None, priority=1, trigger_id=None):
+    def execute(self, options=None, output=None, priority=1, trigger_id=None, jitter=None):
         """
         Add a task to the scheduler to be run immediately.
 
@@ -121,9 +238,17 @@ class Scheduler(threading.Thread):
             lowest first.
         :param trigger_id: If a trigger_id is specified, it will be attached to the :class:`Job` instance added to the
             run queue. Used to check that triggers are not fired faster than they can be executed.
+        :param jitter: A :class:`datetime.timedelta`. If given, the start of each task is delayed by up to this long.
+            The delay is derived from the task name, so each task starts at the same point of the window every time.
         :returns: a list of :class:`threading.Event` instances which will be
             set when each respective task has finished running
         """
+        if self.forwarded_executions is not None:
+            # We are a process pool worker, let the parent process schedule this
+            if options is not None and not isinstance(options, dict):
+                options = dict(options)
+            self.forwarded_executions.append(options)
+            return []
         if options is None:
             options = copy.copy(self.manager.options.execute)
         elif isinstance(options, dict):
@@ -146,71 +271,389 @@ class Scheduler(threading.Thread):
         # TODO: 1.2 This is a hack to make task priorities work still, not sure if it's the best one
         tasks = sorted(tasks, key=lambda t: self.manager.config['tasks'][t].get('priority', 65535))
 
+        if options.cron and self.manager.db_cleanup_due:
+            self.queue_db_cleanup(priority)
+
         finished_events = []
-        for task in tasks:
-            job = Job(task, options=options, output=output, priority=priority, trigger_id=trigger_id)
-            self.run_queue.put(job)
+        jobs = {}
+        now = datetime.now()
+        run_at = {}
+        for wave in self.task_waves(tasks):
+            for task, depends in wave:
+                job = Job(task, options=options, output=output, priority=priority, trigger_id=trigger_id)
+                job.depends = [jobs[d].finished_event for d in depends]
+                jobs[task] = job
+                # Never start a task before the tasks it waits on
+                run_at[task] = max([now + task_delay(task, jitter) if jitter else now] + [run_at[d] for d in depends])
+        if len(jobs) > 1:
+            # Tasks of this execution with identical inputs only fetch them once
+            from flexget.utils.cached_input import SharedInputs
+            shared_inputs = SharedInputs(len(jobs))
+            for job in jobs.itervalues():
+                job.shared_inputs = shared_inputs
+        # Jobs are queued wave by wave, so a job never comes out of the queue before the jobs it waits on
+        for job in sorted(jobs.itervalues()):
+            if trigger_id:
+                with self._pending_lock:
+                    self._pending_triggers[trigger_id] = self._pending_triggers.get(trigger_id, 0) + 1
+            if run_at[job.task] > now:
+                log.debug('delaying start of %s until %s' % (job.task, run_at[job.task]))
+                with self.triggers_lock:
+                    self._push(run_at[job.task], job)
+                self._wakeup.set()
+            else:
+                self._enqueue(job)
             finished_events.append(job.finished_event)
         return finished_events
 
+    def _enqueue(self, job):
+        job.queued_at = time.time()
+        self.run_queue.put(job)
+
+    def queue_db_cleanup(self, priority=1):
+        """Adds a job running the database cleanup to the run queue, unless one is waiting there already."""
+        with self._pending_lock:
+            if self._cleanup_queued:
+                return
+            self._cleanup_queued = True
+        job = Job(None, priority=priority)
+        job.db_cleanup = True
+        self._enqueue(job)
+
+    def task_dependencies(self, tasks):
+        """
+        :param list tasks: Names of the tasks being executed together.
+        :returns: A dict mapping each task to the set of other `tasks` which must finish before it starts.
+        """
+        dependencies = dict((task, set()) for task in tasks)
+        for task in tasks:
+            config = self.manager.config['tasks'][task] or {}
+            depends_on = config.get('depends_on', [])
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            dependencies[task].update(d for d in depends_on if d in dependencies and d != task)
+            # A task started by run_task is fed by this one, so it should not start before this finishes
+            for followed in _run_task_targets(config):
+                if followed in dependencies and followed != task:
+                    dependencies[followed].add(task)
+        return dependencies
+
+    def task_waves(self, tasks):
+        """
+        Splits `tasks` into waves which can be run one after another. Tasks in the same wave do not depend on each
+        other and can run at the same time. Order of `tasks` is kept within each wave.
+
+        :returns: A list of waves, each is a list of (task, dependencies) tuples.
+        """
+        dependencies = self.task_dependencies(tasks)
+        waves = []
+        done = set()
+        remaining = list(tasks)
+        while remaining:
+            wave = [t for t in remaining if dependencies[t] <= done]
+            if not wave:
+                log.error('Tasks %s depend on each other, running them in priority order.' % ', '.join(remaining))
+                wave = remaining
+            # Only wait on tasks from earlier waves, in case there was a dependency loop
+            waves.append([(t, dependencies[t] & done) for t in wave])
+            done.update(wave)
+            remaining = [t for t in remaining if t not in done]
+        if len(waves) > 1:
+            log.debug('execution order: %s' % ' -> '.join('[%s]' % ', '.join(t for t, _ in w) for w in waves))
+        return waves
+
     def queue_pending_jobs(self):
-        # Add pending jobs to the run queue
+        """
+        Adds jobs for all triggers and delayed jobs which are due to the run queue.
+
+        :returns: The time the next item is due, or None if there is nothing waiting.
+        """
+        fired = []
+        now = datetime.now()
         with self.triggers_lock:
-            for trigger in self.triggers:
-                if trigger.should_run:
-                    with self.run_queue.mutex:
-                        if any(j.trigger_id == trigger.uid for j in self.run_queue.queue):
-                            log.error('Not firing schedule %r. Tasks from last run have still not finished.' % trigger)
-                            log.error('You may need to increase the interval for this schedule.')
-                            continue
-                    options = dict(trigger.options)
-                    # If the user has specified all tasks with '*', don't add tasks option at all, so that manual
-                    # tasks are not executed
-                    if trigger.tasks != ['*']:
-                        options['tasks'] = trigger.tasks
-                    self.execute(options=options, priority=5, trigger_id=trigger.uid)
-                    trigger.trigger()
+            while self._heap and self._heap[0][0] <= now:
+                trigger = heapq.heappop(self._heap)[2]
+                if isinstance(trigger, Job):
+                    self._enqueue(trigger)
+                    continue
+                with self._pending_lock:
+                    pending = self._pending_triggers.get(trigger.uid)
+                if pending:
+                    log.error('Not firing schedule %r. Tasks from last run have still not finished.' % trigger)
+                    log.error('You may need to increase the interval for this schedule.')
+                    # It will be put back on the heap once its queued jobs have started
+                    self._blocked_triggers[trigger.uid] = trigger
+                    continue
+                options = dict(trigger.options)
+                # If the user has specified all tasks with '*', don't add tasks option at all, so that manual
+                # tasks are not executed
+                if trigger.tasks != ['*']:
+                    options['tasks'] = trigger.tasks
+                jitter = trigger.jitter or (trigger.period if self.settings.get('spread') else None)
+                self.execute(options=options, priority=5, trigger_id=trigger.uid, jitter=jitter)
+                trigger.trigger()
+                fired.append(trigger)
+                self._push(trigger.run_at, trigger)
+            next_run = self._heap[0][0] if self._heap else None
+        if fired:
+            self._save_last_runs(fired)
+        return next_run
 
     def start(self, run_schedules=None):
         if run_schedules is not None:
             self.run_schedules = run_schedules
+        # Fork the worker processes before the scheduler starts any threads
+        self.start_process_pool()
         super(Scheduler, self).start()
 
+    def set_workers(self, count=None):
+        """
+        Grows or shrinks the worker pool. Only has an effect once the scheduler has been started.
+
+        :param int count: Number of workers. Defaults to the `workers` setting from the config.
+        """
+        if count is None:
+            count = self.settings.get('workers', self.settings.get('processes', 1))
+        if not self.is_alive():
+            return
+        with self._workers_lock:
+            running = len(self.workers) - self._stopping_workers
+            for _ in range(running - count):
+                self._stopping_workers += 1
+                self.run_queue.put(Job(None, priority=0))
+            for _ in range(count - running):
+                worker = Worker(self, next(self._worker_numbers))
+                self.workers.append(worker)
+                worker.start()
+        # SingletonThreadPool closes connections from threads beyond its size, make sure each worker can keep one
+        pool = self.manager.engine.pool
+        if isinstance(pool, SingletonThreadPool) and pool.size < count + 5:
+            pool.size = count + 5
+        log.debug('scheduler running with %s worker(s)' % count)
+
+    def worker_stopped(self, worker):
+        """Called by a worker which has received a stop job from the queue, right before it exits."""
+        with self._workers_lock:
+            self.workers.remove(worker)
+            self._stopping_workers -= 1
+
+    def _set_alarm(self, run_at):
+        """Makes sure the scheduler loop is woken up at `run_at`."""
+        if self._alarm is None:
+            self._alarm = Alarm(self._wakeup)
+            self._alarm.start()
+        self._alarm.set(run_at)
+
+    def start_process_pool(self):
+        """
+        Starts the worker processes, if they are enabled in the config. Forking copies only the calling thread, so this
+        must be called before any other threads are started.
+        """
+        processes = self.settings.get('processes')
+        if not processes or self.process_pool:
+            return
+        log.debug('starting %s worker processes' % processes)
+        # Workers are forked from this process, so they start with all plugins loaded already
+        self._process_starts = multiprocessing.Queue()
+        self.process_pool = multiprocessing.Pool(processes, initializer=_init_worker_process,
+                                                 initargs=(self._process_starts,))
+
     def run(self):
-        from flexget.task import Task, TaskAbort
+        self.set_workers()
         while not self._shutdown_now:
-            if self.run_schedules:
-                self.queue_pending_jobs()
-            # Grab the first job from the run queue and do it
-            try:
-                job = self.run_queue.get(timeout=0.5)
-            except Queue.Empty:
-                if self._shutdown_when_finished:
-                    self._shutdown_now = True
-                continue
-            if job.output:
-                # Hook up our log and stdout to give back to the requester
-                old_stdout, old_stderr = sys.stdout, sys.stderr
-                sys.stdout, sys.stderr = Tee(job.output, sys.stdout), Tee(job.output, sys.stderr)
-                # TODO: Use a filter to capture only the logging for this execution?
-                streamhandler = logging.StreamHandler(job.output)
-                streamhandler.setFormatter(FlexGetFormatter())
-                logging.getLogger().addHandler(streamhandler)
-            try:
-                Task(self.manager, job.task, options=job.options).execute()
-            except TaskAbort as e:
-                log.debug('task %s aborted: %r' % (job.task, e))
-            finally:
-                self.run_queue.task_done()
-                job.finished_event.set()
-                if job.output:
-                    sys.stdout, sys.stderr = old_stdout, old_stderr
-                    logging.getLogger().removeHandler(streamhandler)
-        remaining_jobs = self.run_queue.qsize()
+            self._wakeup.clear()
+            next_run = self.queue_pending_jobs() if self.run_schedules else None
+            if self._shutdown_when_finished and not self.run_queue.unfinished_tasks:
+                break
+            if next_run:
+                self._set_alarm(next_run)
+            # Sleep until a trigger is due, a job finishes, or schedules are changed
+            self._wakeup.wait()
+        self._shutdown_now = True
+        if self._alarm:
+            self._alarm.stop()
+        with self._workers_lock:
+            workers = list(self.workers)
+            # Stop jobs go to the front of the queue, each worker exits after its current job
+            for _ in range(len(workers) - self._stopping_workers):
+                self._stopping_workers += 1
+                self.run_queue.put(Job(None, priority=0))
+        for worker in workers:
+            worker.join()
+        if self.process_pool:
+            self.process_pool.close()
+            self.process_pool.join()
+        remaining_jobs = self.run_queue.qsize() + sum(1 for item in self._heap if isinstance(item[2], Job))
         if remaining_jobs:
             log.warning('Scheduler shut down with %s jobs remaining in the queue to run.' % remaining_jobs)
         log.debug('scheduler shut down')
 
+    @contextmanager
+    def job_locks(self, job):
+        """Holds the locks needed to run `job` without stepping on another running job."""
+        with self._task_locks_lock:
+            task_lock = self._task_locks.setdefault(job.task, threading.Lock())
+        serialize = self.settings.get('serialize', [])
+        if not isinstance(serialize, list):
+            serialize = [serialize]
+        task_config = self.manager.config.get('tasks', {}).get(job.task) or {}
+        # Tasks using plugins which change state shared by all tasks run alone
+        if any(getattr(plugin.plugins.get(name), 'exclusive', False) for name in task_config):
+            jobs_lock = self.jobs_lock.exclusive()
+        else:
+            jobs_lock = self.jobs_lock.shared()
+        with task_lock:
+            if any(name in task_config for name in serialize):
+                with self.serial_lock, jobs_lock:
+                    yield
+            else:
+                with jobs_lock:
+                    yield
+
+    def run_db_cleanup(self, job):
+        """Runs the database cleanup while no other job is running. Called from the worker threads."""
+        with self._pending_lock:
+            self._cleanup_queued = False
+        try:
+            with self.jobs_lock.exclusive():
+                self.manager.db_cleanup()
+        except Exception as e:
+            log.exception('Database cleanup failed: %s' % e)
+        finally:
+            self.run_queue.task_done()
+            self._wakeup.set()
+
+    def _job_started(self, job):
+        """Keeps track of which triggers still have jobs waiting in the queue."""
+        if not job.trigger_id:
+            return
+        with self._pending_lock:
+            self._pending_triggers[job.trigger_id] -= 1
+            if self._pending_triggers[job.trigger_id]:
+                return
+            del self._pending_triggers[job.trigger_id]
+        with self.triggers_lock:
+            trigger = self._blocked_triggers.pop(job.trigger_id, None)
+            if trigger:
+                # This trigger was due while the jobs from its last run were still waiting, fire it right away
+                self._push(datetime.now(), trigger)
+                self._wakeup.set()
+
+    def run_job(self, job):
+        """Executes a :class:`Job` from the run queue. Called from the worker threads."""
+        from flexget.task import Task, TaskAbort
+        self._job_started(job)
+        for finished in job.depends:
+            finished.wait()
+        started = None
+        aborted = False
+        # Give back our log and stdout output to the requester, without touching other running jobs
+        try:
+            with logger.capture_output(job.output), self.job_locks(job):
+                started = time.time()
+                if self.process_pool:
+                    aborted = self._run_in_process(job)
+                else:
+                    task = Task(self.manager, job.task, options=job.options)
+                    task.shared_inputs = job.shared_inputs
+                    task.execute()
+        except TaskAbort as e:
+            aborted = True
+            log.debug('task %s aborted: %r' % (job.task, e))
+        finally:
+            if started is not None:
+                with self._stats_lock:
+                    stats = self.stats.setdefault(job.task, TaskStats())
+                    stats.record(started - job.queued_at, time.time() - started, aborted)
+            if job.shared_inputs and job.shared_inputs.task_finished():
+                with self._stats_lock:
+                    self.input_fetches += job.shared_inputs.fetches
+                    self.input_fetches_saved += job.shared_inputs.saved
+            self.run_queue.task_done()
+            job.finished_event.set()
+            self._wakeup.set()
+
+    def _run_in_process(self, job):
+        """
+        Executes `job` in the process pool and waits for it to finish.
+
+        :returns: True if the task was aborted, or the worker process died running it.
+        """
+        job_id = next(self._process_job_ids)
+        config = None
+        while True:
+            # Generation is read first, a worker must never label an older config with a newer generation
+            generation = self.config_generation
+            result = self.process_pool.apply_async(_execute_in_process, (job_id, job.task, dict(job.options),
+                                                                         bool(job.output), generation, config))
+            response = self._wait_in_process(job_id, result)
+            if response is not None:
+                break
+            # Worker has an older config than ours, send it along this time
+            config = self.manager.config
+        aborted, output, executions = response
+        if output:
+            job.output.write(output)
+        for options in executions:
+            self.execute(options=options)
+        return aborted
+
+    def _wait_in_process(self, job_id, result):
+        """
+        Waits for the `result` of job `job_id` from the process pool, checking that the worker running it is alive.
+
+        :returns: The result, or an aborted result if the worker died.
+        """
+        while not result.ready():
+            result.wait(PROCESS_POLL)
+            pid = self._process_job_pid(job_id)
+            if pid is None or result.ready():
+                continue
+            if not any(process.pid == pid and process.exitcode is None for process in self.process_pool._pool):
+                log.error('Worker process %s died while running a task' % pid)
+                self._process_job_pid(job_id, pop=True)
+                # The pool would wait for the lost job forever when it is closed
+                self.process_pool._cache.pop(result._job, None)
+                return True, None, []
+        self._process_job_pid(job_id, pop=True)
+        return result.get()
+
+    def _process_job_pid(self, job_id, pop=False):
+        """:returns: Pid of the worker process which started job `job_id`, or None if it has not started yet."""
+        try:
+            while True:
+                started_id, pid = self._process_starts.get_nowait()
+                self._process_job_pids[started_id] = pid
+        except Queue.Empty:
+            pass
+        if pop:
+            return self._process_job_pids.pop(job_id, None)
+        return self._process_job_pids.get(job_id)
+
+    def task_interval(self, task):
+        """:returns: The shortest interval in seconds of the schedules running `task`, or None."""
+        with self.triggers_lock:
+            periods = [t.period.total_seconds() for t in self.triggers
+                       if any(fnmatch.fnmatchcase(task.lower(), pattern.lower()) for pattern in t.tasks)]
+        return min(periods) if periods else None
+
+    def status(self):
+        """:returns: A dict describing the run queue, and the statistics of each task which has run."""
+        with self._stats_lock:
+            tasks = dict((name, stats.as_dict()) for name, stats in self.stats.iteritems())
+        for name, stats in tasks.iteritems():
+            stats['interval'] = self.task_interval(name)
+        with self.triggers_lock:
+            delayed = sum(1 for item in self._heap if isinstance(item[2], Job))
+        return {
+            'workers': len(self.workers) - self._stopping_workers,
+            'queued': self.run_queue.qsize(),
+            'delayed': delayed,
+            'input_fetches': self.input_fetches,
+            'input_fetches_saved': self.input_fetches_saved,
+            'tasks': tasks
+        }
+
     def wait(self):
         """
         Waits for the thread to exit.
@@ -221,7 +664,7 @@ class Scheduler(threading.Thread):
 
     def shutdown(self, finish_queue=True):
         """
-        Ends the thread. If a job is running, waits for it to finish first.
+        Ends the thread. If jobs are running, waits for them to finish first.
 
         :param bool finish_queue: If this is True, shutdown will wait until all queued tasks have finished.
         """
@@ -229,6 +672,190 @@ class Scheduler(threading.Thread):
             self._shutdown_when_finished = True
         else:
             self._shutdown_now = True
+        self._wakeup.set()
+
+
+class Worker(threading.Thread):
+    """Pulls jobs off the scheduler run queue and executes them, until it gets a job without a task."""
+
+    def __init__(self, scheduler, number):
+        super(Worker, self).__init__(name='worker-%s' % number)
+        self.daemon = True
+        self.scheduler = scheduler
+
+    def run(self):
+        while True:
+            # Blocks without polling until there is something to do
+            job = self.scheduler.run_queue.get()
+            if job.db_cleanup:
+                self.scheduler.run_db_cleanup(job)
+                continue
+            if job.task is None:
+                self.scheduler.run_queue.task_done()
+                break
+            self.scheduler.run_job(job)
+        self.scheduler.worker_stopped(self)
+
+
+class Alarm(threading.Thread):
+    """Sets an event at the earliest of the times given to :meth:`set`."""
+
+    def __init__(self, event):
+        super(Alarm, self).__init__(name='scheduler-alarm')
+        self.daemon = True
+        self.event = event
+        self._at = None
+        self._stopped = False
+        self._lock = threading.Lock()
+        # Timed waits on threading primitives poll every few milliseconds on python 2, a timed select does not.
+        # Sending to the socket cuts the wait short when the alarm changes.
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.setblocking(False)
+
+    def set(self, run_at):
+        """Sets the alarm to `run_at`, unless it is already set to go off earlier."""
+        with self._lock:
+            if self._at and self._at <= run_at:
+                return
+            self._at = run_at
+        self._poke()
+
+    def stop(self):
+        self._stopped = True
+        self._poke()
+
+    def _poke(self):
+        self._socket.sendto(b'x', self._socket.getsockname())
+
+    def run(self):
+        try:
+            while not self._stopped:
+                with self._lock:
+                    at = self._at
+                    if at and at <= datetime.now():
+                        self._at = None
+                        self.event.set()
+                        continue
+                # Sleeping is capped so that changes to the system clock are noticed eventually
+                timeout = min(max((at - datetime.now()).total_seconds(), 0), MAX_SLEEP) if at else None
+                if select.select([self._socket], [], [], timeout)[0]:
+                    try:
+                        while True:
+                            self._socket.recv(16)
+                    except socket.error:
+                        pass
+        finally:
+            self._socket.close()
+
+
+class SharedLock(object):
+    """
+    A lock which can be held by any number of holders at once in shared mode, or by a single one in exclusive mode.
+    Waiting exclusive holders go before new shared holders.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._shared = 0
+        self._exclusive = False
+
+    @contextmanager
+    def shared(self):
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._condition:
+            while self._exclusive:
+                self._condition.wait()
+            # Keeps new shared holders out while waiting for the current ones
+            self._exclusive = True
+            while self._shared:
+                self._condition.wait()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+
+def task_delay(task, window):
+    """
+    :param task: Name of the task
+    :param window: A :class:`datetime.timedelta`
+    :returns: A delay within `window` for `task`, which is always the same for the same task name.
+    """
+    fraction = int(md5(task.encode('utf-8')).hexdigest()[:8], 16) / 0x100000000
+    return timedelta(seconds=int(window.total_seconds() * fraction))
+
+
+def _run_task_targets(config):
+    """Returns names of the tasks started by the `run_task` plugin in a task config, including inside `sequence`."""
+    items = [config] + [item for item in config.get('sequence', []) if isinstance(item, dict)]
+    return [item['run_task']['task'] for item in items if isinstance(item.get('run_task'), dict)]
+
+
+# Keeps the database connections a process pool worker inherited from its parent from being closed by the gc
+_inherited_pool = None
+# Queue process pool workers report the jobs they start to
+_process_starts = None
+
+
+def _init_worker_process(process_starts):
+    """Prepares a freshly forked process pool worker for executing tasks."""
+    global _inherited_pool, _process_starts
+    _process_starts = process_starts
+    from flexget.manager import manager
+    # Interrupts and termination are handled by the parent, which shuts down the pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # SQLite connections must not be shared with the parent, start a new connection pool
+    _inherited_pool = manager.engine.pool
+    manager.engine.pool = _inherited_pool.recreate()
+    manager.scheduler.forwarded_executions = []
+
+
+def _execute_in_process(job_id, task_name, options, capture, generation, config=None):
+    """
+    Executes a task inside a process pool worker.
+
+    :param int generation: Config generation of the parent process.
+    :param dict config: Current config of the parent process, if it was sent along.
+
+    :returns: A tuple of whether the task was aborted, the captured output (if `capture` is True) and a list of option
+        dicts for executions which were requested while the task ran. None if the config of this worker is older than
+        `generation` and was not sent.
+    """
+    from flexget.manager import manager
+    from flexget.task import Task, TaskAbort
+    if _process_starts is not None:
+        _process_starts.put((job_id, os.getpid()))
+    if config is not None:
+        manager.config = config
+        manager.scheduler.config_generation = generation
+    elif manager.scheduler.config_generation != generation:
+        return None
+    output = BufferQueue() if capture else None
+    aborted = False
+    manager.scheduler.forwarded_executions = []
+    with logger.capture_output(output):
+        try:
+            Task(manager, task_name, options=options).execute()
+        except TaskAbort as e:
+            aborted = True
+            log.debug('task %s aborted: %r' % (task_name, e))
+    return aborted, ''.join(output.queue) if output else None, manager.scheduler.forwarded_executions
 
 
 class Job(object):
@@ -241,6 +868,10 @@ class Job(object):
     options = None
     #: :class:`BufferQueue` to write the task execution output to. '[[END]]' will be sent to the queue when complete
     output = None
+    #: :class:`~flexget.utils.cached_input.SharedInputs` of the execution this job belongs to
+    shared_inputs = None
+    #: If True, the job runs the database cleanup instead of a task
+    db_cleanup = False
     # Used to keep jobs in order, when priority is the same
     _counter = itertools.count()
 
@@ -251,6 +882,10 @@ class Job(object):
         self.priority = priority
         self.count = next(self._counter)
         self.finished_event = threading.Event()
+        #: Finished events of the jobs which must complete before this one starts
+        self.depends = []
+        #: Time this job was put in the run queue
+        self.queued_at = None
         # Used to make sure a certain trigger doesn't add jobs faster than they can run
         self.trigger_id = trigger_id
         # Lower priority if cron flag is present in either dict or Namespace form
@@ -268,6 +903,56 @@ class Job(object):
         return (self.priority, self.count) < (other.priority, other.count)
 
 
+class TaskStats(object):
+    """Runtime statistics of one task, kept in memory by the scheduler."""
+
+    def __init__(self, history=STATS_HISTORY):
+        self.runs = 0
+        self.aborts = 0
+        self.last_run = None
+        # Seconds spent waiting to start and running, for the latest runs
+        self.queue_waits = deque(maxlen=history)
+        self.durations = deque(maxlen=history)
+
+    def record(self, queue_wait, duration, aborted=False):
+        self.runs += 1
+        if aborted:
+            self.aborts += 1
+        self.last_run = datetime.now()
+        self.queue_waits.append(queue_wait)
+        self.durations.append(duration)
+
+    def as_dict(self):
+        return {
+            'runs': self.runs,
+            'aborts': self.aborts,
+            'last_run': self.last_run,
+            'queue_waits': list(self.queue_waits),
+            'durations': list(self.durations)
+        }
+
+
+def format_status(status):
+    """Turns the result of :meth:`Scheduler.status` into a list of lines for display."""
+    lines = ['Workers: %(workers)s, queued jobs: %(queued)s, delayed jobs: %(delayed)s, '
+             'shared input fetches: %(input_fetches)s (%(input_fetches_saved)s saved)' % status]
+    if not status['tasks']:
+        return lines
+    row = '%-30s %6s %6s %10s %10s %10s %10s'
+    lines.append(row % ('Task', 'Runs', 'Aborts', 'Avg wait', 'Avg run', 'Max run', 'Interval'))
+    for name in sorted(status['tasks']):
+        stats = status['tasks'][name]
+        waits, durations = stats['queue_waits'], stats['durations']
+        interval = stats['interval']
+        line = row % (name[:30], stats['runs'], stats['aborts'], '%.1fs' % (sum(waits) / len(waits)),
+                      '%.1fs' % (sum(durations) / len(durations)), '%.1fs' % max(durations),
+                      '%ds' % interval if interval else '-')
+        if interval and max(durations) > interval:
+            line += '  (overruns its interval)'
+        lines.append(line)
+    return lines
+
+
 class Trigger(object):
     def __init__(self, interval, tasks, options=None):
         """
@@ -281,11 +966,10 @@ class Trigger(object):
         self.amount = None
         self.on_day = None
         self.at_time = None
+        self.jitter = None
         self.last_run = None
         self.run_at = None
         self.interval = interval
-        self._get_db_last_run()
-        self.schedule_next_run()
 
     @property
     def uid(self):
@@ -304,14 +988,18 @@ class Trigger(object):
             interval['at_time'] = self.at_time
         if self.on_day:
             interval['on_day'] = self.on_day
+        if self.jitter:
+            interval['jitter'] = self.jitter
         return interval
 
     @interval.setter
     def interval(self, interval):
         if not interval:
-            for attr in ['unit', 'amount', 'on_day', 'at_time']:
+            for attr in ['unit', 'amount', 'on_day', 'at_time', 'jitter']:
                 setattr(self, attr, None)
             return
+        # Don't modify the dict from the config
+        interval = dict(interval)
         for unit in UNITS:
             self.amount = interval.pop(unit, None)
             if self.amount:
@@ -323,6 +1011,9 @@ class Trigger(object):
         if self.at_time and not isinstance(self.at_time, dt_time):
             self.at_time = parse_time(self.at_time)
         self.on_day = interval.pop('on_day', None)
+        self.jitter = interval.pop('jitter', None)
+        if self.jitter and not isinstance(self.jitter, timedelta):
+            self.jitter = parse_interval(self.jitter)
         if interval:
             raise ValueError('the following are not valid keys in a schedule interval dictionary: %s' %
                              ', '.join(interval))
@@ -331,7 +1022,6 @@ class Trigger(object):
     def trigger(self):
         """Call when trigger is activated. Records current run time and schedules next run."""
         self.last_run = datetime.now()
-        self._set_db_last_run()
         self.schedule_next_run()
 
     @property
@@ -358,49 +1048,10 @@ class Trigger(object):
             self.run_at = self.run_at.replace(hour=self.at_time.hour, minute=self.at_time.minute,
                                               second=self.at_time.second)
 
-    def _get_db_last_run(self):
-        session = Session()
-        try:
-            db_trigger = session.query(DBTrigger).get(self.uid)
-            if db_trigger:
-                self.last_run = db_trigger.last_run
-                log.debug('loaded last_run from the database')
-        finally:
-            session.close()
-
-    def _set_db_last_run(self):
-        session = Session()
-        try:
-            db_trigger = session.query(DBTrigger).get(self.uid)
-            if not db_trigger:
-                db_trigger = DBTrigger(self.uid)
-                session.add(db_trigger)
-            db_trigger.last_run = self.last_run
-            session.commit()
-        finally:
-            session.close()
-        log.debug('recorded last_run to the database')
-
     def __repr__(self):
         return 'Trigger(tasks=%r, amount=%r, unit=%r)' % (self.tasks, self.amount, self.unit)
 
 
-class Tee(object):
-    """Used so that output to sys.stdout can be grabbed and still displayed."""
-    def __init__(self, *files):
-        self.files = files
-
-    def __getattr__(self, meth):
-        def method_runner(*args, **kwargs):
-            for f in self.files:
-                try:
-                    getattr(f, meth)(*args, **kwargs)
-                except AttributeError:
-                    # We don't really care if all of our 'files' fully support the file api
-                    pass
-        return method_runner
-
-
 class BufferQueue(Queue.Queue):
     """Used in place of a file-like object to capture text and access it safely from another thread."""
     # Allow access to the Empty error from here
@@ -413,3 +1064,4 @@ class BufferQueue(Queue.Queue):
 @event('config.register')
 def register_config():
     register_config_key('schedules', main_schema)
+    register_config_key('scheduler', scheduler_schema)
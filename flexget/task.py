@@ -1,21 +1,29 @@
 from __future__ import unicode_literals, division, absolute_import
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from contextlib import contextmanager
 import copy
+import cPickle as pickle
 from functools import wraps
 import hashlib
+import heapq
 import itertools
 import logging
+import tempfile
+import weakref
 
 from sqlalchemy import Column, Unicode, String, Integer
 
 from flexget import config_schema
 from flexget import db_schema
-from flexget.entry import EntryUnicodeError
+from flexget.entry import Entry, EntryUnicodeError, LazyField, get_lazy_batch
 from flexget.event import fire_event, event
 from flexget.manager import Session
-from flexget.plugin import (get_plugins, task_phases, phase_methods, PluginWarning, PluginError,
+from flexget.plugin import (get_phase_plan, task_phases, phase_methods, PluginWarning, PluginError,
                             DependencyError, plugins as all_plugins, plugin_schemas)
 from flexget.utils import requests
 from flexget.utils.simple_persistence import SimpleTaskPersistence
+from flexget.utils.tools import copy_config
 
 log = logging.getLogger('task')
 Base = db_schema.versioned_base('feed', 0)
@@ -70,16 +78,22 @@ class EntryIterator(object):
         self.all_entries = entries
         if isinstance(states, basestring):
             states = [states]
-        self.filter = lambda e: e._state in states
+        self.states = states
 
     def __iter__(self):
-        return itertools.ifilter(self.filter, self.all_entries)
+        # Look up the next position on each step, entries changing state during iteration are handled like a filter
+        position = self.all_entries._next_position(self.states, -1)
+        while position is not None:
+            yield self.all_entries._entry_at(position)
+            position = self.all_entries._next_position(self.states, position)
 
     def __bool__(self):
-        return any(e for e in self)
+        return len(self) > 0
+
+    __nonzero__ = __bool__
 
     def __len__(self):
-        return sum(1 for e in self)
+        return sum(len(positions) for positions in self.all_entries._state_positions(self.states))
 
     def __add__(self, other):
         return itertools.chain(self, other)
@@ -90,11 +104,12 @@ class EntryIterator(object):
     def __getitem__(self, item):
         if not isinstance(item, int):
             raise ValueError('Index must be integer.')
-        for index, entry in enumerate(self):
-            if index == item:
-                return entry
-        else:
-            raise IndexError('%d is out of bounds' % item)
+        if 0 <= item < len(self):
+            positions = self.all_entries._state_positions(self.states)
+            if len(positions) == 1:
+                return self.all_entries._entry_at(positions[0][item])
+            return self.all_entries._entry_at(next(itertools.islice(heapq.merge(*positions), item, None)))
+        raise IndexError('%d is out of bounds' % item)
 
     def __getslice__(self, a, b):
         return list(itertools.islice(self, a, b))
@@ -106,12 +121,129 @@ class EntryIterator(object):
         self.all_entries.sort(*args, **kwargs)
 
 
+class SpilledEntry(Entry):
+    """
+    Stands in for a rejected or failed entry moved to disk by :meth:`EntryContainer.spill`. Keeps the state, hooks,
+    the fields in :attr:`kept_fields` and any field which cannot be pickled (eg. lazy fields).
+    """
+
+    __slots__ = ('spill_offset', 'spill_size')
+
+    #: Fields kept in memory for spilled entries
+    kept_fields = ('title', 'url', 'original_url', 'reason', 'rejected_by', 'failed_by')
+
+    def __repr__(self):
+        return '<SpilledEntry(title=%s,state=%s)>' % (self.get('title'), self._state)
+
+
+class EntrySpill(object):
+    """Temporary file holding the entries spilled by an :class:`EntryContainer`."""
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile(prefix='flexget-spill-')
+
+    def dump(self, entry):
+        """
+        Writes `entry` to the file.
+
+        :return: :class:`SpilledEntry` to keep in place of the entry
+        """
+        stub = SpilledEntry()
+        fields = {}
+        for field, value in entry.iteritems():
+            if field in stub.kept_fields or isinstance(value, LazyField):
+                dict.__setitem__(stub, field, value)
+            if not isinstance(value, LazyField):
+                fields[field] = value
+        snapshots = dict(entry.snapshots) if entry._snapshots else None
+        try:
+            data = pickle.dumps((fields, entry._traces, snapshots), pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError):
+            # Keep whatever cannot be pickled in memory
+            for field, value in fields.items():
+                try:
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                except (pickle.PicklingError, TypeError):
+                    dict.__setitem__(stub, field, fields.pop(field))
+            try:
+                pickle.dumps(snapshots, pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError):
+                stub._snapshots = snapshots
+                snapshots = None
+            data = pickle.dumps((fields, entry._traces, snapshots), pickle.HIGHEST_PROTOCOL)
+        for value in dict.itervalues(stub):
+            if isinstance(value, LazyField):
+                value.entry = stub
+        stub._state = entry._state
+        stub._hooks = entry._hooks
+        stub.task = entry.task
+        self.file.seek(0, 2)
+        stub.spill_offset = self.file.tell()
+        stub.spill_size = len(data)
+        self.file.write(data)
+        return stub
+
+    def load(self, stub):
+        """
+        :return: The full :class:`Entry` `stub` was created for
+        """
+        self.file.seek(stub.spill_offset)
+        fields, traces, snapshots = pickle.loads(self.file.read(stub.spill_size))
+        entry = Entry()
+        # Values were checked when they were set on the original entry
+        dict.update(entry, fields)
+        for field, value in dict.iteritems(stub):
+            if isinstance(value, LazyField):
+                value.entry = entry
+            dict.__setitem__(entry, field, value)
+        entry._traces = traces
+        entry._snapshots = snapshots or stub._snapshots
+        entry._state = stub._state
+        entry._hooks = stub._hooks
+        entry.task = stub.task
+        return entry
+
+
+def _invalidates_index(method):
+    """Decorates list methods that can move entries around in :class:`EntryContainer`."""
+
+    def wrapper(self, *args, **kwargs):
+        self._index = None
+        self._field_index = None
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
 class EntryContainer(list):
-    """Container for a list of entries, also contains accepted, rejected failed iterators over them."""
+    """Container for a list of entries, also contains accepted, rejected failed iterators over them.
+
+    Positions of the entries in each state are indexed, entries update the index when their state changes.
+    Positions by value of :attr:`indexed_fields` are indexed on first lookup and dropped when an entry sets
+    that field. Indexes are built on first use and again after any change other than appending entries.
+
+    Rejected and failed entries can be moved to disk with :meth:`spill`, they are loaded back when accessed through
+    the rejected and failed iterators or :meth:`Task.find_entry`. Iterating the container itself yields the
+    :class:`SpilledEntry` stand-ins, :meth:`load_spilled` loads them all back before the exit phase."""
+
+    #: Fields :meth:`Task.find_entry` can look up from an index
+    indexed_fields = ('title', 'url', 'original_url')
 
     def __init__(self, iterable=None):
         list.__init__(self, iterable or [])
 
+        # sorted positions of entries by state, and positions of each entry by id
+        self._index = None
+        self._positions = None
+        # positions of entries by field value for each looked up field, None if the field cannot be indexed
+        self._field_index = None
+        # file for spilled entries, created on first spill
+        self._spill = None
+        #: Number of :class:`SpilledEntry` instances in the container
+        self.spilled = 0
+
         self._entries = EntryIterator(self, ['undecided', 'accepted'])
         self._accepted = EntryIterator(self, 'accepted')  # accepted entries, can still be rejected
         self._rejected = EntryIterator(self, 'rejected')  # rejected entries, can not be accepted
@@ -125,6 +257,188 @@ class EntryContainer(list):
     failed = property(lambda self: self._failed)
     undecided = property(lambda self: self._undecided)
 
+    def _build_index(self):
+        self._index = defaultdict(list)
+        self._positions = {}
+        self._field_index = {}
+        for position, entry in enumerate(self):
+            self._add_to_index(entry, position)
+
+    def _add_to_index(self, entry, position):
+        containers = entry._containers or []
+        if not any(ref() is self for ref in containers):
+            # Forget containers which are gone while at it
+            entry._containers = [ref for ref in containers if ref() is not None] + [weakref.ref(self)]
+        self._index[entry._state].append(position)
+        self._positions.setdefault(id(entry), []).append(position)
+        for field, index in self._field_index.items():
+            if index is not None:
+                try:
+                    index.setdefault(self._field_value(entry, field), []).append(position)
+                except TypeError:
+                    self._field_index[field] = None
+
+    def _state_positions(self, states):
+        """Returns sorted lists of entry positions for each of the `states`."""
+        if self._index is None:
+            self._build_index()
+        return [self._index[state] for state in states]
+
+    def _next_position(self, states, after):
+        """Returns the first position after `after` that has an entry in one of the `states`, or None."""
+        result = None
+        for positions in self._state_positions(states):
+            i = bisect_right(positions, after)
+            if i < len(positions) and (result is None or positions[i] < result):
+                result = positions[i]
+        return result
+
+    @staticmethod
+    def _field_value(entry, field):
+        value = dict.get(entry, field)
+        if isinstance(value, LazyField):
+            raise TypeError('lazy fields cannot be indexed')
+        hash(value)
+        return value
+
+    def _field_positions(self, field):
+        """Returns a dict of sorted entry positions by value of `field`, or None if the field cannot be indexed."""
+        if self._index is None:
+            self._build_index()
+        if field not in self._field_index:
+            index = {}
+            try:
+                for position, entry in enumerate(self):
+                    index.setdefault(self._field_value(entry, field), []).append(position)
+            except TypeError:
+                index = None
+            self._field_index[field] = index
+        return self._field_index[field]
+
+    def _find(self, states, values):
+        """Returns the first entry in one of the `states` with all given field `values`, or None."""
+        positions = None
+        for field in self.indexed_fields:
+            if field not in values:
+                continue
+            index = self._field_positions(field)
+            try:
+                if index is not None:
+                    positions = index.get(values[field], [])
+                    break
+            except TypeError:
+                # unhashable value
+                pass
+        if positions is None:
+            positions = xrange(len(self))
+        for position in positions:
+            entry = list.__getitem__(self, position)
+            if entry._state not in states:
+                continue
+            if isinstance(entry, SpilledEntry):
+                entry = self._entry_at(position)
+            for k, v in values.iteritems():
+                if not (k in entry and entry[k] == v):
+                    break
+            else:
+                return entry
+        return None
+
+    def _field_changed(self, field):
+        """Called by :class:`Entry` when one of its fields is set."""
+        if self._field_index:
+            self._field_index.pop(field, None)
+
+    def _state_changed(self, entry, old_state):
+        """Called by :class:`Entry` when its state changes."""
+        if self._index is None:
+            return
+        positions = self._positions.get(id(entry))
+        if not positions or list.__getitem__(self, positions[0]) is not entry:
+            # Entry is not in this container anymore
+            return
+        for position in positions:
+            old = self._index[old_state]
+            del old[bisect_left(old, position)]
+            insort(self._index[entry._state], position)
+
+    def _entry_at(self, position):
+        """Returns the entry at `position`, loading it back from disk if it has been spilled."""
+        entry = list.__getitem__(self, position)
+        if isinstance(entry, SpilledEntry) and self._spill is not None:
+            loaded = self._spill.load(entry)
+            self._replace(entry, loaded)
+            self.spilled -= 1
+            return loaded
+        return entry
+
+    def _replace(self, entry, new):
+        """Puts `new` in all positions of `entry` without invalidating the indexes."""
+        positions = self._positions.pop(id(entry))
+        for position in positions:
+            list.__setitem__(self, position, new)
+        self._positions[id(new)] = positions
+        if entry._containers:
+            entry._containers = [ref for ref in entry._containers if ref() is not self and ref() is not None]
+        new._containers = (new._containers or []) + [weakref.ref(self)]
+
+    def spill(self):
+        """
+        Moves rejected and failed entries to a temporary file, leaving :class:`SpilledEntry` instances in their place.
+
+        :return: Number of entries spilled
+        """
+        count = 0
+        for position in list(heapq.merge(*self._state_positions(['rejected', 'failed']))):
+            entry = list.__getitem__(self, position)
+            if isinstance(entry, SpilledEntry):
+                continue
+            if self._spill is None:
+                self._spill = EntrySpill()
+            self._replace(entry, self._spill.dump(entry))
+            count += 1
+        self.spilled += count
+        return count
+
+    def load_spilled(self):
+        """Loads all spilled entries back from disk and removes the temporary file."""
+        if not self.spilled:
+            return
+        if self._index is None:
+            self._build_index()
+        for position in xrange(len(self)):
+            if isinstance(list.__getitem__(self, position), SpilledEntry):
+                self._entry_at(position)
+        self._spill.file.close()
+        self._spill = None
+
+    def append(self, entry):
+        list.append(self, entry)
+        if self._index is not None:
+            self._add_to_index(entry, len(self) - 1)
+
+    def extend(self, entries):
+        if self._index is None:
+            list.extend(self, entries)
+        else:
+            for entry in list(entries):
+                self.append(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    insert = _invalidates_index(list.insert)
+    remove = _invalidates_index(list.remove)
+    pop = _invalidates_index(list.pop)
+    reverse = _invalidates_index(list.reverse)
+    sort = _invalidates_index(list.sort)
+    __setitem__ = _invalidates_index(list.__setitem__)
+    __delitem__ = _invalidates_index(list.__delitem__)
+    __setslice__ = _invalidates_index(list.__setslice__)
+    __delslice__ = _invalidates_index(list.__delslice__)
+    __imul__ = _invalidates_index(list.__imul__)
+
     def __repr__(self):
         return '<EntryContainer(%s)>' % list.__repr__(self)
 
@@ -179,7 +493,7 @@ class Task(object):
         # raw_config should remain the untouched input config
         if config is None:
             config = manager.config['tasks'].get(name, {})
-        self.config = copy.deepcopy(config)
+        self.config = copy_config(config)
         self.prepared_config = None
         if options is None:
             options = copy.copy(self.manager.options.execute)
@@ -194,6 +508,15 @@ class Task(object):
 
         # not to be reset
         self._rerun_count = 0
+        # entries from the first run, restored from their after_input snapshots on reruns instead of running input
+        self._input_entries = None
+        self._fresh_input = False
+        # chunk size when entries are streamed from inputs, set by the stream plugin
+        self.stream = None
+        # amount of entries kept in memory before rejected and failed ones are spilled to disk, set by spill plugin
+        self.spill_threshold = None
+        # :class:`~flexget.utils.cached_input.SharedInputs` of the execution this task runs in, set by the scheduler
+        self.shared_inputs = None
 
         self.config_modified = None
 
@@ -246,6 +569,11 @@ class Task(object):
     def is_rerun(self):
         return self._rerun_count
 
+    @property
+    def rerun_count(self):
+        """Number of times the task has been re-ran in this execution."""
+        return self._rerun_count
+
     # TODO: can we get rid of this now that Tasks are instantiated on demand?
     def _reset(self):
         """Reset task state"""
@@ -267,6 +595,8 @@ class Task(object):
         self.silent_abort = False
 
         self._rerun = False
+        # (phase, plugin name) pairs that already ran on streamed entries
+        self._streamed = set()
 
         # current state
         self.current_phase = None
@@ -315,13 +645,51 @@ class Task(object):
         cat = getattr(self, category)
         if not isinstance(cat, EntryIterator):
             raise TypeError('category must be a EntryIterator')
-        for entry in cat:
-            for k, v in values.iteritems():
-                if not (k in entry and entry[k] == v):
-                    break
-            else:
-                return entry
-        return None
+        return cat.all_entries._find(cat.states, values)
+
+    def prefetch_lazy(self, entries, fields, evaluate=True):
+        """
+        Evaluates lazy *fields* of *entries* up front. Entries are grouped by the lookup they are waiting on, and
+        lookups having a batch form (see :func:`flexget.entry.lazy_batch`) are called once for the whole group.
+
+        :param entries: Iterable of :class:`~flexget.entry.Entry` instances
+        :param list fields: Names of the fields to evaluate
+        :param bool evaluate: If False, fields the batch lookups could not fill are left lazy
+        """
+        groups = {}
+        order = []
+        pending = []
+        for entry in entries:
+            for field in fields:
+                if not entry.is_lazy(field):
+                    continue
+                func = dict.get(entry, field).funcs[0]
+                if func not in groups:
+                    groups[func] = ([], set())
+                    order.append(func)
+                group_entries, group_fields = groups[func]
+                if not group_entries or group_entries[-1] is not entry:
+                    group_entries.append(entry)
+                group_fields.add(field)
+                pending.append((entry, field))
+        for func in order:
+            batch = get_lazy_batch(func)
+            if batch is None:
+                continue
+            group_entries, group_fields = groups[func]
+            log.debug('prefetching %s for %s entries' % (', '.join(sorted(group_fields)), len(group_entries)))
+            try:
+                batch(group_entries, sorted(group_fields))
+            except Exception as e:
+                # Entries the batch did not fill are still looked up one by one below
+                log.warning('Batch lookup of %s failed, looking up entries one by one: %s' %
+                            (', '.join(sorted(group_fields)), e))
+                log.debug('batch lookup traceback:', exc_info=True)
+        if not evaluate:
+            return
+        # Whatever the batch lookups could not fill is looked up one entry at a time
+        for entry, field in pending:
+            entry.get(field)
 
     def plugins(self, phase=None):
         """Get currently enabled plugins.
@@ -332,9 +700,10 @@ class Task(object):
           An iterator over configured :class:`flexget.plugin.PluginInfo` instances enabled on this task.
         """
         if phase:
-            plugins = sorted(get_plugins(phase=phase), key=lambda p: p.phase_handlers[phase], reverse=True)
+            plugins = (p for p, handler in get_phase_plan(phase))
         else:
             plugins = all_plugins.itervalues()
+        # Config may change while a phase is running (eg. templates are merged on start), so filter lazily
         return (p for p in plugins if p.name in self.config or p.builtin)
 
     def __run_task_phase(self, phase):
@@ -359,32 +728,148 @@ class Task(object):
                 else:
                     log.warning('Task doesn\'t have any %s plugins, you should add (at least) one!' % phase)
 
+        if phase == 'input' and self.stream:
+            self.__stream_input()
+            return
+        if phase == 'input':
+            # On reruns entries from the first run replace the configured input plugins, other plugins still run
+            reuse_input = self.is_rerun and self._input_entries is not None and not self._fresh_input
+            self._fresh_input = False
+            restored = False
+            if not reuse_input:
+                self._input_entries = []
         for plugin in self.plugins(phase):
             # Abort this phase if one of the plugins disables it
             if phase in self.disabled_phases:
                 return
-            # store execute info, except during entry events
-            self.current_phase = phase
-            self.current_plugin = plugin.name
-
-            if plugin.api_ver == 1:
-                # backwards compatibility
-                # pass method only task (old behaviour)
-                args = (self,)
-            else:
-                # pass method task, copy of config (so plugin cannot modify it)
-                args = (self, copy.copy(self.config.get(plugin.name)))
-
-            try:
-                fire_event('task.execute.before_plugin', self, plugin.name)
-                response = self.__run_plugin(plugin, phase, args)
-                if phase == 'input' and response:
-                    # add entries returned by input to self.all_entries
+            configured_input = phase == 'input' and plugin.category == 'input' and not plugin.builtin
+            if configured_input and reuse_input:
+                if not restored:
+                    restored = True
+                    self._restore_input()
+                continue
+            if (phase, plugin.name) in self._streamed:
+                # Already ran on the entries while they were streamed from inputs
+                continue
+            response = self.__call_plugin(plugin, phase)
+            if phase == 'input' and response:
+                # add entries returned by input to self.all_entries
+                added_from = len(self.all_entries)
+                with self.__plugin_errors(plugin.name):
                     for e in response:
                         e.task = self
-                    self.all_entries.extend(response)
-            finally:
-                fire_event('task.execute.after_plugin', self, plugin.name)
+                        self.all_entries.append(e)
+                if configured_input:
+                    self._store_input(self.all_entries[added_from:])
+
+    def __call_plugin(self, plugin, phase):
+        """Calls `phase` handler of `plugin` with the config of this task, firing plugin events around it.
+
+        :return: Response of the handler
+        """
+        # store execute info, except during entry events
+        self.current_phase = phase
+        self.current_plugin = plugin.name
+
+        if plugin.api_ver == 1:
+            # backwards compatibility
+            # pass method only task (old behaviour)
+            args = (self,)
+        else:
+            # pass method task, copy of config (so plugin cannot modify it)
+            args = (self, copy.copy(self.config.get(plugin.name)))
+
+        try:
+            fire_event('task.execute.before_plugin', self, plugin.name)
+            return self.__run_plugin(plugin, phase, args)
+        finally:
+            fire_event('task.execute.after_plugin', self, plugin.name)
+
+    def __stream_stages(self):
+        """
+        Returns (phase, plugin) pairs of the handlers ran on each chunk of streamed entries, see
+        :func:`flexget.plugin.streaming`. Metainfo and filter handlers are only streamed up to the first one which is
+        not streaming safe, since later ones may depend on it. Filters are streamed only if all of metainfo was.
+        """
+        def streams(plugin, phase):
+            return getattr(plugin.phase_handlers[phase].func, 'streaming', False)
+
+        stages = [('input', p) for p in self.plugins('input') if p.builtin and streams(p, 'input')]
+        if 'metainfo' not in self.disabled_phases:
+            for p in self.plugins('metainfo'):
+                if not streams(p, 'metainfo'):
+                    return stages
+                stages.append(('metainfo', p))
+        if 'filter' not in self.disabled_phases:
+            # Filters may depend on the decisions of earlier ones (eg. exists only looks at accepted entries)
+            for p in self.plugins('filter'):
+                if not streams(p, 'filter'):
+                    return stages
+                stages.append(('filter', p))
+        return stages
+
+    def __stream_input(self):
+        """Runs input phase in streaming mode. Entries from configured inputs are ran through the streaming safe
+        handlers in chunks of :attr:`stream` entries, rejected entries are discarded right away."""
+        stages = self.__stream_stages()
+        self._streamed = set((phase, p.name) for phase, p in stages)
+        # Streamed entries are not kept around for reruns
+        self._input_entries = None
+        streamed = discarded = 0
+        injected_from = None
+        for plugin in self.plugins('input'):
+            # Abort this phase if one of the plugins disables it
+            if 'input' in self.disabled_phases:
+                return
+            if ('input', plugin.name) in self._streamed:
+                continue
+            if plugin.builtin and injected_from is None:
+                injected_from = len(self.all_entries)
+            response = self.__call_plugin(plugin, 'input')
+            if not response:
+                continue
+            if plugin.builtin:
+                self.all_entries.extend(response)
+                continue
+            response = iter(response)
+            while True:
+                chunk = None
+                with self.__plugin_errors(plugin.name):
+                    chunk = list(itertools.islice(response, self.stream))
+                if not chunk:
+                    break
+                streamed += len(chunk)
+                discarded += self.__stream_chunk(chunk, stages)
+        # Entries injected by builtin inputs (eg. backlog) still need the streamed input hooks, metainfo and filters
+        if injected_from is not None and injected_from < len(self.all_entries):
+            injected = self.all_entries[injected_from:]
+            del self.all_entries[injected_from:]
+            discarded += self.__stream_chunk(injected, stages)
+        log.verbose('Streamed %s entries, discarded %s rejected' % (streamed, discarded))
+
+    def __stream_chunk(self, entries, stages):
+        """Runs `stages` on `entries`, adds the ones not rejected to the task.
+
+        :return: Number of rejected entries discarded
+        """
+        chunk = EntryContainer(entries)
+        for entry in chunk:
+            entry.task = self
+            if 'after_input' not in entry.snapshots:
+                entry.take_snapshot('after_input')
+        all_entries = self._all_entries
+        # Plugins see only the chunk while it is processed
+        self._all_entries = chunk
+        try:
+            for phase, plugin in stages:
+                if phase in self.disabled_phases:
+                    continue
+                self.__call_plugin(plugin, phase)
+        finally:
+            self._all_entries = all_entries
+        kept = [entry for entry in chunk if not entry.rejected]
+        all_entries.extend(kept)
+        return len(chunk) - len(kept)
 
     def __run_plugin(self, plugin, phase, args=None, kwargs=None):
         """
@@ -405,8 +890,14 @@ class Task(object):
 
         # log.trace('Running %s method %s' % (keyword, method))
         # call the plugin
-        try:
+        with self.__plugin_errors(keyword):
             return method(*args, **kwargs)
+
+    @contextmanager
+    def __plugin_errors(self, keyword):
+        """Handles exceptions raised by plugin `keyword`, unexpected ones will call :meth:`abort`."""
+        try:
+            yield
         except TaskAbort:
             raise
         except PluginWarning as warn:
@@ -440,9 +931,15 @@ class Task(object):
             log.exception(msg)
             self.abort(msg)
 
-    def rerun(self):
+    def rerun(self, reuse_input=True):
         """Immediately re-run the task after execute has completed,
-        task can be re-run up to :attr:`.max_reruns` times."""
+        task can be re-run up to :attr:`.max_reruns` times.
+
+        :param bool reuse_input: By default input phase is not run again, entries are restored from their
+          `after_input` snapshots instead. Pass False if the rerun needs input plugins to produce new entries.
+        """
+        if not reuse_input:
+            self._fresh_input = True
         msg = 'Plugin %s has requested task to be ran again after execution has completed.' % self.current_plugin
         # Only print the first request for a rerun to the info log
         log.debug(msg) if self._rerun else log.info(msg)
@@ -474,8 +971,6 @@ class Task(object):
         """
         if not self.enabled:
             log.debug('Not running disabled task %s' % self.name)
-        if self.options.cron:
-            self.manager.db_cleanup()
 
         self._reset()
         log.debug('executing %s' % self.name)
@@ -504,7 +999,7 @@ class Task(object):
         if self.is_rerun:
             # Restore the config to state right after start phase
             if self.prepared_config:
-                self.config = copy.deepcopy(self.prepared_config)
+                self.config = copy_config(self.prepared_config)
             else:
                 log.error('BUG: No prepared_config on rerun, please report.')
             self.config_modified = False
@@ -533,11 +1028,16 @@ class Task(object):
                 elif phase == 'exit' and self._rerun:
                     log.debug('not running task_exit yet because task will rerun')
                 else:
+                    if phase == 'exit':
+                        # Exit plugins go through all entries, give them the full ones
+                        self.all_entries.load_spilled()
                     # run all plugins with this phase
                     self.__run_task_phase(phase)
                     if phase == 'start':
                         # Store a copy of the config state after start phase to restore for reruns
-                        self.prepared_config = copy.deepcopy(self.config)
+                        self.prepared_config = copy_config(self.config)
+                    elif self.spill_threshold and phase not in ('learn', 'exit'):
+                        self._check_spill()
         except TaskAbort:
             # Roll back the session before calling abort handlers
             self.session.rollback()
@@ -549,6 +1049,8 @@ class Task(object):
                 log.exception('abort handlers aborted: %s' % e)
             raise
         else:
+            # Completion hooks need the full entries as well, when the exit phase did not run
+            self.all_entries.load_spilled()
             for entry in self.all_entries:
                 entry.complete()
             log.debug('committing session')
@@ -562,10 +1064,47 @@ class Task(object):
         if self._rerun:
             log.info('Rerunning the task in case better resolution can be achieved.')
             self._rerun_count += 1
-            # TODO: Potential optimization is to take snapshots (maybe make the ones backlog uses built in instead of
-            # taking another one) after input and just inject the same entries for the rerun
             self.execute()
 
+    def _check_spill(self):
+        """Spills rejected and failed entries to disk if more than :attr:`spill_threshold` entries are in memory."""
+        if len(self.all_entries) - self.all_entries.spilled > self.spill_threshold:
+            count = self.all_entries.spill()
+            if count:
+                log.verbose('Spilled %s rejected and failed entries to disk' % count)
+
+    def _store_input(self, entries):
+        """Takes `after_input` snapshots of `entries` produced by a configured input plugin, so that reruns can
+        restore them instead of running the input plugins again."""
+        if self._input_entries is None:
+            return
+        for entry in entries:
+            if entry._hooks:
+                # Hooks keep state of the plugin which added them, snapshots cannot restore that
+                log.debug('%s has hooks registered during input, reruns will run input phase' % entry['title'])
+                self._input_entries = None
+                return
+            entry.take_snapshot('after_input')
+        self._input_entries.extend(entries)
+
+    def _restore_input(self):
+        """Recreates the entries produced by configured inputs on the first run from their `after_input` snapshots."""
+        log.verbose('Restoring %s entries from the first run instead of running inputs again' %
+                    len(self._input_entries))
+        for original in self._input_entries:
+            snapshot = original.snapshots['after_input']
+            entry = Entry()
+            for field, value in snapshot.iteritems():
+                if isinstance(value, LazyField):
+                    # Lookups should populate the restored entry, not the one copied into the snapshot
+                    value = copy.copy(value)
+                    value.entry = entry
+                    value.funcs = value.funcs[:]
+                entry[field] = value
+            entry.take_snapshot('after_input')
+            entry.task = self
+            self.all_entries.append(entry)
+
     def __eq__(self, other):
         if hasattr(other, 'name'):
             return self.name == other.name
@@ -573,11 +1112,13 @@ class Task(object):
 
     def __copy__(self):
         new = type(self)(self.manager, self.name, self.config, self.options)
+        # Constructor copied the config already
+        config = new.config
         # Update all the variables of new instance to match our own
         new.__dict__.update(self.__dict__)
         # Some mutable objects need to be copies
         new.options = copy.copy(self.options)
-        new.config = copy.deepcopy(self.config)
+        new.config = config
         return new
 
     copy = __copy__
@@ -1,4 +1,5 @@
 from __future__ import unicode_literals, division, absolute_import
+import itertools
 import logging
 from flexget.ui.webui import db_session, app
 from flask import request, render_template, flash, Blueprint
@@ -35,11 +36,11 @@ def index():
         elif len(text) < 5:
             flash('Search text is too short, use at least 5 characters', 'error')
         else:
-            results = search(db_session, text)
+            # search is a generator, only load one result more than can be displayed
+            results = list(itertools.islice(search(db_session, text), 501))
             if not results:
                 flash('No results', 'info')
             else:
-                # not sure if this len check is a good idea, I think it forces to load all items from db ?
                 if len(results) > 500:
                     flash('Too many results, displaying first 500', 'error')
                     results = results[0:500]
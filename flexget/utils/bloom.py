@@ -0,0 +1,248 @@
+"""
+Memory mapped Bloom filter, used to rule out values without asking the database.
+
+A Bloom filter can tell for sure that a value has never been added to it, but may give false positives for values
+which have not. The filter is kept in a file, along with a stamp which the owner uses to check whether the file is
+still in sync with the data it was built from.
+"""
+
+from __future__ import unicode_literals, division, absolute_import
+from contextlib import contextmanager
+import hashlib
+import itertools
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on windows, only the process which created a filter sets bits in it there
+    fcntl = None
+
+log = logging.getLogger('bloom')
+
+MAGIC = b'FGBF'
+VERSION = 1
+# magic, version, size in bits, number of hashes, capacity, stamp (two integers given by the owner), stale flag
+HEADER = struct.Struct(str('<4sIQIQqqB'))
+STAMP = struct.Struct(str('<qq'))
+STAMP_OFFSET = struct.calcsize(str('<4sIQIQ'))
+STALE_OFFSET = HEADER.size - 1
+# Amount of values hashed at once by BloomFilter.update before setting their bits
+UPDATE_CHUNK_SIZE = 10000
+
+
+class BloomFilter(object):
+    """
+    Bloom filter backed by a memory mapped file, or by anonymous memory if no file is given.
+
+    The filter can be shared with other processes. Bits are set while holding a lock on the file, so processes do not
+    lose each others bits. Where file locks are not available, a forked process which adds a value marks the filter
+    stale instead, and from then on every process treats all values as possibly added until the filter is rebuilt.
+    """
+
+    def __init__(self, path=None, capacity=100000, error_rate=0.01):
+        """
+        Opens the filter in `path`, or creates an empty one sized for `capacity` values if there is no usable file.
+
+        :param path: File to keep the filter in, or None to keep it only in memory.
+        :param int capacity: Amount of values the filter can hold before the false positive rate exceeds `error_rate`
+        :param float error_rate: Wanted false positive rate
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._file = None
+        self._map = None
+        # File locked while setting bits, and the process it was opened by
+        self._lock_file = None
+        self._lock_pid = None
+        if path and os.path.exists(path):
+            try:
+                self._open(path)
+                return
+            except (IOError, ValueError, struct.error) as e:
+                log.warning('Unable to use bloom filter %s (%s), creating a new one.' % (path, e))
+                self.close()
+        self._create(capacity, error_rate)
+
+    @classmethod
+    def build(cls, path, values, stamp, capacity=100000, error_rate=0.01):
+        """
+        Creates a filter of `values`, replacing the file in `path`. The filter is filled in a temporary file which is
+        only moved over the old one once complete. The old file is marked stale first, so processes which still have
+        it mapped stop ruling out values with it, and can tell it has been :attr:`replaced`.
+
+        :param stamp: Tuple of two integers describing the data in `values`, see :meth:`sync`
+        """
+        temp_path = path and '%s.%s.tmp' % (path, os.getpid())
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        bloom = cls(temp_path, capacity, error_rate)
+        try:
+            bloom.update(values)
+            bloom.sync(*stamp)
+            if path:
+                if os.path.exists(path):
+                    old = cls(path)
+                    old.mark_stale()
+                    old.close()
+                try:
+                    os.rename(temp_path, path)
+                except OSError:
+                    # Files cannot be renamed over existing ones on windows
+                    os.remove(path)
+                    os.rename(temp_path, path)
+                bloom.path = path
+        except Exception:
+            bloom.close()
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return bloom
+
+    def _open(self, path):
+        self._file = open(path, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.bits, self.hashes, self.capacity, stamp1, stamp2, stale = \
+            HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('not a bloom filter file')
+        if len(self._map) < HEADER.size + (self.bits + 7) // 8:
+            raise ValueError('file is truncated')
+
+    def _create(self, capacity, error_rate):
+        self.capacity = max(capacity, 1)
+        self.bits = int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(int(round(self.bits / self.capacity * math.log(2))), 1)
+        size = HEADER.size + (self.bits + 7) // 8
+        if self.path:
+            self._file = open(self.path, 'w+b')
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._map = mmap.mmap(-1, size)
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.bits, self.hashes, self.capacity, 0, 0, 0)
+        log.debug('created bloom filter of %s bits with %s hashes for %s values' %
+                  (self.bits, self.hashes, self.capacity))
+
+    def _positions(self, value):
+        if isinstance(value, unicode):
+            value = value.encode('utf-8')
+        h1, h2 = struct.unpack(str('<QQ'), hashlib.md5(value).digest())
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    @property
+    def stale(self):
+        """True if the filter can no longer rule out any value."""
+        return self._map[STALE_OFFSET] != b'\x00'
+
+    def mark_stale(self):
+        self._map[STALE_OFFSET] = b'\x01'
+
+    @property
+    def replaced(self):
+        """True if the file in :attr:`path` is no longer the file this filter has mapped."""
+        if not self.path:
+            return False
+        try:
+            return os.stat(self.path).st_ino != os.fstat(self._file.fileno()).st_ino
+        except OSError:
+            return True
+
+    @property
+    def stamp(self):
+        """Two integers stored with the filter, set with :meth:`sync`."""
+        return STAMP.unpack_from(self._map, STAMP_OFFSET)
+
+    def _process_lock_file(self):
+        """:returns: The file to lock while setting bits, or None if file locks cannot be used."""
+        if not self.path or fcntl is None:
+            return None
+        if self._lock_pid != os.getpid():
+            # Forked processes share the locks of the files they inherited, each process needs its own file
+            self._lock_file = open(self.path, 'rb')
+            self._lock_pid = os.getpid()
+        return self._lock_file
+
+    @contextmanager
+    def _setting_bits(self):
+        """Holds the locks needed to set bits. Gives False if bits must not be set from this process."""
+        with self._lock:
+            lock_file = self._process_lock_file()
+            if lock_file is None:
+                if os.getpid() != self._pid and not self.stale:
+                    # Processes forked from the owner could lose each others bits, stop using the filter everywhere
+                    self.mark_stale()
+                yield os.getpid() == self._pid and not self.stale
+                return
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield not self.stale
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _set_bits(self, masks):
+        """Sets the bits of the given {byte offset: bit mask} dict, you must hold the locks of :meth:`_setting_bits`."""
+        for byte, mask in masks.iteritems():
+            # Only the affected bytes are written, other processes may be setting bits in the rest
+            self._map[byte] = chr(ord(self._map[byte]) | mask)
+
+    def _masks(self, values):
+        masks = {}
+        for value in values:
+            for position in self._positions(value):
+                byte = HEADER.size + position // 8
+                masks[byte] = masks.get(byte, 0) | 1 << position % 8
+        return masks
+
+    def add(self, value):
+        if self.stale:
+            return
+        masks = self._masks([value])
+        with self._setting_bits() as allowed:
+            if allowed:
+                self._set_bits(masks)
+
+    def update(self, values):
+        """Adds many values at once, faster than calling :meth:`add` for each."""
+        values = iter(values)
+        while not self.stale:
+            masks = self._masks(itertools.islice(values, UPDATE_CHUNK_SIZE))
+            if not masks:
+                break
+            with self._setting_bits() as allowed:
+                if not allowed:
+                    break
+                self._set_bits(masks)
+
+    def __contains__(self, value):
+        if self.stale:
+            return True
+        for position in self._positions(value):
+            if not ord(self._map[HEADER.size + position // 8]) & 1 << position % 8:
+                return False
+        return True
+
+    def sync(self, stamp1, stamp2):
+        """Stores a stamp describing the data the filter is in sync with, and writes the filter to disk."""
+        STAMP.pack_into(self._map, STAMP_OFFSET, stamp1, stamp2)
+        if self.path:
+            self._map.flush()
+
+    def close(self):
+        if self._map is not None:
+            if self.path and os.getpid() == self._pid:
+                self._map.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
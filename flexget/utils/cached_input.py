@@ -2,7 +2,9 @@ from __future__ import unicode_literals, division, absolute_import
 import copy
 import logging
 import hashlib
+import threading
 from datetime import datetime, timedelta
+from types import GeneratorType
 from sqlalchemy import Column, Integer, String, DateTime, PickleType, Unicode, ForeignKey
 from sqlalchemy.orm import relation
 from flexget import db_schema
@@ -59,6 +61,59 @@ def config_hash(config):
         return hashlib.md5(str(config)).hexdigest()
 
 
+class SharedInputs(object):
+    """
+    Input results shared by the tasks of one scheduler execution.
+
+    The first task to run an input fetches it, other tasks running the same input with an identical config and
+    `nocache` option get forks of those entries instead of fetching it again. Results are dropped once all tasks of
+    the execution have finished.
+    """
+
+    def __init__(self, tasks):
+        # Number of tasks of the execution which have not yet finished
+        self.remaining = tasks
+        #: Number of inputs which were fetched
+        self.fetches = 0
+        #: Number of fetches avoided by handing out shared results
+        self.saved = 0
+        self._results = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, fetch):
+        """
+        :param key: Identifies the input, its config and anything else the results depend on
+        :param fetch: Function returning the entries of the input, called only if no task has fetched them yet
+        :returns: Entries for this task
+        """
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        # Tasks running the same input wait for the first one to fetch it
+        with lock:
+            if key in self._results:
+                with self._lock:
+                    self.saved += 1
+                entries = [entry.fork() for entry in self._results[key]]
+                log.verbose('Using %s entries fetched by another task' % len(entries))
+                return entries
+            response = fetch()
+            with self._lock:
+                self.fetches += 1
+            if isinstance(response, list):
+                self._results[key] = [entry.fork() for entry in response]
+            return response
+
+    def task_finished(self):
+        """:returns: True when this was the last task of the execution, shared results are dropped then."""
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining > 0:
+                return False
+            self._results.clear()
+            return True
+
+
 class cached(object):
     """
     Implements transparent caching decorator @cached for inputs.
@@ -151,6 +206,9 @@ class cached(object):
                     raise
                 if api_ver == 1:
                     response = task.entries
+                if task.stream and isinstance(response, GeneratorType):
+                    log.debug('Input %s is streaming entries, not caching.' % self.name)
+                    return response
                 if not isinstance(response, list):
                     log.warning('Input %s did not return a list, cannot cache.' % self.name)
                     return response
@@ -173,4 +231,12 @@ class cached(object):
                     task.session.merge(db_cache)
                 return response
 
-        return wrapped_func
+        def shared_func(*args, **kwargs):
+            task = args[1]
+            if task.shared_inputs is None or len(args) != 3:
+                return wrapped_func(*args, **kwargs)
+            # Tasks run with --nocache must not be given entries another task may have restored from the cache
+            key = (self.name, config_hash(args[2]), bool(task.options.nocache))
+            return task.shared_inputs.get(key, lambda: wrapped_func(*args, **kwargs))
+
+        return shared_func
@@ -32,6 +32,13 @@ def with_session(func):
     return wrapper
 
 
+def chunked(seq, size=900):
+    """Divides `seq` into lists small enough to be used as parameters of an IN query on sqlite (<1000)."""
+    seq = list(seq)
+    for i in xrange(0, len(seq), size):
+        yield seq[i:i + size]
+
+
 def pipe_list_synonym(name):
     """Converts pipe separated text into a list"""
 
@@ -2,6 +2,7 @@ from __future__ import unicode_literals, division, absolute_import
 import urllib2
 import time
 import logging
+import threading
 from datetime import timedelta, datetime
 from urlparse import urlparse
 import requests
@@ -84,6 +85,7 @@ class Session(requests.Session):
         self.adapters['http://'].max_retries = max_retries
         # Stores min intervals between requests for certain sites
         self.domain_delay = {}
+        self.domain_delay_lock = threading.Lock()
 
     def add_cookiejar(self, cookiejar):
         """
@@ -114,18 +116,24 @@ class Session(requests.Session):
             raise requests.Timeout('Requests to this site have timed out recently. Waiting before trying again.')
 
         # Check if we need to add a delay before request to this site
-        for domain, domain_dict in self.domain_delay.iteritems():
-            if domain in url:
-                next_req = domain_dict.get('next_req')
-                if next_req and datetime.now() < next_req:
-                    wait_time = next_req - datetime.now()
-                    seconds = wait_time.seconds + (wait_time.microseconds / 1000000.0)
-                    log.debug('Waiting %.2f seconds until next request to %s' % (seconds, domain))
-                    # Sleep until it is time for the next request
-                    time.sleep(seconds)
-                # Record the next allowable request time for this domain
-                domain_dict['next_req'] = datetime.now() + domain_dict['delay']
-                break
+        wait_time = None
+        with self.domain_delay_lock:
+            for domain, domain_dict in self.domain_delay.iteritems():
+                if domain in url:
+                    now = datetime.now()
+                    next_req = domain_dict.get('next_req')
+                    if next_req and now < next_req:
+                        wait_time = next_req - now
+                        now = next_req
+                    # Reserve the next allowable request time for this domain, so that requests from other
+                    # threads queue up behind this one instead of all going out at once
+                    domain_dict['next_req'] = now + domain_dict['delay']
+                    break
+        if wait_time:
+            seconds = wait_time.seconds + (wait_time.microseconds / 1000000.0)
+            log.debug('Waiting %.2f seconds until next request to %s' % (seconds, domain))
+            # Sleep until it is time for the next request
+            time.sleep(seconds)
 
         kwargs.setdefault('timeout', self.timeout)
         raise_status = kwargs.pop('raise_status', True)
@@ -0,0 +1,166 @@
+"""
+Full text indexes, used to search text columns without scanning the whole table.
+
+SQLite FTS5 or FTS4 is used when available, kept in sync with the indexed table by triggers. Otherwise the words of
+each row are kept in a token table, which is kept in sync by ORM inserts and :meth:`TextIndex.add`.
+"""
+from __future__ import unicode_literals, division, absolute_import
+import logging
+import re
+
+from sqlalchemy import Column, Integer, Unicode, Index, MetaData, Table, event, intersect, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import literal_column, table as table_clause
+
+log = logging.getLogger('text_index')
+
+WORD_RE = re.compile(r'[^\W_]+', re.UNICODE)
+
+
+def words(text):
+    """:returns: Lowercase words in `text`, as they are indexed"""
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+class TextIndex(object):
+    """
+    Full text index of one column of a table having an integer primary key `id`.
+
+    :meth:`create` must be called on startup, before rows are inserted. Searches narrow down the rows which may contain
+    the searched text, and fall back to no restriction if the index cannot be used.
+    """
+
+    #: Kinds of indexes tried in order when creating the index
+    kinds = ('fts5', 'fts4', 'tokens')
+
+    def __init__(self, table, column):
+        """
+        :param table: :class:`~sqlalchemy.schema.Table` to index
+        :param string column: Name of the text column to index
+        """
+        self.table = table
+        self.column = column
+        self.name = '%s_%s_index' % (table.name, column)
+        #: Kind of the index in the current database, None until :meth:`create` has been called
+        self.kind = None
+        self.tokens = Table(self.name, MetaData(),
+                            Column('token', Unicode),
+                            Column('row_id', Integer),
+                            Index('ix_%s_token' % self.name, 'token'))
+
+    def create(self, session):
+        """Creates the index if it does not exist yet, indexing the rows already in the table."""
+        self.kind = None
+        if session.bind.dialect.name == 'sqlite':
+            sql = session.execute('SELECT sql FROM sqlite_master WHERE name = :name', {'name': self.name}).scalar()
+            if sql:
+                self.kind = 'fts5' if 'fts5' in sql.lower() else 'fts4' if 'fts4' in sql.lower() else 'tokens'
+                return
+        elif self.tokens.exists(bind=session.connection()):
+            self.kind = 'tokens'
+            return
+        for kind in self.kinds:
+            if kind != 'tokens' and session.bind.dialect.name != 'sqlite':
+                continue
+            try:
+                getattr(self, '_create_%s' % kind)(session)
+            except OperationalError as e:
+                log.debug('Unable to create %s index %s: %s' % (kind, self.name, e))
+                self._drop(session)
+                continue
+            self.kind = kind
+            log.verbose('Created %s full text index %s' % (kind, self.name))
+            return
+
+    def _drop(self, session):
+        for trigger in ('insert', 'update', 'delete', 'before_update', 'before_delete'):
+            session.execute('DROP TRIGGER IF EXISTS %s_%s' % (self.name, trigger))
+        session.execute('DROP TABLE IF EXISTS %s' % self.name)
+
+    def _create_fts5(self, session):
+        values = {'name': self.name, 'table': self.table.name, 'column': self.column}
+        session.execute("CREATE VIRTUAL TABLE %(name)s USING fts5(%(column)s, content='%(table)s', "
+                        "content_rowid='id')" % values)
+        session.execute("CREATE TRIGGER %(name)s_insert AFTER INSERT ON %(table)s BEGIN "
+                        "INSERT INTO %(name)s(rowid, %(column)s) VALUES (new.id, new.%(column)s); END" % values)
+        session.execute("CREATE TRIGGER %(name)s_delete AFTER DELETE ON %(table)s BEGIN "
+                        "INSERT INTO %(name)s(%(name)s, rowid, %(column)s) VALUES ('delete', old.id, old.%(column)s); "
+                        "END" % values)
+        session.execute("CREATE TRIGGER %(name)s_update AFTER UPDATE ON %(table)s BEGIN "
+                        "INSERT INTO %(name)s(%(name)s, rowid, %(column)s) VALUES ('delete', old.id, old.%(column)s); "
+                        "INSERT INTO %(name)s(rowid, %(column)s) VALUES (new.id, new.%(column)s); END" % values)
+        session.execute("INSERT INTO %(name)s(%(name)s) VALUES ('rebuild')" % values)
+
+    def _create_fts4(self, session):
+        values = {'name': self.name, 'table': self.table.name, 'column': self.column}
+        session.execute('CREATE VIRTUAL TABLE %(name)s USING fts4(content="%(table)s", %(column)s, '
+                        'tokenize=unicode61)' % values)
+        session.execute("CREATE TRIGGER %(name)s_before_delete BEFORE DELETE ON %(table)s BEGIN "
+                        "DELETE FROM %(name)s WHERE docid = old.id; END" % values)
+        session.execute("CREATE TRIGGER %(name)s_before_update BEFORE UPDATE ON %(table)s BEGIN "
+                        "DELETE FROM %(name)s WHERE docid = old.id; END" % values)
+        session.execute("CREATE TRIGGER %(name)s_insert AFTER INSERT ON %(table)s BEGIN "
+                        "INSERT INTO %(name)s(docid, %(column)s) VALUES (new.id, new.%(column)s); END" % values)
+        session.execute("CREATE TRIGGER %(name)s_update AFTER UPDATE ON %(table)s BEGIN "
+                        "INSERT INTO %(name)s(docid, %(column)s) VALUES (new.id, new.%(column)s); END" % values)
+        session.execute("INSERT INTO %(name)s(%(name)s) VALUES ('rebuild')" % values)
+
+    def _create_tokens(self, session):
+        self.tokens.create(bind=session.connection())
+        column = self.table.c[self.column]
+        self._insert_tokens(session.connection(), session.execute(select([self.table.c.id, column])))
+
+    def _insert_tokens(self, connection, rows):
+        tokens = [{'token': token, 'row_id': row_id}
+                  for row_id, text in rows if text for token in set(words(text))]
+        if tokens:
+            connection.execute(self.tokens.insert(), tokens)
+
+    @property
+    def uses_triggers(self):
+        """True if the database keeps the index in sync by itself."""
+        return self.kind in ('fts5', 'fts4')
+
+    def add(self, session, rows):
+        """
+        Indexes rows which were inserted without the ORM. Not needed when the index :attr:`uses_triggers`.
+
+        :param rows: (id, text) tuples of the inserted rows
+        """
+        if self.kind == 'tokens':
+            self._insert_tokens(session.connection(), rows)
+
+    def watch(self, mapped_class):
+        """Keeps the token table in sync with rows of `mapped_class` inserted and deleted through the ORM."""
+        event.listen(mapped_class, 'after_insert', self._after_insert)
+        event.listen(mapped_class, 'after_delete', self._after_delete)
+
+    def _after_insert(self, mapper, connection, target):
+        if self.kind == 'tokens':
+            self._insert_tokens(connection, [(target.id, getattr(target, mapper.get_property_by_column(
+                self.table.c[self.column]).key))])
+
+    def _after_delete(self, mapper, connection, target):
+        if self.kind == 'tokens':
+            connection.execute(self.tokens.delete().where(self.tokens.c.row_id == target.id))
+
+    def matching(self, text, start=False):
+        """
+        Only words of `text` which must be at the start of a word in the row are searched for. The first word of `text`
+        could be the end of a longer word, so it is left out, unless `text` starts with a separator or `start` is given.
+
+        :param text: Text searched for anywhere in the column, like with LIKE '%text%'
+        :param bool start: True if `text` is only searched for at the start of the column
+        :returns: Select of the ids of rows which may contain `text`, or None if the index cannot be used to search
+            for `text`. Rows are not checked any further, callers should still check the text.
+        """
+        search_words = [match.group(0).lower() for match in WORD_RE.finditer(text) if start or match.start() > 0]
+        if not search_words or self.kind is None:
+            return None
+        if self.kind == 'tokens':
+            return intersect(*[select([self.tokens.c.row_id]).
+                               where(self.tokens.c.token >= word).where(self.tokens.c.token < word + '\uffff')
+                               for word in search_words])
+        query = ' '.join('%s*' % word for word in search_words)
+        return select([literal_column('rowid')]).select_from(table_clause(self.name)).\
+            where(literal_column(self.name).match(query))
@@ -605,3 +605,73 @@ class SeriesParser(TitleParser):
 
     def __eq__(self, other):
         return self is other
+
+
+class SeriesIndex(object):
+    """
+    Finds the series whose names a text may start with, in one pass over the text, so that texts only need to be
+    parsed with the :class:`SeriesParser` of those series.
+
+    Names are stored in a character trie with the blanks removed, the same way :meth:`SeriesParser.name_to_re` allows
+    any amount of blanks between the words of a name. Candidates are never missed, but may not match their parser.
+    """
+
+    # Blanks are any non word characters except & and _, as in SeriesParser.name_to_re
+    blank_re = re.compile(r'(?:[^\w&]|_)+', re.UNICODE)
+    ignore_prefix_re = re.compile('^(?:' + '|'.join(SeriesParser.ignore_prefixes) + ')', re.IGNORECASE | re.UNICODE)
+
+    def __init__(self):
+        self._trie = {}
+        # Series with custom name regexps, which are candidates for every text
+        self._always = set()
+
+    def add(self, series, names, name_regexps=None):
+        """
+        :param series: Value returned by :meth:`candidates` for texts starting with one of `names`
+        :param list names: Name and alternate names of the series
+        :param list name_regexps: Custom name regexps of the series, if any the series is a candidate for every text
+        """
+        if name_regexps:
+            self._always.add(series)
+            return
+        for name in names:
+            for key in self.keys(name):
+                node = self._trie
+                for char in key:
+                    node = node.setdefault(char, {})
+                node.setdefault(None, set()).add(series)
+
+    def keys(self, name):
+        """:returns: Lowercase forms of `name` without blanks, which texts matching the name start with"""
+        if name.endswith(')'):
+            # The parenthetical is optional in the name regexp
+            p_start = name.rfind('(')
+            if p_start != -1:
+                name = name[:p_start - 1]
+        words = self.blank_re.sub(' ', name).strip().lower().split(' ')
+        keys = ['']
+        for index, word in enumerate(words):
+            # Words between others may be written either as 'and' or '&'
+            if 0 < index < len(words) - 1 and word in ('and', '&'):
+                keys = [key + choice for key in keys for choice in ('and', '&')]
+            else:
+                keys = [key + word for key in keys]
+        return keys
+
+    def candidates(self, text):
+        """:returns: Set of the series `text` may be about"""
+        found = set(self._always)
+        starts = [0]
+        # The name may come after an ignored prefix, or the prefix may be part of the name
+        match = self.ignore_prefix_re.match(text)
+        if match:
+            starts.append(match.end())
+        for start in starts:
+            node = self._trie
+            found.update(node.get(None, ()))
+            for char in self.blank_re.sub('', text[start:]).lower():
+                node = node.get(char)
+                if node is None:
+                    break
+                found.update(node.get(None, ()))
+        return found
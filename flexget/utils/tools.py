@@ -12,7 +12,7 @@ import locale
 from collections import MutableMapping
 from urlparse import urlparse
 from htmlentitydefs import name2codepoint
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, date
 
 
 def str_to_boolean(string):
@@ -156,6 +156,25 @@ def merge_dict_from_to(d1, d2):
             d2[k] = copy.deepcopy(v)
 
 
+# Values of these types are never modified in place, copies of config can share them
+_immutable_config_types = (basestring, bool, int, long, float, type(None), datetime, date, timedelta)
+
+
+def copy_config(config):
+    """
+    Deep copies a config structure. Dicts and lists are copied, immutable values are shared with the original.
+    Several times faster than :func:`copy.deepcopy` on large configs, other types fall back to it.
+    """
+    if isinstance(config, _immutable_config_types):
+        return config
+    if type(config) is dict:
+        return dict((key, copy_config(value)) for key, value in config.iteritems())
+    if type(config) is list:
+        return [copy_config(value) for value in config]
+    import copy
+    return copy.deepcopy(config)
+
+
 class SmartRedirectHandler(urllib2.HTTPRedirectHandler):
 
     def http_error_301(self, req, fp, code, msg, headers):
@@ -9,6 +9,8 @@ import warnings
 from contextlib import contextmanager
 
 import flexget.logger
+from flexget import config_schema, plugin
+from flexget.event import remove_event_handler
 from flexget.manager import Manager
 from flexget.plugin import load_plugins
 from flexget.options import get_parser
@@ -46,6 +48,28 @@ def setup_once():
         plugins_loaded = True
 
 
+def register_mock_plugin(plugin_class, name, **kwargs):
+    """
+    Registers a plugin only for the tests using it, call from setup and remove it with :func:`unregister_mock_plugin`
+    on teardown so that it does not leak into other test modules.
+    """
+    setup_once()
+    info = plugin.register(plugin_class, name, **kwargs)
+    info.initialize()
+    return info
+
+
+def unregister_mock_plugin(name):
+    """Removes a plugin registered with :func:`register_mock_plugin`, along with its phase handlers."""
+    info = plugin.plugins.pop(name, None)
+    if info is None:
+        return
+    for phase, handler in info.phase_handlers.iteritems():
+        remove_event_handler('plugin.%s.%s' % (name, phase), handler.func)
+    config_schema.schema_paths.pop('/schema/plugin/%s' % name, None)
+    plugin._phase_plans.clear()
+
+
 class MockManager(Manager):
     unit_test = True
 
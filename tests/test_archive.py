@@ -0,0 +1,52 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from mock import patch
+
+from flexget.manager import Session
+from tests import FlexGetBase
+
+
+class TestArchiveSearch(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Some.Show.S01E01.720p', url: 'http://localhost/some'}
+              - {title: 'Other.Show.S01E01', url: 'http://localhost/other'}
+            archive: [tv]
+    """
+
+    def search(self, text):
+        from flexget.plugins.generic.archive import search
+        session = Session()
+        try:
+            return set(ae.title for ae in search(session, text))
+        finally:
+            session.close()
+
+    def check_search(self):
+        self.execute_task('test')
+        assert self.search('some show') == set(['Some.Show.S01E01.720p'])
+        assert self.search('other.show s01') == set(['Other.Show.S01E01'])
+        assert self.search('some.sh') == set(['Some.Show.S01E01.720p']), 'last word may end in the middle of a word'
+        assert not self.search('show'), 'titles should match from the start'
+        assert not self.search('some other')
+
+    def test_search(self):
+        from flexget.plugins.generic.archive import archive_title_index
+        assert archive_title_index.uses_triggers, 'sqlite full text index should be used'
+        self.check_search()
+
+    def test_search_tokens(self):
+        from flexget.plugins.generic.archive import archive_title_index
+        session = Session()
+        try:
+            archive_title_index._drop(session)
+            with patch.object(archive_title_index, 'kinds', ('tokens',)):
+                archive_title_index.create(session)
+            session.commit()
+        finally:
+            session.close()
+        assert archive_title_index.kind == 'tokens'
+        self.check_search()
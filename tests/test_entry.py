@@ -0,0 +1,86 @@
+from __future__ import unicode_literals, division, absolute_import
+import logging
+import sys
+
+from flexget.entry import Entry
+
+log = logging.getLogger('test_entry')
+
+
+class EagerEntry(dict):
+    """Entry layout before bookkeeping was moved to slots, allocates everything up front."""
+
+    def __init__(self, *args, **kwargs):
+        self.traces = []
+        self.snapshots = {}
+        self._state = 'undecided'
+        self._hooks = {'accept': [], 'reject': [], 'fail': [], 'complete': []}
+        self._containers = []
+        self.task = None
+        dict.__init__(self, *args, **kwargs)
+
+
+def bookkeeping_size(entry):
+    """Bytes used by an entry object and its bookkeeping, not counting the fields."""
+    size = sys.getsizeof(entry) - sys.getsizeof(dict(entry))
+    attrs = getattr(entry, '__dict__', None)
+    if attrs is not None:
+        size += sys.getsizeof(attrs)
+        values = attrs.values()
+    else:
+        values = [getattr(entry, name) for name in Entry.__slots__]
+    for value in values:
+        if isinstance(value, (list, dict)):
+            size += sys.getsizeof(value)
+        if isinstance(value, dict):
+            size += sum(sys.getsizeof(v) for v in value.itervalues() if isinstance(v, list))
+    return size
+
+
+class TestEntryMemory(object):
+
+    def test_bookkeeping_size(self):
+        fields = {'title': 'Some.Show.S01E01.720p.HDTV', 'url': 'http://localhost/some/show'}
+        compact = bookkeeping_size(Entry(fields))
+        eager = bookkeeping_size(EagerEntry(fields))
+        log.info('Entry bookkeeping: %d bytes, with eager allocation: %d bytes, saving %d bytes per entry' %
+                 (compact, eager, eager - compact))
+        assert not hasattr(Entry(fields), '__dict__'), 'Entry should not have an instance dict'
+        assert compact * 4 < eager, 'bookkeeping takes %d bytes, eager layout %d' % (compact, eager)
+
+    def test_lazy_allocation(self):
+        entry = Entry(title='entry', url='http://localhost/entry')
+        assert entry._traces is None and entry._snapshots is None and entry._hooks is None
+        entry.on_complete(lambda e, **kwargs: e.trace('completed'))
+        assert entry._hooks.keys() == ['complete']
+        entry.complete()
+        assert entry.traces == [(None, None, 'completed')]
+
+
+class TestSnapshots(object):
+
+    def test_journal(self):
+        entry = Entry(title='entry', url='http://localhost/entry', tags=['a'])
+        entry.take_snapshot('before')
+        entry['title'] = 'changed'
+        entry['title'] = 'changed again'
+        entry['new_field'] = 1
+        entry['tags'].append('b')
+        del entry['url']
+        assert entry.snapshots['before'] == {'title': 'entry', 'url': 'http://localhost/entry',
+                                             'original_url': 'http://localhost/entry', 'tags': ['a']}
+        entry.take_snapshot('after')
+        entry.pop('new_field')
+        assert entry.snapshots['after']['new_field'] == 1
+        assert 'new_field' not in entry.snapshots['before']
+        assert sorted(entry.snapshots) == ['after', 'before']
+
+    def test_lazy_field(self):
+        entry = Entry(title='entry', url='http://localhost/entry')
+        first = lambda entry, field: 'first'
+        entry.register_lazy_fields(['lazy'], first)
+        entry.take_snapshot('before')
+        entry.register_lazy_fields(['lazy'], lambda entry, field: 'second')
+        lazy = dict.get(entry.snapshots['before'], 'lazy')
+        assert lazy is not dict.get(entry, 'lazy'), 'snapshot should have its own copy of the lazy field'
+        assert lazy.funcs == [first], 'lookups registered after the snapshot should not be in it'
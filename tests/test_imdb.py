@@ -9,6 +9,12 @@
 """
 
 from __future__ import unicode_literals, division, absolute_import
+from datetime import datetime
+
+from sqlalchemy import event
+
+from flexget.manager import Session
+from flexget.plugins.metainfo.imdb_lookup import Movie
 from tests import FlexGetBase
 from nose.plugins.attrib import attr
 
@@ -263,3 +269,41 @@ class TestImdbLookup(FlexGetBase):
         assert self.task.entries[0]['imdb_score'], 'didn\'t get score'
         assert self.task.entries[0]['imdb_year'], 'didn\'t get year'
         assert self.task.entries[0]['imdb_plot_outline'], 'didn\'t get plot'
+
+
+class TestImdbPrefetch(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Movie 1', imdb_url: 'http://www.imdb.com/title/tt0000001/'}
+              - {title: 'Movie 2', imdb_url: 'http://www.imdb.com/title/tt0000002/'}
+              - {title: 'Movie 3', imdb_id: 'tt0000003'}
+            imdb_lookup: yes
+            sort_by:
+              field: imdb_score
+              reverse: yes
+    """
+
+    def setup(self):
+        super(TestImdbPrefetch, self).setup()
+        session = Session()
+        for number, score in enumerate([6.0, 8.0, 7.0], 1):
+            session.add(Movie(title='Movie %s' % number, url='http://www.imdb.com/title/tt%07d/' % number,
+                              score=score, year=datetime.now().year, updated=datetime.now()))
+        session.commit()
+        self.movie_queries = 0
+        # Each test gets a new engine, the listener goes away with it
+        event.listen(self.manager.engine, 'before_cursor_execute', self.count_query)
+
+    def count_query(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT imdb_movies.'):
+            self.movie_queries += 1
+
+    def test_prefetch(self):
+        self.execute_task('test')
+        assert [e['title'] for e in self.task.entries] == ['Movie 2', 'Movie 3', 'Movie 1'], \
+            'entries were not sorted by cached imdb_score'
+        assert self.task.entries[1]['imdb_url'] == 'http://www.imdb.com/title/tt0000003/'
+        assert self.movie_queries == 1, 'cached movies should be loaded with one query, took %s' % self.movie_queries
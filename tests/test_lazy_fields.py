@@ -1,5 +1,6 @@
 from __future__ import unicode_literals, division, absolute_import
-from flexget.entry import Entry
+from flexget.entry import Entry, lazy_batch
+from tests import FlexGetBase
 
 
 class TestLazyFields(object):
@@ -39,3 +40,65 @@ class TestLazyFields(object):
         assert entry['a_fail'] == 'b', 'Lookup should have fallen back to b'
         assert 'a_field' not in entry, 'a_field should no longer be in entry after failed lookup'
         assert entry['ab_field'] == 'b', 'ab_field should be `b`'
+
+
+class TestPrefetchLazy(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'entry'}
+    """
+
+    def test_batches(self):
+        calls = []
+
+        def batch_a(entries, fields):
+            calls.append(('batch', [e['title'] for e in entries], fields))
+            # Leave the last entry for the single lookup
+            for entry in entries[:-1]:
+                entry['a_field'] = 'batch'
+
+        @lazy_batch(batch_a)
+        def lazy_a(entry, field):
+            calls.append(('single', entry['title'], field))
+            entry['a_field'] = 'single'
+            return entry[field]
+
+        def lazy_b(entry, field):
+            calls.append(('single', entry['title'], field))
+            entry['b_field'] = 'single'
+            return entry[field]
+
+        entries = []
+        for title in ['1', '2', '3']:
+            entry = Entry(title=title, url='http://localhost/%s' % title)
+            entry.register_lazy_fields(['a_field'], lazy_a)
+            entry.register_lazy_fields(['b_field'], lazy_b)
+            entries.append(entry)
+        self.execute_task('test')
+        self.task.prefetch_lazy(entries, ['a_field', 'b_field'])
+        assert calls[0] == ('batch', ['1', '2', '3'], ['a_field']), 'batch lookup was not called once for all'
+        assert ('single', '3', 'a_field') in calls and ('single', '1', 'a_field') not in calls
+        assert len([c for c in calls if c[2] == 'b_field']) == 3, 'lookup without batch form should run per entry'
+        assert [e['a_field'] for e in entries] == ['batch', 'batch', 'single']
+        assert not any(e.is_lazy('a_field') or e.is_lazy('b_field') for e in entries)
+
+    def test_failed_batch(self):
+        def batch(entries, fields):
+            raise AttributeError('broken batch lookup')
+
+        @lazy_batch(batch)
+        def lazy(entry, field):
+            entry['a_field'] = 'single'
+            return entry[field]
+
+        entries = []
+        for title in ['1', '2']:
+            entry = Entry(title=title, url='http://localhost/%s' % title)
+            entry.register_lazy_fields(['a_field'], lazy)
+            entries.append(entry)
+        self.execute_task('test')
+        self.task.prefetch_lazy(entries, ['a_field'])
+        assert [e['a_field'] for e in entries] == ['single', 'single'], 'should fall back to single lookups'
@@ -1,10 +1,13 @@
 from __future__ import unicode_literals, division, absolute_import
 import os
 import stat
-from tests import FlexGetBase
+from tests import FlexGetBase, register_mock_plugin, unregister_mock_plugin
 from nose.plugins.attrib import attr
 from nose.tools import raises
+from flexget import plugin
 from flexget.entry import EntryUnicodeError, Entry
+from flexget.event import add_event_handler, remove_event_handler
+from flexget.task import EntryContainer
 
 
 class TestDisableBuiltins(FlexGetBase):
@@ -248,3 +251,128 @@ class TestSetPlugin(FlexGetBase):
         assert 'field' not in entry,\
                 '`field` should not have been created when jinja rendering fails'
         assert entry['otherfield'] == 'no series'
+
+
+class EarlyBuiltin(object):
+    """Fake builtin plugin, its input handler runs before the configured inputs."""
+
+    runs = 0
+
+    @plugin.priority(255)
+    def on_task_input(self, task, config):
+        EarlyBuiltin.runs += 1
+
+
+class TestRerunInput(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Entry 1'}
+              - {title: 'Entry 2'}
+            rerun: 2
+    """
+
+    def setup(self):
+        register_mock_plugin(EarlyBuiltin, 'test_early_builtin', builtin=True, api_ver=2)
+        super(TestRerunInput, self).setup()
+        self.input_runs = 0
+        EarlyBuiltin.runs = 0
+        add_event_handler('task.execute.before_plugin', self.count_input)
+
+    def teardown(self):
+        remove_event_handler('task.execute.before_plugin', self.count_input)
+        try:
+            super(TestRerunInput, self).teardown()
+        finally:
+            unregister_mock_plugin('test_early_builtin')
+
+    def count_input(self, task, keyword):
+        if keyword == 'mock' and task.current_phase == 'input':
+            self.input_runs += 1
+
+    def test_input_reused(self):
+        self.execute_task('test')
+        assert self.task._rerun_count == 2
+        assert self.input_runs == 1, 'input was run again on rerun'
+        entry = self.task.find_entry(title='Entry 1')
+        assert entry, 'entries were not restored on rerun'
+        assert entry['url'] == entry.snapshots['after_input']['url']
+        assert len(self.task.all_entries) == 2
+
+    def test_builtin_before_inputs(self):
+        self.execute_task('test')
+        assert EarlyBuiltin.runs == 3, 'builtin input handlers should run on every rerun'
+        assert self.input_runs == 1, 'input was run again on rerun'
+        assert len(self.task.all_entries) == 2, 'entries were not restored on rerun'
+
+
+class TestEntryContainer(object):
+
+    def test_state_index(self):
+        container = EntryContainer()
+        container.extend(Entry(title='entry %s' % i, url='') for i in range(5))
+        assert len(container.entries) == 5 and not container.accepted
+        container[3].accept()
+        container[1].accept()
+        assert [e['title'] for e in container.accepted] == ['entry 1', 'entry 3'], 'accepted not in container order'
+        assert container.accepted[1] is container[3]
+        container[1].reject()
+        assert len(container.accepted) == 1 and len(container.rejected) == 1
+        assert container.entries[1] is container[2], 'rejected entry should not be in entries'
+        # Changing states while iterating works like a filter
+        titles = []
+        for entry in container.entries:
+            titles.append(entry['title'])
+            if entry is container[0]:
+                container[2].fail()
+        assert titles == ['entry 0', 'entry 3', 'entry 4']
+        container.append(Entry(title='entry 5', url=''))
+        container[5].accept()
+        container.sort(key=lambda e: e['title'], reverse=True)
+        assert [e['title'] for e in container.accepted] == ['entry 5', 'entry 3']
+        assert container.failed[0]['title'] == 'entry 2'
+
+
+class TestFindEntry(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'entry 0', url: 'http://localhost/0'}
+              - {title: 'entry 1', url: 'http://localhost/1'}
+              - {title: 'entry 2', url: 'http://localhost/2'}
+    """
+
+    def test_find_entry(self):
+        self.execute_task('test')
+        entry = self.task.find_entry(title='entry 1', url='http://localhost/1')
+        assert entry is self.task.all_entries[1]
+        assert self.task.find_entry(title='entry 1', url='http://localhost/2') is None
+        entry.reject()
+        assert self.task.find_entry(title='entry 1') is None
+        assert self.task.find_entry('rejected', title='entry 1') is entry
+        # Setting a field should update the index
+        entry['title'] = 'renamed'
+        assert self.task.find_entry('rejected', title='renamed') is entry
+        self.task.all_entries.append(Entry(title='entry 3', url='http://localhost/3'))
+        assert self.task.find_entry(original_url='http://localhost/3') is self.task.all_entries[3]
+
+
+class TestCopyConfig(object):
+
+    def test_copy_config(self):
+        from datetime import datetime
+        from flexget.utils.tools import copy_config
+        config = {'series': [{'show': {'quality': '720p'}}], 'regexp': {'accept': ['a', 'b']},
+                  'time': datetime(2014, 1, 1), 'other': set([1])}
+        copied = copy_config(config)
+        assert copied == config
+        copied['series'][0]['show']['quality'] = '1080p'
+        copied['regexp']['accept'].append('c')
+        copied['other'].add(2)
+        assert config['series'][0]['show']['quality'] == '720p'
+        assert config['regexp']['accept'] == ['a', 'b'] and config['other'] == set([1])
+        assert copied['time'] is config['time'], 'immutable values should be shared'
@@ -6,7 +6,7 @@ from nose.tools import raises
 
 from tests import FlexGetBase
 from flexget import plugin, plugins
-from flexget.event import event
+from flexget.event import event, add_event_handler, fire_event, get_events, remove_event_handlers
 
 
 class TestPluginApi(object):
@@ -80,3 +80,47 @@ class TestExternalPluginLoading(FlexGetBase):
     def test_external_plugin_loading(self):
         self.execute_task('ext_plugin')
         assert self.task.find_entry(title='test entry'), 'External plugin did not create entry'
+
+    def test_phase_plan(self):
+        plugin.load_plugins()
+        plan = plugin.get_phase_plan('filter')
+        assert plan, 'no plugins in filter phase'
+        assert plan == sorted(plan, key=lambda item: item[1].priority, reverse=True), 'plan not in priority order'
+        assert plugin.get_phase_plan('filter') is plan, 'plan was not cached'
+        # Changing a priority must reorder the plan
+        handler = plugin.get_plugin_by_name('regexp').phase_handlers['filter']
+        original = handler.priority
+        handler.priority = 1000
+        try:
+            assert plugin.get_phase_plan('filter')[0][0].name == 'regexp'
+        finally:
+            handler.priority = original
+
+
+class TestEvents(object):
+
+    def teardown(self):
+        remove_event_handlers('test.event')
+
+    def test_handler_order(self):
+        calls = []
+
+        def handler(name):
+            def func():
+                calls.append(name)
+            func.__name__ = str(name)
+            return func
+
+        for name, priority in [('low', 1), ('first', 128), ('high', 255), ('second', 128)]:
+            add_event_handler('test.event', handler(name), priority)
+        # Handlers are kept in order when registered, same priority runs in registration order
+        assert [e.priority for e in get_events('test.event')] == [255, 128, 128, 1]
+        fire_event('test.event')
+        assert calls == ['high', 'first', 'second', 'low']
+        # Changing a priority must reorder the handlers
+        get_events('test.event')[-1].priority = 500
+        del calls[:]
+        fire_event('test.event')
+        assert calls == ['low', 'high', 'first', 'second']
+        # Events without handlers do nothing
+        fire_event('test.no_handlers')
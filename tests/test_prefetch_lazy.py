@@ -0,0 +1,70 @@
+from __future__ import unicode_literals, division, absolute_import
+import threading
+
+from tests import FlexGetBase, register_mock_plugin, unregister_mock_plugin
+
+
+class SlowLookup(object):
+    """
+    Fake metainfo plugin, registers a lazy field whose lookup waits until `wanted` lookups are running at the same
+    time, or until a timeout.
+    """
+
+    wanted = 4
+    threads = set()
+    running = 0
+    most_running = 0
+    condition = threading.Condition()
+
+    def lazy_loader(self, entry, field):
+        cls = SlowLookup
+        with cls.condition:
+            cls.running += 1
+            cls.most_running = max(cls.most_running, cls.running)
+            cls.condition.notify_all()
+            if cls.most_running < cls.wanted:
+                cls.condition.wait(10)
+            cls.running -= 1
+        cls.threads.add(threading.current_thread().name)
+        entry['slow_field'] = 'looked up %s' % entry['title']
+        return entry[field]
+
+    def on_task_metainfo(self, task, config):
+        for entry in task.entries:
+            entry.register_lazy_fields(['slow_field'], self.lazy_loader)
+
+
+class TestPrefetchLazy(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'entry 1'}
+              - {title: 'entry 2'}
+              - {title: 'entry 3'}
+              - {title: 'entry 4'}
+            test_slow_lookup: yes
+            prefetch_lazy:
+              threads: 4
+    """
+
+    def setup(self):
+        register_mock_plugin(SlowLookup, 'test_slow_lookup', api_ver=2)
+        super(TestPrefetchLazy, self).setup()
+
+    def teardown(self):
+        try:
+            super(TestPrefetchLazy, self).teardown()
+        finally:
+            unregister_mock_plugin('test_slow_lookup')
+
+    def test_prefetch(self):
+        SlowLookup.threads.clear()
+        SlowLookup.most_running = 0
+        self.execute_task('test')
+        for entry in self.task.entries:
+            assert not entry.is_lazy('slow_field'), 'field should have been looked up before filtering'
+            assert entry['slow_field'] == 'looked up %s' % entry['title']
+        assert SlowLookup.most_running == 4, 'lookups did not run in parallel'
+        assert threading.current_thread().name not in SlowLookup.threads
@@ -0,0 +1,586 @@
+from __future__ import unicode_literals, division, absolute_import
+import copy
+from datetime import datetime, timedelta
+import heapq
+import os
+import threading
+import time
+
+from flexget import plugin
+from flexget.entry import Entry
+from flexget.event import add_event_handler, remove_event_handler
+from flexget.scheduler import Alarm, BufferQueue, Job, task_delay, format_status
+from flexget.task import Task
+from flexget.utils.cached_input import cached, SharedInputs
+from tests import FlexGetBase, util, register_mock_plugin, unregister_mock_plugin
+
+
+class SlowInput(object):
+    """Fake input plugin, counts how many times it is fetched."""
+
+    fetches = 0
+
+    @cached('test_slow_input')
+    def on_task_input(self, task, config):
+        SlowInput.fetches += 1
+        time.sleep(0.2)
+        return [Entry(title='entry %s' % i, url='http://localhost/%s' % i) for i in range(config)]
+
+
+class AcceptedRecorder(object):
+    """Fake output plugin, records the accepted entries of each task."""
+
+    accepted = {}
+
+    def on_task_output(self, task, config):
+        self.accepted[task.name] = list(task.accepted)
+
+
+class Rendezvous(object):
+    """
+    Fake plugin, waits at task start until the configured amount of tasks have arrived, or until `timeout` seconds
+    have passed. The most tasks it saw in their start phase at once is written to a file named after the task. Files
+    are used so that tasks in worker processes can meet too.
+    """
+
+    def on_task_start(self, task, config):
+        dirs = [os.path.join(config['dir'], name) for name in ('arrived', 'departed')]
+        for path in dirs:
+            try:
+                os.makedirs(path)
+            except OSError:
+                pass
+        arrived, departed = dirs
+        open(os.path.join(arrived, task.name), 'w').close()
+        most = 0
+        deadline = time.time() + config.get('timeout', 10)
+        try:
+            while True:
+                count = len(os.listdir(arrived))
+                most = max(most, count - len(os.listdir(departed)))
+                if count >= config['tasks'] or time.time() > deadline:
+                    break
+                time.sleep(0.01)
+        finally:
+            open(os.path.join(departed, task.name), 'w').close()
+        with open(os.path.join(config['dir'], task.name), 'w') as f:
+            f.write(str(most))
+
+
+class Crash(object):
+    """Fake plugin, kills the process running the task."""
+
+    def on_task_start(self, task, config):
+        os._exit(1)
+
+
+class SchedulerBase(FlexGetBase):
+
+    __tmp__ = True
+
+    def setup(self):
+        register_mock_plugin(SlowInput, 'test_slow_input', api_ver=2)
+        register_mock_plugin(AcceptedRecorder, 'test_accepted_recorder', api_ver=2)
+        register_mock_plugin(Rendezvous, 'test_rendezvous', api_ver=2)
+        # Each worker thread gets its own connection, so the tests cannot use an in-memory database
+        db_filename = os.path.join(util.maketemp(), 'scheduler_test.sqlite')
+        self.database_uri = 'sqlite:///%s' % db_filename.replace('\\', '\\\\')
+        super(SchedulerBase, self).setup()
+
+    def teardown(self):
+        try:
+            super(SchedulerBase, self).teardown()
+        finally:
+            for name in ['test_slow_input', 'test_accepted_recorder', 'test_rendezvous']:
+                unregister_mock_plugin(name)
+
+    def run_jobs(self, *tasks):
+        """Runs given tasks through the scheduler and waits for them to complete."""
+        self.manager.scheduler.start(run_schedules=False)
+        self.manager.scheduler.execute(options={'tasks': list(tasks)})
+        self.manager.scheduler.shutdown(finish_queue=True)
+        self.manager.scheduler.wait()
+
+    def met(self, *tasks):
+        """:return: Most of `tasks` the rendezvous plugin saw starting at the same time"""
+        most = 0
+        for task in tasks:
+            with open(os.path.join(self.__tmp__, task)) as f:
+                most = max(most, int(f.read()))
+        return most
+
+
+class TestSchedulerWorkers(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          workers: 2
+        tasks:
+          sleepy_1:
+            mock:
+              - {title: 'entry 1'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+          sleepy_2:
+            mock:
+              - {title: 'entry 2'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+    """
+
+    def test_parallel(self):
+        self.run_jobs('sleepy_1', 'sleepy_2')
+        assert self.met('sleepy_1', 'sleepy_2') == 2, 'tasks did not run in parallel'
+
+    def test_output_capture(self):
+        scheduler = self.manager.scheduler
+        outputs = {'sleepy_1': BufferQueue(), 'sleepy_2': BufferQueue()}
+        scheduler.start(run_schedules=False)
+        for task, output in outputs.iteritems():
+            scheduler.execute(options={'tasks': [task]}, output=output)
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        for task, output in outputs.iteritems():
+            text = ''.join(output.queue)
+            assert 'executing %s' % task in text, 'output for %s was not captured' % task
+            other = 'sleepy_2' if task == 'sleepy_1' else 'sleepy_1'
+            assert 'executing %s' % other not in text, 'output from %s leaked to %s' % (other, task)
+
+
+class TestSchedulerSerialize(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          workers: 2
+          serialize: test_rendezvous
+        tasks:
+          sleepy_1:
+            mock:
+              - {title: 'entry 1'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2, timeout: 0.5}
+          sleepy_2:
+            mock:
+              - {title: 'entry 2'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2, timeout: 0.5}
+    """
+
+    def test_serialized(self):
+        self.run_jobs('sleepy_1', 'sleepy_2')
+        assert self.met('sleepy_1', 'sleepy_2') == 1, 'serialized tasks ran at the same time'
+
+
+class TestSchedulerExclusive(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          workers: 2
+        tasks:
+          exclusive:
+            mock:
+              - {title: 'entry 1'}
+            disable_builtins: yes
+            test_rendezvous: {dir: '__tmp__', tasks: 2, timeout: 0.5}
+          other:
+            mock:
+              - {title: 'entry 2'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2, timeout: 0.5}
+    """
+
+    def setup(self):
+        super(TestSchedulerExclusive, self).setup()
+        self.cleanups = []
+        add_event_handler('manager.db_cleanup', self.on_db_cleanup)
+
+    def teardown(self):
+        remove_event_handler('manager.db_cleanup', self.on_db_cleanup)
+        super(TestSchedulerExclusive, self).teardown()
+
+    def on_db_cleanup(self, session):
+        # Number of jobs running alongside the cleanup
+        self.cleanups.append(self.manager.scheduler.jobs_lock._shared)
+
+    def test_exclusive_plugin(self):
+        self.run_jobs('exclusive', 'other')
+        assert self.met('exclusive', 'other') == 1, 'task using an exclusive plugin ran alongside another task'
+
+    def test_db_cleanup(self):
+        scheduler = self.manager.scheduler
+        scheduler.start(run_schedules=False)
+        scheduler.execute(options={'tasks': ['other'], 'cron': True})
+        scheduler.execute(options={'tasks': ['other'], 'cron': True})
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        assert self.cleanups == [0], 'database cleanup should run once, while no task runs (ran %s)' % self.cleanups
+        assert not self.manager.db_cleanup_due
+
+
+class TestSchedulerTriggers(SchedulerBase):
+
+    __yaml__ = """
+        schedules:
+          - tasks: test
+            interval:
+              seconds: 1
+        tasks:
+          test:
+            mock:
+              - {title: 'entry'}
+    """
+
+    def setup(self):
+        super(TestSchedulerTriggers, self).setup()
+        # Scheduled runs would also queue the database cleanup, keep it out of the run queue
+        self.manager.persist['last_cleanup'] = datetime.now()
+        self.manager.scheduler.load_schedules()
+
+    def test_trigger_fires(self):
+        from flexget.manager import Session
+        from flexget.scheduler import DBTrigger
+        scheduler = self.manager.scheduler
+        trigger = scheduler.triggers[0]
+        # The trigger has never run, so it should be due right away
+        assert scheduler.queue_pending_jobs() > datetime.now(), 'next run should be in the future'
+        assert scheduler.run_queue.qsize() == 1, 'trigger did not queue its job'
+        # Should not fire again until its interval has passed
+        scheduler.queue_pending_jobs()
+        assert scheduler.run_queue.qsize() == 1, 'trigger fired twice'
+        session = Session()
+        try:
+            db_trigger = session.query(DBTrigger).get(trigger.uid)
+            assert db_trigger and db_trigger.last_run == trigger.last_run, 'last_run was not recorded'
+        finally:
+            session.close()
+
+    def test_blocked_trigger(self):
+        scheduler = self.manager.scheduler
+        scheduler.queue_pending_jobs()
+        time.sleep(1.1)
+        # Job from the first run has not started yet, the trigger should be held back
+        scheduler.queue_pending_jobs()
+        assert scheduler.run_queue.qsize() == 1, 'trigger fired while its last jobs were still queued'
+        scheduler.start(run_schedules=False)
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        # Once the job has started, the trigger is due again right away
+        scheduler.queue_pending_jobs()
+        assert scheduler.run_queue.qsize() == 1, 'blocked trigger was not fired after its jobs started'
+
+
+class TestSchedulerAlarm(object):
+
+    def test_earlier_alarm(self):
+        event = threading.Event()
+        alarm = Alarm(event)
+        alarm.start()
+        try:
+            alarm.set(datetime.now() + timedelta(hours=1))
+            alarm.set(datetime.now() + timedelta(seconds=0.2))
+            alarm.set(datetime.now() + timedelta(minutes=1))
+            assert event.wait(5), 'alarm should go off at the earliest time set'
+            alarm_threads = [t for t in threading.enumerate() if t.name == 'scheduler-alarm']
+            assert alarm_threads == [alarm], 'a single thread should handle all alarms'
+        finally:
+            alarm.stop()
+            alarm.join(5)
+        assert not alarm.is_alive()
+
+
+class TestSchedulerProcesses(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          processes: 2
+        tasks:
+          sleepy_1:
+            mock:
+              - {title: 'entry 1'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+          sleepy_2:
+            mock:
+              - {title: 'entry 2'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+          quick:
+            mock:
+              - {title: 'entry 5'}
+          follow_up:
+            mock:
+              - {title: 'entry 3'}
+            run_task:
+              task: followed
+          followed:
+            mock:
+              - {title: 'entry 4'}
+          crash:
+            test_crash: yes
+    """
+
+    def setup(self):
+        register_mock_plugin(Crash, 'test_crash', api_ver=2)
+        super(TestSchedulerProcesses, self).setup()
+
+    def teardown(self):
+        try:
+            super(TestSchedulerProcesses, self).teardown()
+        finally:
+            unregister_mock_plugin('test_crash')
+
+    def executed_tasks(self):
+        from flexget.manager import Session
+        from flexget.task import TaskConfigHash
+        session = Session()
+        try:
+            return set(h.task for h in session.query(TaskConfigHash).all())
+        finally:
+            session.close()
+
+    def test_parallel(self):
+        self.run_jobs('sleepy_1', 'sleepy_2')
+        assert self.met('sleepy_1', 'sleepy_2') == 2, 'tasks did not run in parallel'
+        assert self.executed_tasks() == set(['sleepy_1', 'sleepy_2']), \
+            'tasks were not executed by the worker processes'
+
+    def test_forwarded_execution(self):
+        self.run_jobs('follow_up')
+        assert self.executed_tasks() == set(['follow_up', 'followed']), \
+            'execution requested from a worker process was not run'
+
+    def test_output_capture(self):
+        scheduler = self.manager.scheduler
+        output = BufferQueue()
+        scheduler.start(run_schedules=False)
+        scheduler.execute(options={'tasks': ['quick']}, output=output)
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        assert 'executing quick' in ''.join(output.queue), 'output from worker process was not captured'
+
+    def test_config_updated(self):
+        scheduler = self.manager.scheduler
+        scheduler.start(run_schedules=False)
+        generation = scheduler.config_generation
+        # Worker processes are running already, the task is only in the config of the parent
+        config = copy.deepcopy(self.manager.config)
+        config['tasks']['added'] = {'test_rendezvous': {'dir': self.__tmp__, 'tasks': 1}}
+        self.manager.update_config(config)
+        assert scheduler.config_generation == generation + 1
+        scheduler.execute(options={'tasks': ['added']})
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        assert os.path.exists(os.path.join(self.__tmp__, 'added')), 'worker process did not use the current config'
+
+    def test_stale_config(self):
+        from flexget.scheduler import _execute_in_process
+        scheduler = self.manager.scheduler
+        assert _execute_in_process(0, 'quick', {}, False, scheduler.config_generation + 1) is None, \
+            'task should not run with an outdated config'
+        assert 'quick' not in self.executed_tasks()
+
+    def test_dead_worker(self):
+        self.run_jobs('crash', 'quick')
+        status = self.manager.scheduler.status()
+        assert status['tasks']['crash']['aborts'] == 1, 'job of a dead worker process should be aborted'
+        assert 'quick' in self.executed_tasks()
+
+
+class TestSchedulerDependencies(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          workers: 3
+        tasks:
+          feeder:
+            mock:
+              - {title: 'entry 1'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+            run_task:
+              task: fed
+          fed:
+            mock:
+              - {title: 'entry 2'}
+          dependant:
+            mock:
+              - {title: 'entry 3'}
+            depends_on: feeder
+          unrelated:
+            mock:
+              - {title: 'entry 4'}
+            test_rendezvous: {dir: '__tmp__', tasks: 2}
+    """
+
+    def setup(self):
+        super(TestSchedulerDependencies, self).setup()
+        self.completed = []
+        add_event_handler('task.execute.completed', self.on_completed)
+
+    def teardown(self):
+        remove_event_handler('task.execute.completed', self.on_completed)
+        super(TestSchedulerDependencies, self).teardown()
+
+    def on_completed(self, task):
+        self.completed.append(task.name)
+
+    def test_waves(self):
+        waves = self.manager.scheduler.task_waves(['feeder', 'fed', 'dependant', 'unrelated'])
+        assert [[t for t, _ in wave] for wave in waves] == [['feeder', 'unrelated'], ['fed', 'dependant']]
+        assert waves[1] == [('fed', set(['feeder'])), ('dependant', set(['feeder']))]
+
+    def test_dependency_loop(self):
+        self.manager.config['tasks']['feeder']['depends_on'] = 'fed'
+        waves = self.manager.scheduler.task_waves(['feeder', 'fed'])
+        assert waves == [[('feeder', set()), ('fed', set())]], 'dependency loop should be broken'
+
+    def test_execution_order(self):
+        self.run_jobs('dependant', 'fed', 'feeder', 'unrelated')
+        assert self.met('feeder', 'unrelated') == 2, 'independent tasks did not run in parallel'
+        # run_task queues another run of `fed` after `feeder`, only the first run counts here
+        for task in ['fed', 'dependant']:
+            assert self.completed.index(task) > self.completed.index('feeder'), \
+                '%s finished before the task it depends on' % task
+
+
+class TestSchedulerJitter(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          spread: yes
+        schedules:
+          - tasks: [first, second]
+            interval:
+              hours: 1
+              jitter: 10 minutes
+          - tasks: third
+            interval:
+              hours: 2
+        tasks:
+          first:
+            mock:
+              - {title: 'entry 1'}
+          second:
+            mock:
+              - {title: 'entry 2'}
+            depends_on: first
+          third:
+            mock:
+              - {title: 'entry 3'}
+    """
+
+    def setup(self):
+        super(TestSchedulerJitter, self).setup()
+        # Scheduled runs would also queue the database cleanup, keep it out of the run queue
+        self.manager.persist['last_cleanup'] = datetime.now()
+        self.manager.scheduler.load_schedules()
+
+    def delayed_jobs(self):
+        return dict((item[2].task, item[0]) for item in self.manager.scheduler._heap if isinstance(item[2], Job))
+
+    def test_task_delay(self):
+        window = timedelta(minutes=10)
+        for task in ['first', 'second', 'third']:
+            delay = task_delay(task, window)
+            assert timedelta() <= delay < window, 'delay %s is not within the window' % delay
+            assert delay == task_delay(task, window), 'delay should always be the same for a task'
+        assert task_delay('first', window) != task_delay('second', window)
+
+    def test_jitter(self):
+        scheduler = self.manager.scheduler
+        before = datetime.now()
+        scheduler.queue_pending_jobs()
+        delayed = self.delayed_jobs()
+        assert delayed['first'] - before < timedelta(minutes=10), 'jitter of the schedule was not used'
+        assert delayed['second'] >= delayed['first'], 'task should not start before the task it depends on'
+        # Schedules without jitter are spread over their whole interval
+        assert delayed['third'] - before >= timedelta(minutes=10), 'spread over the interval was not used'
+        assert scheduler.run_queue.qsize() == 0, 'delayed jobs should not be queued yet'
+        # Make the delayed jobs due
+        scheduler._heap = [(before, seq, item) for _, seq, item in scheduler._heap]
+        heapq.heapify(scheduler._heap)
+        scheduler.queue_pending_jobs()
+        assert scheduler.run_queue.qsize() == 3, 'due jobs were not queued'
+
+
+class TestSchedulerStatus(SchedulerBase):
+
+    __yaml__ = """
+        schedules:
+          - tasks: 'test*'
+            interval:
+              minutes: 30
+        tasks:
+          test:
+            mock:
+              - {title: 'entry'}
+          manual_task:
+            mock:
+              - {title: 'entry'}
+            manual: yes
+    """
+
+    def setup(self):
+        super(TestSchedulerStatus, self).setup()
+        self.manager.scheduler.load_schedules()
+
+    def test_status(self):
+        scheduler = self.manager.scheduler
+        scheduler.start(run_schedules=False)
+        # Manual task is not specified in --tasks, so it gets aborted
+        scheduler.execute(options={'tasks': None})
+        scheduler.execute(options={'tasks': ['test']})
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        status = scheduler.status()
+        assert status['queued'] == 0
+        test = status['tasks']['test']
+        assert test['runs'] == 2 and test['aborts'] == 0, test
+        assert len(test['durations']) == 2 and len(test['queue_waits']) == 2
+        assert test['interval'] == 1800, 'interval of the schedule running the task should be given'
+        manual = status['tasks']['manual_task']
+        assert manual['runs'] == 1 and manual['aborts'] == 1, manual
+        assert manual['interval'] is None
+        lines = format_status(status)
+        assert len(lines) == 4, lines
+
+
+class TestSchedulerSharedInputs(SchedulerBase):
+
+    __yaml__ = """
+        scheduler:
+          workers: 2
+        tasks:
+          shared_1:
+            test_slow_input: 3
+            accept_all: yes
+            seen: local
+            test_accepted_recorder: yes
+          shared_2:
+            test_slow_input: 3
+            accept_all: yes
+            seen: local
+            test_accepted_recorder: yes
+          other:
+            test_slow_input: 1
+    """
+
+    def test_shared_inputs(self):
+        SlowInput.fetches = 0
+        AcceptedRecorder.accepted.clear()
+        scheduler = self.manager.scheduler
+        scheduler.start(run_schedules=False)
+        # Memory cache would also prevent the second fetch, make sure it is not used
+        scheduler.execute(options={'tasks': ['shared_1', 'shared_2', 'other'], 'nocache': True})
+        scheduler.shutdown(finish_queue=True)
+        scheduler.wait()
+        assert SlowInput.fetches == 2, 'identical inputs should be fetched once (fetched %s times)' % SlowInput.fetches
+        status = scheduler.status()
+        assert status['input_fetches'] == 2 and status['input_fetches_saved'] == 1, status
+        first, second = AcceptedRecorder.accepted['shared_1'], AcceptedRecorder.accepted['shared_2']
+        assert len(first) == 3 and len(second) == 3
+        assert not any(a is b for a, b in zip(first, second)), 'tasks should not share entry instances'
+
+    def test_nocache_not_shared(self):
+        SlowInput.fetches = 0
+        shared_inputs = SharedInputs(2)
+        instance = plugin.get_plugin_by_name('test_slow_input').instance
+        for nocache in (False, True):
+            task = Task(self.manager, 'shared_1', options={'nocache': nocache})
+            task.shared_inputs = shared_inputs
+            # Amount of entries differs from the other tests, so nothing is in the memory cache yet
+            instance.on_task_input(task, 4)
+        assert SlowInput.fetches == 2, 'task run with --nocache should not get entries fetched without it'
+        assert shared_inputs.saved == 0
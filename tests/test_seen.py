@@ -1,5 +1,16 @@
 from __future__ import unicode_literals, division, absolute_import
-from tests import FlexGetBase
+import multiprocessing
+import os
+import sys
+
+from mock import patch
+
+from flexget.event import fire_event
+from flexget.manager import Session
+from flexget.options import get_parser
+from flexget.plugins.filter.seen import FilterSeen
+from flexget.utils.bloom import BloomFilter
+from tests import FlexGetBase, util, register_mock_plugin, unregister_mock_plugin
 
 
 class TestFilterSeen(FlexGetBase):
@@ -53,6 +64,16 @@ class TestFilterSeen(FlexGetBase):
         assert self.task.find_entry(title='New title 1') and self.task.find_entry(title='New title 2'), \
             'Item should not have been rejected because of number field'
 
+    def test_lookup_chunks(self):
+        self.execute_task('test')
+        # Plugin modules are loaded by the plugin loader, patch the loaded one
+        with patch.object(sys.modules['flexget.plugins.filter.seen'], 'LOOKUP_CHUNK_SIZE', 1):
+            self.execute_task('test2')
+        assert len(self.task.rejected) == 2, 'entries seen by url and title should be rejected'
+        assert 'http://localhost/seen1' in self.task.find_entry('rejected', title='Seen title 2')['reason'], \
+            'reason should tell which value was seen'
+        assert self.task.find_entry('accepted', title='Seen title 3'), 'Unseen test entry 3 not in second task'
+
     def test_learn(self):
         self.execute_task('test_learn', options={'learn': True})
         assert len(self.task.accepted) == 1, 'entry should have been accepted'
@@ -60,6 +81,50 @@ class TestFilterSeen(FlexGetBase):
         self.execute_task('test_learn')
         assert len(self.task.rejected) == 1, 'Seen plugin should have rejected on second run'
 
+class LearnRecorder(FilterSeen):
+    """Fake seen plugin, records the entries it learns."""
+
+    learned = []
+
+    def __init__(self):
+        super(LearnRecorder, self).__init__()
+        self.keyword = 'test_learn_recorder'
+
+    def learn(self, task, entry, fields=None, reason=None, local=False):
+        LearnRecorder.learned.append(entry['title'])
+        super(LearnRecorder, self).learn(task, entry, fields=fields, reason=reason, local=local)
+
+
+class TestSeenSubclass(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'entry 1'}
+              - {title: 'entry 2'}
+            accept_all: yes
+            test_learn_recorder: yes
+    """
+
+    def setup(self):
+        register_mock_plugin(LearnRecorder, 'test_learn_recorder', api_ver=2)
+        super(TestSeenSubclass, self).setup()
+        LearnRecorder.learned = []
+
+    def teardown(self):
+        try:
+            super(TestSeenSubclass, self).teardown()
+        finally:
+            unregister_mock_plugin('test_learn_recorder')
+
+    def test_learn_overridden(self):
+        self.execute_task('test')
+        assert sorted(LearnRecorder.learned) == ['entry 1', 'entry 2'], 'overridden learn should be called'
+        self.execute_task('test')
+        assert len(self.task.rejected) == 2, 'entries should have been learned'
+
+
 class TestSeenLocal(FlexGetBase):
 
     __yaml__ = """
@@ -95,6 +160,182 @@ class TestSeenLocal(FlexGetBase):
         assert self.task.find_entry('accepted', title='item 2'), 'item 2 should be accepted'
 
 
+class TestSeenFilter(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Seen title 1', url: 'http://localhost/seen1'}
+            accept_all: yes
+    """
+
+    def test_learn_and_forget(self):
+        from flexget.plugins.filter.seen import seen_filter
+        self.execute_task('test')
+        session = Session()
+        try:
+            assert 'Seen title 1' in seen_filter(session), 'learned title should be in the filter'
+            assert 'http://localhost/seen1' in seen_filter(session), 'learned url should be in the filter'
+            assert 'Never seen' not in seen_filter(session), 'filter should rule out values never seen'
+        finally:
+            session.close()
+        fire_event('forget', 'Seen title 1')
+        session = Session()
+        try:
+            assert 'Seen title 1' not in seen_filter(session), 'forgotten title should be dropped from the filter'
+        finally:
+            session.close()
+        self.execute_task('test')
+        assert self.task.accepted, 'forgotten entry should be accepted again'
+
+    def test_file(self):
+        path = os.path.join(util.maketemp(), 'test.seen-filter')
+        bloom = BloomFilter(path)
+        bloom.add('value')
+        bloom.sync(1, 2)
+        bloom.close()
+        bloom = BloomFilter(path)
+        assert 'value' in bloom and 'other value' not in bloom, 'filter should be loaded from the file'
+        assert bloom.stamp == (1, 2)
+        BloomFilter.build(path, ['new value'], (3, 4)).close()
+        assert bloom.stale and bloom.replaced, 'replaced filter should be marked stale'
+        assert 'other value' in bloom, 'stale filter should not rule out values'
+        bloom.close()
+        bloom = BloomFilter(path)
+        assert 'new value' in bloom and 'value' not in bloom, 'built filter should be moved in place'
+        assert bloom.stamp == (3, 4) and not bloom.stale and not bloom.replaced
+        bloom.close()
+
+    def test_processes(self):
+        path = os.path.join(util.maketemp(), 'test.seen-filter')
+        BloomFilter(path).close()
+        processes = [multiprocessing.Process(target=_add_values, args=(path, prefix)) for prefix in ('a', 'b')]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        bloom = BloomFilter(path)
+        try:
+            assert not bloom.stale, 'filter should be usable after processes added values'
+            missing = [value for prefix in ('a', 'b') for value in _values(prefix) if value not in bloom]
+            assert not missing, 'processes lost each others values: %s' % missing[:10]
+        finally:
+            bloom.close()
+
+    def test_forget_while_learning(self):
+        from flexget.plugins.filter.seen import seen_filter, _learning_filter
+        self.execute_task('test')
+        learning = Session()
+        try:
+            _learning_filter(learning).add('Learned value')
+            fire_event('forget', 'Seen title 1')
+            session = Session()
+            try:
+                assert 'Learned value' in seen_filter(session), 'filter should not be rebuilt while learning'
+            finally:
+                session.close()
+        finally:
+            learning.close()
+        self.execute_task('test')
+        fire_event('forget', 'Seen title 1')
+        session = Session()
+        try:
+            assert 'Learned value' not in seen_filter(session), 'filter should be rebuilt once learning has ended'
+        finally:
+            session.close()
+
+
+def _values(prefix):
+    return ['%s value %s' % (prefix, i) for i in range(2000)]
+
+
+def _add_values(path, prefix):
+    """Adds values to the filter in `path` from another process, one by one and in small batches."""
+    bloom = BloomFilter(path)
+    values = _values(prefix)
+    for value in values[:1000]:
+        bloom.add(value)
+    for start in range(1000, len(values), 20):
+        bloom.update(values[start:start + 20])
+    bloom.close()
+
+
+class TestSeenImport(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Imported title', url: 'http://localhost/new1'}
+              - {title: 'New title', url: 'http://localhost/imported'}
+              - {title: 'Other title', url: 'http://localhost/new2'}
+            accept_all: yes
+    """
+
+    def test_import(self):
+        from flexget.plugins.filter.seen import seen_import
+        path = os.path.join(util.maketemp(), 'seen.txt')
+        with open(path, 'w') as f:
+            f.write('Imported title\n\nhttp://localhost/imported\n')
+        options = get_parser().parse_args(['seen', 'import', path])
+        seen_import(self.manager, options.seen)
+        self.execute_task('test')
+        assert self.task.find_entry('rejected', title='Imported title'), 'imported title should be seen'
+        assert self.task.find_entry('rejected', title='New title'), 'imported url should be seen'
+        assert self.task.find_entry('accepted', title='Other title'), 'other title should not be seen'
+
+
+class TestSeenSearch(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'Some.Show.S01E01.720p', url: 'http://localhost/some'}
+              - {title: 'Other.Show.S01E01', url: 'http://localhost/other'}
+            accept_all: yes
+    """
+
+    def search(self, term):
+        from flexget.plugins.filter.seen import search
+        session = Session()
+        try:
+            return set(se.title for se in search(session, term))
+        finally:
+            session.close()
+
+    def check_search(self):
+        from flexget.plugins.filter.seen import seen_add
+        self.execute_task('test')
+        seen_add(self.manager, get_parser().parse_args(['seen', 'add', 'Added Show']).seen)
+        assert self.search('show') == set(['Some.Show.S01E01.720p', 'Other.Show.S01E01', 'Added Show'])
+        assert self.search('some.sh') == set(['Some.Show.S01E01.720p'])
+        assert self.search('ADDED') == set(['Added Show']), 'search should not be case sensitive'
+        assert self.search('how') == self.search('show'), 'search should find text in the middle of words'
+        assert self.search('01e01') == set(['Some.Show.S01E01.720p', 'Other.Show.S01E01'])
+        assert self.search('ded sh') == set(['Added Show'])
+        assert not self.search('missing')
+
+    def test_search(self):
+        from flexget.plugins.filter.seen import seen_value_index
+        assert seen_value_index.uses_triggers, 'sqlite full text index should be used'
+        self.check_search()
+
+    def test_search_tokens(self):
+        from flexget.plugins.filter.seen import seen_value_index
+        session = Session()
+        try:
+            seen_value_index._drop(session)
+            with patch.object(seen_value_index, 'kinds', ('tokens',)):
+                seen_value_index.create(session)
+            session.commit()
+        finally:
+            session.close()
+        assert seen_value_index.kind == 'tokens'
+        self.check_search()
+
+
 class TestFilterSeenMovies(FlexGetBase):
 
     __yaml__ = """
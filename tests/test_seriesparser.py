@@ -2,7 +2,7 @@
 
 from __future__ import unicode_literals, division, absolute_import
 from nose.tools import assert_raises, raises
-from flexget.utils.titles import SeriesParser, ParseWarning
+from flexget.utils.titles import SeriesParser, SeriesIndex, ParseWarning
 
 #
 # NOTE:
@@ -619,3 +619,38 @@ class TestSeriesParser(object):
         assert s.episode == 14
         assert s.quality.name == '720p hdtv h264 aac'
         assert not s.proper, 'detected proper'
+
+
+class TestSeriesIndex(object):
+
+    def test_candidates(self):
+        index = SeriesIndex()
+        index.add('The Show', ['The Show', 'Show'])
+        index.add('The Show Extra', ['The Show Extra'])
+        index.add('Law & Order', ['Law & Order'])
+        index.add('Show (US)', ['Show (US)'])
+        index.add('Custom', ['Custom'], name_regexps=['^cust.m'])
+        assert index.candidates('The.Show.S01E01') == set(['The Show', 'Custom'])
+        assert index.candidates('the_show_extra s01e01') == set(['The Show', 'The Show Extra', 'Custom'])
+        assert index.candidates('[group] Show US S01E01') == set(['The Show', 'Show (US)', 'Custom'])
+        assert index.candidates('Law and Order S01E01') == set(['Law & Order', 'Custom'])
+        assert index.candidates('Not The Show S01E01') == set(['Custom'])
+
+    def test_parser_matches_are_candidates(self):
+        """Every text a parser matches must be a candidate for its series."""
+        names = ['Something Interesting', "FlexGet's show", 'Law and Order', 'Show (UK)', 'H.I.M.', 'Ser.ies']
+        texts = ['Something.Interesting.S01E02.Proper-FlexGet', 'SomethingInteresting.S01E02',
+                 'Flexgets show s01e01', 'FlexGet.s.Show.S01E01', 'Law & Order S01E01', 'law.and.order.s01e01',
+                 '[grp] Show.UK.S01E01', 'Show S01E01', 'HD 720p: H I M S01E01', 'HIM.s01e01', 'Ser_ies S01E01']
+        index = SeriesIndex()
+        for name in names:
+            index.add(name, [name])
+        for text in texts:
+            for name in names:
+                parser = SeriesParser(name)
+                try:
+                    parser.parse(text)
+                except ParseWarning:
+                    continue
+                if parser.valid:
+                    assert name in index.candidates(text), '%s matches %s but is not a candidate' % (text, name)
@@ -0,0 +1,86 @@
+from __future__ import unicode_literals, division, absolute_import
+
+from tests import FlexGetBase, register_mock_plugin, unregister_mock_plugin
+from flexget.task import SpilledEntry
+
+
+def spilled_entries(task):
+    return [entry for entry in list.__iter__(task.all_entries) if isinstance(entry, SpilledEntry)]
+
+
+class SpillProbe(object):
+    """Fake plugin, records the spilled entries in the learn phase and the entries seen by the exit phase."""
+
+    spilled = []
+    exit_extras = []
+    completed = []
+
+    def on_task_learn(self, task, config):
+        SpillProbe.spilled = spilled_entries(task)
+        for entry in task.all_entries:
+            entry.on_complete(self.complete)
+
+    def on_task_exit(self, task, config):
+        SpillProbe.exit_extras = [entry.get('extra') for entry in task.all_entries]
+
+    def complete(self, entry, **kwargs):
+        SpillProbe.completed.append(entry.get('extra'))
+
+
+class TestSpill(FlexGetBase):
+
+    __yaml__ = """
+        tasks:
+          test:
+            mock:
+              - {title: 'entry 1', url: 'http://localhost/1', extra: 'one'}
+              - {title: 'entry 2', url: 'http://localhost/2', extra: 'two'}
+              - {title: 'entry 3', url: 'http://localhost/3', extra: 'three'}
+              - {title: 'entry 4', url: 'http://localhost/4', extra: 'four'}
+            spill: 2
+            test_spill_probe: yes
+            regexp:
+              reject:
+                - entry [123]
+              rest: accept
+    """
+
+    def setup(self):
+        register_mock_plugin(SpillProbe, 'test_spill_probe', api_ver=2)
+        super(TestSpill, self).setup()
+        SpillProbe.spilled = []
+        SpillProbe.exit_extras = []
+        SpillProbe.completed = []
+
+    def teardown(self):
+        try:
+            super(TestSpill, self).teardown()
+        finally:
+            unregister_mock_plugin('test_spill_probe')
+
+    def test_spill(self):
+        self.execute_task('test')
+        spilled = SpillProbe.spilled
+        assert len(spilled) == 3, 'rejected entries should have been spilled'
+        assert spilled[0]['title'] == 'entry 1'
+        assert spilled[0]['reason'], 'reason should be kept in memory'
+        assert 'extra' not in spilled[0], 'other fields should be on disk'
+        assert len(self.task.rejected) == 3
+
+    def test_exit(self):
+        self.execute_task('test')
+        assert SpillProbe.exit_extras == ['one', 'two', 'three', 'four'], \
+            'exit phase should get the spilled entries back'
+        assert sorted(SpillProbe.completed) == ['four', 'one', 'three', 'two'], \
+            'completion hooks should get the spilled entries back'
+        assert not spilled_entries(self.task)
+
+    def test_rehydrate(self):
+        self.execute_task('test')
+        assert self.task.all_entries.spill() == 3
+        entry = self.task.find_entry('rejected', title='entry 2')
+        assert entry['extra'] == 'two', 'find_entry should load spilled entries'
+        assert len(spilled_entries(self.task)) == 2
+        assert [e['extra'] for e in self.task.rejected] == ['one', 'two', 'three']
+        assert not spilled_entries(self.task), 'iterating rejected entries should load them'
+        assert self.task.find_entry('accepted', title='entry 4')
@@ -0,0 +1,128 @@
+from __future__ import unicode_literals, division, absolute_import
+import os
+
+from tests import FlexGetBase, register_mock_plugin, unregister_mock_plugin
+from flexget import plugin
+from flexget.entry import Entry
+
+
+class GeneratedInput(object):
+    """Fake input plugin, yields the configured amount of entries."""
+
+    def on_task_input(self, task, config):
+        for i in range(config):
+            yield Entry('entry %s' % i, 'http://localhost/%s' % i)
+
+
+class ChunkRecorder(object):
+    """Fake streaming filter, records the amount of entries it is called with."""
+
+    chunks = []
+
+    @plugin.streaming
+    def on_task_filter(self, task, config):
+        self.chunks.append(len(task.all_entries))
+
+
+class Injector(object):
+    """Fake builtin input, injects an entry like backlog does."""
+
+    @plugin.priority(-250)
+    def on_task_input(self, task, config):
+        return [Entry('injected', 'http://localhost/injected')]
+
+
+class InputHook(object):
+    """Fake streaming builtin input hook, marks the entries it sees like remember_rejected adds its hooks."""
+
+    @plugin.priority(-255)
+    @plugin.streaming
+    def on_task_input(self, task, config):
+        for entry in task.all_entries:
+            entry['hooked'] = True
+
+
+class StreamBase(FlexGetBase):
+
+    plugins = [(GeneratedInput, 'test_generated_input', {}), (ChunkRecorder, 'test_chunk_recorder', {})]
+
+    def setup(self):
+        for plugin_class, name, kwargs in self.plugins:
+            register_mock_plugin(plugin_class, name, api_ver=2, **kwargs)
+        super(StreamBase, self).setup()
+
+    def teardown(self):
+        try:
+            super(StreamBase, self).teardown()
+        finally:
+            for plugin_class, name, kwargs in self.plugins:
+                unregister_mock_plugin(name)
+
+
+class TestStream(StreamBase):
+
+    __tmp__ = True
+    __yaml__ = """
+        tasks:
+          test:
+            test_generated_input: 5
+            stream: 2
+            test_chunk_recorder: yes
+            regexp:
+              reject:
+                - entry [13]
+              rest: accept
+          test_blocked:
+            test_generated_input: 5
+            stream: 2
+            test_chunk_recorder: yes
+            series:
+              - some series
+          test_exists:
+            mock:
+              - {title: 'Dup.Title'}
+              - {title: 'New.Title'}
+            stream: yes
+            accept_all: yes
+            exists: __tmp__
+    """
+
+    def test_chunks(self):
+        del ChunkRecorder.chunks[:]
+        self.execute_task('test')
+        assert ChunkRecorder.chunks == [2, 2, 1], 'filter was called with chunks %s' % ChunkRecorder.chunks
+        assert len(self.task.accepted) == 3
+        assert not self.task.find_entry('rejected', title='entry 1'), 'rejected entries should be discarded'
+        assert len(self.task.all_entries) == 3, 'rejected entries should be discarded'
+
+    def test_not_streaming_metainfo(self):
+        del ChunkRecorder.chunks[:]
+        self.execute_task('test_blocked')
+        assert ChunkRecorder.chunks == [5], 'filters should not stream after a non streaming metainfo plugin'
+
+    def test_not_streaming_filter(self):
+        open(os.path.join(self.__tmp__, 'Dup.Title'), 'w').close()
+        self.execute_task('test_exists')
+        # exists only looks at accepted entries, it must not stream before accept_all which does not stream
+        assert not self.task.find_entry('accepted', title='Dup.Title'), 'existing entry should not be accepted'
+        assert self.task.find_entry('accepted', title='New.Title')
+
+
+class TestStreamInjected(StreamBase):
+
+    plugins = StreamBase.plugins + [(Injector, 'test_injector', {'builtin': True}),
+                                    (InputHook, 'test_input_hook', {'builtin': True})]
+
+    __yaml__ = """
+        tasks:
+          test:
+            test_generated_input: 2
+            stream: 2
+            accept_all: yes
+    """
+
+    def test_injected_hooks(self):
+        self.execute_task('test')
+        assert self.task.find_entry(title='entry 0')['hooked']
+        assert self.task.find_entry(title='injected').get('hooked'), \
+            'injected entries should go through streamed input hooks'